@@ -19,6 +19,42 @@ def parse_args():
     backtest_parser.add_argument("--plot", action="store_true", help="차트 표시")
     backtest_parser.add_argument("--save-plot", help="차트 저장 경로")
 
+    # 사이클 리포트
+    cycles_parser = subparsers.add_parser("cycles", help="사이클별 분석 리포트")
+    cycles_parser.add_argument("--config", default="config.yaml", help="설정 파일")
+    cycles_parser.add_argument("--csv", help="CSV 저장 경로")
+
+    # 파라미터 탐색
+    optimize_parser = subparsers.add_parser("optimize", help="파라미터 탐색 (Successive Halving)")
+    optimize_parser.add_argument("--config", default="config.yaml", help="설정 파일 (optimize 섹션)")
+    optimize_parser.add_argument("--eta", type=int, help="단계별 축소 비율 (기본 3)")
+    optimize_parser.add_argument("--csv", help="전체 후보 결과 CSV 저장 경로")
+    optimize_parser.add_argument("--store", help="결과 저장소 SQLite 경로 (기본: config의 results.path)")
+    optimize_parser.add_argument("--batch", help="저장 시 배치 이름 (기본: 실행 시각)")
+
+    # 결과 조회
+    results_parser = subparsers.add_parser("results", help="저장된 탐색 결과 조회")
+    results_parser.add_argument("--config", default="config.yaml", help="설정 파일 (results.path)")
+    results_parser.add_argument("--store", help="결과 저장소 SQLite 경로")
+    results_parser.add_argument("--where", action="append", default=[],
+                                help="조건 (예: ticker=SOXL, divisions=30, max_drawdown_pct__gt=-40)")
+    results_parser.add_argument("--order-by", default="total_return_pct", help="정렬 컬럼")
+    results_parser.add_argument("--asc", action="store_true", help="오름차순")
+    results_parser.add_argument("--limit", type=int, default=20, help="최대 행 수")
+
+    # 분산 배치 캠페인
+    campaign_parser = subparsers.add_parser("campaign", help="여러 호스트로 나눠 돌리는 대규모 배치 (공유 디렉터리 큐)")
+    campaign_parser.add_argument("action", choices=["init", "work", "status", "merge"],
+                                 help="init: 샤드 계획, work: 워커 실행, status: 진행 상황, merge: 결과 합치기")
+    campaign_parser.add_argument("--root", required=True, help="공유 작업 디렉터리 (모든 호스트가 같은 경로)")
+    campaign_parser.add_argument("--config", default="config.yaml", help="설정 파일 (init 전용, campaign 섹션)")
+    campaign_parser.add_argument("--processes", type=int, default=1, help="이 호스트의 워커 프로세스 수")
+    campaign_parser.add_argument("--max-shards", type=int, help="워커당 처리할 최대 샤드 수")
+    campaign_parser.add_argument("--store", help="merge: 결과 저장소 SQLite 경로 (기본: config의 results.path)")
+    campaign_parser.add_argument("--batch", help="merge: 저장 시 배치 이름 (기본: 캠페인 이름)")
+    campaign_parser.add_argument("--csv", help="merge: CSV 저장 경로")
+    campaign_parser.add_argument("--partial", action="store_true", help="merge: 끝난 샤드만 합치기")
+
     # 시뮬레이션 표
     table_parser = subparsers.add_parser("table", help="주문 표 생성")
     table_parser.add_argument("--start-price", type=float, default=100.0, help="시작 가격")
@@ -26,6 +62,18 @@ def parse_args():
     table_parser.add_argument("--steps", type=int, help="시뮬레이션 단계 수")
     table_parser.add_argument("--config", default="config.yaml", help="설정 파일")
 
+    # 데이터 프리패치
+    prefetch_parser = subparsers.add_parser("prefetch", help="여러 종목 데이터 병렬 다운로드")
+    prefetch_parser.add_argument("tickers", nargs="+", help="종목 코드들")
+    prefetch_parser.add_argument("--config", default="config.yaml", help="설정 파일")
+    prefetch_parser.add_argument("--out", help="로컬 저장 디렉터리 (data.source: local 로 재사용)")
+    prefetch_parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="저장 형식")
+
+    # 장중 매도 조건 감시
+    monitor_parser = subparsers.add_parser("monitor", help="실시간 시세로 매도 조건 감시")
+    monitor_parser.add_argument("--config", default="config.yaml", help="설정 파일")
+    monitor_parser.add_argument("--url", required=True, help="시세 웹소켓 주소 (ws://...)")
+
     # 실시간 매매 (TODO)
     run_parser = subparsers.add_parser("run", help="실시간 자동매매")
     run_parser.add_argument("--config", default="config.yaml", help="설정 파일")
@@ -52,6 +100,138 @@ def run_backtest(args):
         sim.plot_performance(save_path=args.save_plot)
 
 
+def run_cycles(args):
+    sim = InfiniteBuySimulator(args.config)
+    print("Fetching data...")
+    sim.fetch_data()
+    print("Running backtest...")
+    sim.run_backtest()
+    df = sim.get_cycle_df()
+    if df.empty:
+        print("No cycles")
+        return
+    print("\nCycles:")
+    print(df.to_string(index=False))
+    print("\nCycle Summary:")
+    for k, v in sim.cycle_summary().items():
+        print(f"  {k.replace('_', ' ').title()}: {v}")
+    if args.csv:
+        df.to_csv(args.csv, index=False)
+        print(f"Saved to {args.csv}")
+
+
+def run_optimize(args):
+    from src.optimizer import SuccessiveHalving, expand_grid, grid_from_config, pareto_front
+    sim = InfiniteBuySimulator(args.config)
+    print("Fetching data...")
+    sim.fetch_data()
+    opt = sim.config.get('optimize') or {}
+    candidates = expand_grid(grid_from_config(sim))
+    search = SuccessiveHalving(sim, candidates, eta=args.eta or opt.get('eta', 3),
+                               min_bars=opt.get('min_bars', 120))
+    print(f"Searching {len(candidates)} candidates...")
+    total_bars = len(sim.bars()[0])
+    for keep, bars in search.schedule(total_bars):
+        print(f"  rung: {keep} candidates x {bars} bars")
+    finalists = search.run()
+    exhaustive = len(candidates) * total_bars
+    print(f"{search.bars_evaluated:,} bars processed in {search.evaluations} evaluations "
+          f"(exhaustive on full history: {exhaustive:,} bars, {search.bars_evaluated / exhaustive:.0%})")
+    print("\nPareto Front (return / MDD / exhaustion):")
+    print(search.to_frame(pareto_front(finalists)).to_string(index=False))
+    if args.csv:
+        search.to_frame().to_csv(args.csv, index=False)
+        print(f"Saved to {args.csv}")
+    store_path = args.store or (sim.config.get('results') or {}).get('path')
+    if store_path:
+        from src.results import ResultsStore
+        n = search.save(ResultsStore(store_path), batch=args.batch)
+        print(f"Appended {n} rows to {store_path}")
+
+
+def parse_where(items):
+    """["ticker=SOXL", "divisions=30", "max_drawdown_pct__gt=-40"] → 조건 dict (숫자는 숫자로)"""
+    where = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        if key.endswith("__in"):
+            where[key] = [_parse_value(v) for v in value.split(",")]
+        else:
+            where[key] = _parse_value(value)
+    return where
+
+
+def _parse_value(value):
+    for kind in (int, float):
+        try:
+            return kind(value)
+        except ValueError:
+            pass
+    return value
+
+
+def run_results(args):
+    import time
+    import yaml
+    from src.results import ResultsStore
+    path = args.store
+    if path is None:
+        with open(args.config, 'r') as f:
+            path = ((yaml.safe_load(f) or {}).get('results') or {}).get('path')
+    if not path:
+        print("결과 저장소 경로 없음 (--store 또는 config의 results.path)")
+        sys.exit(1)
+    store = ResultsStore(path)
+    where = parse_where(args.where)
+    t0 = time.perf_counter()
+    rows = store.query(where, order_by=args.order_by, desc=not args.asc, limit=args.limit)
+    elapsed = (time.perf_counter() - t0) * 1000
+    if not rows:
+        print("조건에 맞는 결과 없음")
+        return
+    import pandas as pd
+    print(pd.DataFrame(rows).drop(columns=['created'], errors='ignore').to_string(index=False))
+    print(f"\n{len(rows)} rows in {elapsed:.1f} ms")
+
+
+def run_campaign(args):
+    import time
+    import yaml
+    from src.campaign import Campaign, CampaignWorker, run_workers
+    campaign = Campaign(args.root)
+    if args.action == "init":
+        with open(args.config, 'r') as f:
+            created = campaign.init(yaml.safe_load(f))
+        print(f"{campaign.meta['name']}: {campaign.meta['shards']} shards ({created} new) in {args.root}")
+        return
+    if args.action == "work":
+        t0 = time.perf_counter()
+        if args.processes > 1:
+            n = run_workers(args.root, args.processes, max_shards=args.max_shards)
+        else:
+            n = CampaignWorker(campaign).run(max_shards=args.max_shards)
+        print(f"{n} shards in {time.perf_counter() - t0:.1f}s")
+    status = campaign.status()
+    print(f"{campaign.meta['name']}: done {status['done']}/{status['shards']} "
+          f"(todo {status['todo']}, claimed {status['claimed']})")
+    if args.action != "merge":
+        return
+    store = None
+    store_path = args.store or (campaign.meta['config'].get('results') or {}).get('path')
+    if store_path:
+        from src.results import ResultsStore
+        store = ResultsStore(store_path)
+    try:
+        df = campaign.merge(store, batch=args.batch, partial=args.partial)
+    except RuntimeError as e:
+        print(e)
+        sys.exit(1)
+    print(f"Merged {len(df)} rows" + (f" into {store_path}" if store else ""))
+    if args.csv:
+        df.to_csv(args.csv, index=False)
+        print(f"Saved to {args.csv}")
+
+
 def generate_order_table(args):
     # config에서 strategy 설정 읽기
     import yaml
@@ -73,6 +253,52 @@ def generate_order_table(args):
     print(df)
 
 
+def run_prefetch(args):
+    import time
+    import yaml
+    from src.data.prefetch import make_prefetcher
+    from src.data.local import LocalFileSource
+    with open(args.config, 'r') as f:
+        cfg = yaml.safe_load(f)
+    prefetcher = make_prefetcher(cfg.get('data'))
+    t0 = time.perf_counter()
+    frames = prefetcher.prefetch(args.tickers, cfg['backtest']['start_date'],
+                                 cfg['backtest']['end_date'], raise_on_error=False)
+    elapsed = time.perf_counter() - t0
+    for ticker, df in frames.items():
+        print(f"  {ticker}: {len(df)} bars")
+    missing = set(t.upper() for t in args.tickers) - set(frames)
+    if missing:
+        print(f"  실패: {', '.join(sorted(missing))}")
+    print(f"{len(frames)}/{len(args.tickers)} tickers in {elapsed:.2f}s")
+    if args.out:
+        store = LocalFileSource(args.out)
+        for ticker, df in frames.items():
+            store.save(ticker, df, fmt=args.format)
+        print(f"Saved to {args.out}")
+
+
+def run_monitor(args):
+    import asyncio
+    from src.live.quotes import QuoteConsumer, SellTriggerMonitor
+    sim = InfiniteBuySimulator(args.config)
+    print("Loading strategy state...")
+    sim.run_backtest()
+    strategy = sim.strategy
+    if strategy.position.total_shares == 0:
+        print("보유 수량 없음 → 감시할 매도 조건 없음")
+        return
+
+    def on_trigger(key, s, quote):
+        print(f"[SELL] {s.ticker} high {quote.high:.2f} >= target {s._target_sell_price():.2f} "
+              f"({quote.count} ticks)")
+
+    monitor = SellTriggerMonitor(on_trigger=on_trigger)
+    monitor.register(sim.ticker, strategy)
+    print(f"Watching {sim.ticker}: target {strategy._target_sell_price():.2f}")
+    asyncio.run(QuoteConsumer(monitor).run(args.url, [strategy.ticker], reconnect=True))
+
+
 def run_trading(args):
     print("실시간 자동매매는 아직 구현되지 않았습니다. 한투/키움 API 연동 필요.")
     sys.exit(1)
@@ -82,12 +308,24 @@ def main():
     args = parse_args()
     if args.command == "backtest":
         run_backtest(args)
+    elif args.command == "cycles":
+        run_cycles(args)
+    elif args.command == "optimize":
+        run_optimize(args)
+    elif args.command == "results":
+        run_results(args)
+    elif args.command == "campaign":
+        run_campaign(args)
     elif args.command == "table":
         generate_order_table(args)
+    elif args.command == "prefetch":
+        run_prefetch(args)
+    elif args.command == "monitor":
+        run_monitor(args)
     elif args.command == "run":
         run_trading(args)
     else:
-        print("사용법: python main.py [backtest|table|run]")
+        print("사용법: python main.py [backtest|cycles|optimize|results|campaign|table|prefetch|monitor|run]")
         sys.exit(1)
 
 
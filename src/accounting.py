@@ -0,0 +1,123 @@
+"""
+고정소수점(정수) 금액/수량 회계
+
+현금은 최소단위(센트) 정수, 수량은 10^share_decimals 단위 정수로 저장.
+반올림은 RoundingPolicy 한 곳에서만 처리 → 백테스트, 모의 브로커, 실계좌 결과가 정확히 일치
+"""
+import math
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+_EPS = 1e-9
+
+
+@dataclass(frozen=True)
+class RoundingPolicy:
+    """브로커 체결 규칙과 같은 반올림 정책
+    - cash_decimals: 현금 최소단위 (2 = 센트)
+    - share_decimals: 0 = 정수 주, 6 = 소수점 주식
+    - price_decimals: 호가 단위 (2 = 센트)
+    매수 LOC 가격은 내림, 매도 목표가는 올림, 체결금액은 반올림
+    """
+    cash_decimals: int = 2
+    share_decimals: int = 0
+    price_decimals: int = 2
+    cash_scale: int = field(init=False, repr=False)
+    share_scale: int = field(init=False, repr=False)
+    price_scale: int = field(init=False, repr=False)
+
+    def __post_init__(self):
+        # 핫 루프에서 매번 10**n 계산하지 않도록 미리 저장
+        object.__setattr__(self, 'cash_scale', 10 ** self.cash_decimals)
+        object.__setattr__(self, 'share_scale', 10 ** self.share_decimals)
+        object.__setattr__(self, 'price_scale', 10 ** self.price_decimals)
+
+    # ─── float ↔ 정수 단위 ────────────────────────────
+
+    def cash_units(self, amount: float) -> int:
+        """금액 → 최소단위 (내림, 예산 배정용)"""
+        return math.floor(amount * self.cash_scale + _EPS)
+
+    def buy_price_units(self, price: float) -> int:
+        """매수 지정가 → 호가 단위 (내림)"""
+        return math.floor(price * self.price_scale + _EPS)
+
+    def sell_price_units(self, price: float) -> int:
+        """매도 지정가 → 호가 단위 (올림)"""
+        return math.ceil(price * self.price_scale - _EPS)
+
+    def share_units(self, shares: float) -> int:
+        """수량 → 수량 단위 (내림)"""
+        return math.floor(shares * self.share_scale + _EPS)
+
+    # ─── 체결 계산 ─────────────────────────────────────
+
+    def fill_cost(self, share_units: int, price_units: int) -> int:
+        """체결금액 (최소단위, 반올림)"""
+        num = share_units * price_units * self.cash_scale
+        den = self.share_scale * self.price_scale
+        return (num + den // 2) // den
+
+    def shares_for(self, cash_units: int, price_units: int) -> Tuple[int, int]:
+        """예산으로 살 수 있는 최대 수량 → (수량 단위, 체결금액)"""
+        if price_units <= 0 or cash_units <= 0:
+            return 0, 0
+        den = self.share_scale * self.price_scale
+        shares = cash_units * den // (price_units * self.cash_scale)
+        cost = self.fill_cost(shares, price_units)
+        while shares > 0 and cost > cash_units:
+            shares -= 1
+            cost = self.fill_cost(shares, price_units)
+        return shares, cost
+
+
+@dataclass
+class FixedPosition:
+    """정수 단위 포지션 (Position과 같은 읽기 인터페이스)"""
+    policy: RoundingPolicy
+    round_num: int = 0
+    shares_units: int = 0
+    cost_units: int = 0
+    budget_units: int = 0
+    cum_buy_units: int = 0      # 매수 누적액 (T 계산용)
+
+    @property
+    def total_shares(self) -> float:
+        return self.shares_units / self.policy.share_scale
+
+    @property
+    def total_cost(self) -> float:
+        return self.cost_units / self.policy.cash_scale
+
+    @property
+    def remaining_budget(self) -> float:
+        return self.budget_units / self.policy.cash_scale
+
+    @property
+    def cumulative_buy_amount(self) -> float:
+        return self.cum_buy_units / self.policy.cash_scale
+
+    @property
+    def avg_price(self) -> float:
+        if self.shares_units == 0:
+            return 0.0
+        return self.total_cost / self.total_shares
+
+    def reset(self, budget_units: int):
+        self.round_num = 0
+        self.shares_units = 0
+        self.cost_units = 0
+        self.budget_units = budget_units
+        self.cum_buy_units = 0
+
+
+def policy_from_config(cfg: Optional[Dict]) -> Optional[RoundingPolicy]:
+    """config의 strategy 섹션 → RoundingPolicy (accounting: fixed 일 때만)
+    strategy:
+      accounting: fixed
+      rounding: {cash_decimals: 2, share_decimals: 0, price_decimals: 2}
+    """
+    cfg = cfg or {}
+    if cfg.get('accounting', 'float') != 'fixed':
+        return None
+    return RoundingPolicy(**(cfg.get('rounding') or {}))
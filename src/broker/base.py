@@ -47,6 +47,17 @@ class Broker(ABC):
         """매도 주문"""
         pass
 
+    def place_orders(self, orders: List[Dict]) -> List[Dict]:
+        """여러 주문 한 번에 제출 → 주문별 결과 (같은 순서)
+        - orders: [{"ticker", "side": "buy"/"sell", "price", "shares", "order_type"}, ...]
+        - 일괄 주문 API가 있는 증권사는 재정의, 기본은 한 건씩 제출
+        """
+        results = []
+        for o in orders:
+            place = self.place_buy_order if o["side"] == "buy" else self.place_sell_order
+            results.append(place(o["ticker"], o["price"], o["shares"], o.get("order_type", "market")))
+        return results
+
     @abstractmethod
     def get_order_history(self, start_date: str, end_date: str) -> List[Dict]:
         """주문 내역 조회"""
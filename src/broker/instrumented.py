@@ -0,0 +1,110 @@
+"""
+지표 수집용 브로커 래퍼
+모든 API 호출 시간/오류를 기록하고, 주문 시점에 정규장 마감까지 남은 시간(LOC 주문 여유)을 기록
+"""
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from .. import metrics
+from .base import Broker
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_CLOSE = (16, 0)   # 미국 정규장 마감 (현지 시각)
+
+CALL_SECONDS = metrics.histogram("broker_call_duration_seconds", "브로커 API 호출 시간", ["broker", "method"],
+                                 buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+CALL_ERRORS = metrics.counter("broker_call_errors_total", "브로커 API 오류 (예외 또는 status=error)", ["broker", "method"])
+ORDER_LEAD = metrics.histogram("broker_order_lead_seconds", "주문 제출 시점 ~ 정규장 마감까지 남은 시간 (음수 = 마감 후)",
+                               ["broker", "order_type"],
+                               buckets=(0, 30, 60, 120, 300, 600, 1800, 3600, 7200, 14400, 23400))
+
+_METHODS = ("connect", "disconnect", "get_balance", "get_positions", "place_buy_order",
+            "place_sell_order", "place_orders", "get_order_history", "get_current_price")
+
+
+def seconds_to_close(now: Optional[datetime] = None) -> float:
+    """현재 시각 → 당일 정규장 마감까지 남은 초 (뉴욕 시각 기준)"""
+    now = (now or datetime.now(timezone.utc)).astimezone(MARKET_TZ)
+    close = now.replace(hour=MARKET_CLOSE[0], minute=MARKET_CLOSE[1], second=0, microsecond=0)
+    return (close - now).total_seconds()
+
+
+class InstrumentedBroker(Broker):
+    """다른 브로커를 감싸서 호출마다 지표 기록 (동작은 그대로 위임)
+    broker = InstrumentedBroker(KISBroker(credentials))
+    """
+
+    def __init__(self, inner: Broker, name: Optional[str] = None,
+                 clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc)):
+        super().__init__(inner.credentials)
+        self.inner = inner
+        self.name = name or type(inner).__name__
+        self.clock = clock
+        # 라벨 미리 바인딩 (호출마다 라벨 조회 없음)
+        self._timers = {m: CALL_SECONDS.labels(self.name, m) for m in _METHODS}
+        self._errors = {m: CALL_ERRORS.labels(self.name, m) for m in _METHODS}
+        self._lead: Dict[str, metrics.HistogramChild] = {}
+
+    @property
+    def is_connected(self) -> bool:
+        return self.inner.is_connected
+
+    @is_connected.setter
+    def is_connected(self, value: bool):
+        pass  # 연결 상태는 내부 브로커가 관리
+
+    def _call(self, method: str, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = getattr(self.inner, method)(*args, **kwargs)
+        except Exception:
+            self._errors[method].inc()
+            raise
+        finally:
+            self._timers[method].observe(time.perf_counter() - started)
+        if isinstance(result, dict) and result.get("status") == "error":
+            self._errors[method].inc()
+        elif isinstance(result, list):
+            for r in result:
+                if isinstance(r, dict) and r.get("status") == "error":
+                    self._errors[method].inc()
+        return result
+
+    def _observe_lead(self, order_type: str):
+        child = self._lead.get(order_type)
+        if child is None:
+            child = self._lead[order_type] = ORDER_LEAD.labels(self.name, order_type)
+        child.observe(seconds_to_close(self.clock()))
+
+    def connect(self) -> bool:
+        return self._call("connect")
+
+    def disconnect(self):
+        return self._call("disconnect")
+
+    def get_balance(self) -> float:
+        return self._call("get_balance")
+
+    def get_positions(self, ticker: Optional[str] = None) -> Dict:
+        return self._call("get_positions", ticker)
+
+    def place_buy_order(self, ticker: str, price: float, shares: float, order_type: str = "market") -> Dict:
+        self._observe_lead(order_type)
+        return self._call("place_buy_order", ticker, price, shares, order_type)
+
+    def place_sell_order(self, ticker: str, price: float, shares: float, order_type: str = "market") -> Dict:
+        self._observe_lead(order_type)
+        return self._call("place_sell_order", ticker, price, shares, order_type)
+
+    def place_orders(self, orders: List[Dict]) -> List[Dict]:
+        for o in orders:
+            self._observe_lead(o.get("order_type", "market"))
+        return self._call("place_orders", orders)
+
+    def get_order_history(self, start_date: str, end_date: str) -> List[Dict]:
+        return self._call("get_order_history", start_date, end_date)
+
+    def get_current_price(self, ticker: str) -> float:
+        return self._call("get_current_price", ticker)
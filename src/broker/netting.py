@@ -0,0 +1,184 @@
+"""
+계좌/슬리브 간 주문 합치기 (같은 증권사 계좌에서 같은 종목을 여러 전략이 운용할 때)
+
+- 같은 (종목, 매수/매도, 주문 유형, 호가) 주문은 한 건으로 합쳐 place_orders()로 일괄 제출
+  → 장 마감 전 짧은 제출 시간에 API 호출 수 / 호출 제한 부담 감소
+- 체결은 요청 수량 비례로 정수 단위 배분 (최대 잉여 방식, 동률은 계좌·태그 순) → 항상 같은 결과
+- 부분 체결이 여러 번 와도 남은 수량 비례로 누적 배분 → 요청 수량 초과 / 배분 감소 없음
+- 매수와 매도는 상계하지 않음: LOC 매수(종가 ≤ 가격)와 매도(고가/종가 ≥ 가격)는 체결 조건이 달라
+  같은 가격이라도 한쪽만 체결될 수 있음
+- 서로 다른 증권사 계좌는 합칠 수 없음 → 계좌(브로커 인스턴스)마다 OrderAggregator 하나
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .. import metrics
+from ..accounting import RoundingPolicy
+from .base import Broker
+
+NETTING_ORDERS = metrics.counter("broker_netting_orders_total", "주문 합치기 전후 주문 수 (requested → submitted)",
+                                 ["stage"])
+
+
+@dataclass(frozen=True)
+class OrderRequest:
+    """전략 하나가 낸 주문 (tag: 전략 쪽 식별자, 예: buy_star)"""
+    account: str
+    ticker: str
+    side: str
+    price: float
+    shares: float
+    order_type: str = "loc"
+    tag: str = ""
+
+
+@dataclass
+class Allocation:
+    """합친 주문의 체결 중 한 전략 몫"""
+    account: str
+    tag: str
+    ticker: str
+    side: str
+    price: float
+    shares: float
+    amount: float
+    order_id: object = None
+
+
+@dataclass
+class NettedOrder:
+    """합쳐서 제출한 주문 (legs = [(요청, 수량 단위)], 배분 누적은 legs 순서)"""
+    ticker: str
+    side: str
+    order_type: str
+    price_units: int
+    legs: List[Tuple[OrderRequest, int]] = field(default_factory=list)
+    order_id: object = None
+    status: str = ""
+    filled_units: int = 0
+    filled_cash: int = 0
+    alloc_units: List[int] = field(default_factory=list)
+    alloc_cash: List[int] = field(default_factory=list)
+
+    @property
+    def share_units(self) -> int:
+        return sum(units for _, units in self.legs)
+
+
+def largest_remainder(total: int, weights: List[int]) -> List[int]:
+    """total을 weights 비례로 정수 배분 (합 == total, total ≤ sum(weights)면 각자 weight 이하)
+    나머지는 소수부가 큰 순서, 동률이면 앞 순서"""
+    wsum = sum(weights)
+    if wsum <= 0:
+        return [0] * len(weights)
+    out = [total * w // wsum for w in weights]
+    rest = total - sum(out)
+    for i in sorted(range(len(weights)), key=lambda i: (-(total * weights[i] % wsum), i))[:rest]:
+        out[i] += 1
+    return out
+
+
+class OrderAggregator:
+    """주문 모으기 → 합치기 → 일괄 제출 → 체결 배분
+    agg = OrderAggregator(broker)
+    agg.add("sleeve1", "TQQQ", "buy", 50.12, 10, "loc", tag="buy_star")
+    agg.submit()
+    allocations = agg.apply_fills(broker_fills)
+    """
+
+    def __init__(self, broker: Broker, rounding: Optional[RoundingPolicy] = None):
+        self.broker = broker
+        self.rounding = rounding or getattr(broker, "rounding", None) or RoundingPolicy()
+        self.pending: List[OrderRequest] = []
+        self.orders: Dict[object, NettedOrder] = {}
+        self.allocations: List[Allocation] = []
+
+    def add(self, account: str, ticker: str, side: str, price: float, shares: float,
+            order_type: str = "loc", tag: str = "") -> OrderRequest:
+        if side not in ("buy", "sell"):
+            raise ValueError(f"side는 buy/sell: {side!r}")
+        req = OrderRequest(account, ticker.upper(), side, float(price), float(shares), order_type, tag)
+        self.pending.append(req)
+        return req
+
+    def _price_units(self, req: OrderRequest) -> int:
+        if req.order_type == "market":
+            return 0
+        if req.side == "buy":
+            return self.rounding.buy_price_units(req.price)
+        return self.rounding.sell_price_units(req.price)
+
+    def net(self, requests: Optional[Iterable[OrderRequest]] = None) -> List[NettedOrder]:
+        """같은 호가 주문 합치기 (주문 순서: 종목, 매도 먼저, 유형, 가격 / 요청 순서: 계좌, 태그)"""
+        groups: Dict[Tuple, NettedOrder] = {}
+        for req in self.pending if requests is None else requests:
+            units = self.rounding.share_units(req.shares)
+            if units <= 0:
+                continue
+            key = (req.ticker, req.side != "sell", req.order_type, self._price_units(req))
+            order = groups.get(key)
+            if order is None:
+                order = groups[key] = NettedOrder(req.ticker, req.side, req.order_type, key[3])
+            order.legs.append((req, units))
+        netted = [groups[k] for k in sorted(groups)]
+        for order in netted:
+            order.legs.sort(key=lambda leg: (leg[0].account, leg[0].tag))
+            order.alloc_units = [0] * len(order.legs)
+            order.alloc_cash = [0] * len(order.legs)
+        return netted
+
+    def submit(self) -> List[NettedOrder]:
+        """모은 주문을 합쳐서 place_orders() 한 번으로 제출 (즉시 체결분은 바로 배분)"""
+        netted = self.net()
+        NETTING_ORDERS.labels("requested").inc(len(self.pending))
+        NETTING_ORDERS.labels("submitted").inc(len(netted))
+        self.pending = []
+        if not netted:
+            return netted
+        policy = self.rounding
+        results = self.broker.place_orders([
+            {"ticker": o.ticker, "side": o.side, "price": o.price_units / policy.price_scale,
+             "shares": o.share_units / policy.share_scale, "order_type": o.order_type}
+            for o in netted
+        ])
+        for order, result in zip(netted, results):
+            order.order_id = result.get("order_id")
+            order.status = result.get("status", "")
+            if order.status in ("error", "rejected") or order.order_id is None:
+                continue
+            self.orders[order.order_id] = order
+            if order.status == "filled":
+                self.apply_fills([result])
+        return netted
+
+    def apply_fills(self, fills: Iterable[Dict]) -> List[Allocation]:
+        """브로커 체결 통보 → 전략별 배분 (fill: order_id, shares, amount — 한 통보의 체결분)
+        모르는 주문 번호는 무시"""
+        policy = self.rounding
+        out = []
+        for fill in fills:
+            order = self.orders.get(fill.get("order_id"))
+            if order is None or fill.get("status", "filled") != "filled":
+                continue
+            units = min(round(fill["shares"] * policy.share_scale), order.share_units - order.filled_units)
+            cash = round(fill["amount"] * policy.cash_scale)
+            if units <= 0:
+                continue
+            # 남은 요청 수량 비례 → 누적 배분이 요청을 넘거나 줄지 않음
+            remaining = [u - a for (_, u), a in zip(order.legs, order.alloc_units)]
+            add_units = largest_remainder(units, remaining)
+            add_cash = largest_remainder(cash, add_units)
+            order.filled_units += units
+            order.filled_cash += cash
+            price = fill.get("price", order.price_units / policy.price_scale)
+            for i, ((req, _), du, dc) in enumerate(zip(order.legs, add_units, add_cash)):
+                if du == 0:
+                    continue
+                order.alloc_units[i] += du
+                order.alloc_cash[i] += dc
+                out.append(Allocation(req.account, req.tag, order.ticker, order.side, price,
+                                      du / policy.share_scale, dc / policy.cash_scale, order.order_id))
+            if order.filled_units >= order.share_units:
+                del self.orders[order.order_id]
+        self.allocations.extend(out)
+        return out
@@ -0,0 +1,127 @@
+"""
+모의 브로커 (페이퍼 트레이딩)
+백테스트와 같은 RoundingPolicy로 체결 → 결과가 정확히 일치
+"""
+import itertools
+from typing import Dict, List, Optional
+
+from ..accounting import RoundingPolicy
+from .base import Broker
+
+
+class PaperBroker(Broker):
+    """모의 브로커
+    - 시장가: 현재가로 즉시 체결
+    - 지정가/LOC: match() 호출 시 체결 (매수: 저가 ≤ 지정가, 매도: 고가 ≥ 지정가, 지정가로 체결)
+    """
+
+    def __init__(self, credentials: Optional[Dict] = None, cash: float = 0.0,
+                 rounding: Optional[RoundingPolicy] = None):
+        super().__init__(credentials or {})
+        self.rounding = rounding or RoundingPolicy()
+        self.cash_units = self.rounding.cash_units(cash)
+        self.holdings: Dict[str, Dict[str, int]] = {}   # {ticker: {"shares": 단위, "cost": 단위}}
+        self.prices: Dict[str, float] = {}
+        self.open_orders: List[Dict] = []
+        self.history: List[Dict] = []
+        self._ids = itertools.count(1)
+
+    def connect(self) -> bool:
+        self.is_connected = True
+        return True
+
+    def disconnect(self):
+        self.is_connected = False
+
+    def get_balance(self) -> float:
+        return self.cash_units / self.rounding.cash_scale
+
+    def get_positions(self, ticker: Optional[str] = None) -> Dict:
+        policy = self.rounding
+        out = {
+            t: {"shares": h["shares"] / policy.share_scale, "cost": h["cost"] / policy.cash_scale}
+            for t, h in self.holdings.items() if h["shares"] > 0
+        }
+        if ticker is not None:
+            return out.get(ticker.upper(), {})
+        return out
+
+    def place_buy_order(self, ticker: str, price: float, shares: float, order_type: str = "market") -> Dict:
+        return self._place(ticker, "buy", self.rounding.buy_price_units(price), shares, order_type)
+
+    def place_sell_order(self, ticker: str, price: float, shares: float, order_type: str = "market") -> Dict:
+        return self._place(ticker, "sell", self.rounding.sell_price_units(price), shares, order_type)
+
+    def get_order_history(self, start_date: str, end_date: str) -> List[Dict]:
+        return [o for o in self.history if start_date <= o.get("date", "") <= end_date]
+
+    def get_current_price(self, ticker: str) -> float:
+        return self.prices.get(ticker.upper(), 0.0)
+
+    # ─── 체결 처리 ─────────────────────────────────────
+
+    def _place(self, ticker: str, side: str, price_units: int, shares: float, order_type: str) -> Dict:
+        order = {
+            "order_id": next(self._ids),
+            "ticker": ticker.upper(),
+            "side": side,
+            "price_units": price_units,
+            "share_units": self.rounding.share_units(shares),
+            "order_type": order_type,
+        }
+        if order["share_units"] <= 0:
+            return {"status": "error", "message": "수량 0", "order_id": order["order_id"]}
+        if order_type == "market":
+            current = self.prices.get(order["ticker"])
+            if current is None:
+                return {"status": "error", "message": "현재가 없음", "order_id": order["order_id"]}
+            order["price_units"] = round(current * self.rounding.price_scale)
+            return self._fill(order, date="")
+        self.open_orders.append(order)
+        return {"status": "accepted", "order_id": order["order_id"]}
+
+    def _fill(self, order: Dict, date: str) -> Dict:
+        policy = self.rounding
+        h = self.holdings.setdefault(order["ticker"], {"shares": 0, "cost": 0})
+        amount = policy.fill_cost(order["share_units"], order["price_units"])
+        if order["side"] == "buy":
+            if amount > self.cash_units:
+                return {"status": "rejected", "message": "잔고 부족", "order_id": order["order_id"]}
+            self.cash_units -= amount
+            h["shares"] += order["share_units"]
+            h["cost"] += amount
+        else:
+            if order["share_units"] > h["shares"]:
+                return {"status": "rejected", "message": "보유 수량 부족", "order_id": order["order_id"]}
+            # 매도분 원가는 평균단가 기준 비례 차감
+            h["cost"] -= h["cost"] * order["share_units"] // h["shares"]
+            h["shares"] -= order["share_units"]
+            self.cash_units += amount
+        fill = {
+            "status": "filled",
+            "order_id": order["order_id"],
+            "ticker": order["ticker"],
+            "side": order["side"],
+            "price": order["price_units"] / policy.price_scale,
+            "shares": order["share_units"] / policy.share_scale,
+            "amount": amount / policy.cash_scale,
+            "date": date,
+        }
+        self.history.append(fill)
+        return fill
+
+    def match(self, ticker: str, date: str, high: float, low: float, close: float) -> List[Dict]:
+        """하루 봉으로 대기 주문 체결 (매도 먼저, 미체결은 당일 만료)"""
+        ticker = ticker.upper()
+        self.prices[ticker] = close
+        scale = self.rounding.price_scale
+        fills = []
+        orders = sorted((o for o in self.open_orders if o["ticker"] == ticker),
+                        key=lambda o: o["side"] != "sell")
+        for order in orders:
+            hit = (low * scale <= order["price_units"] + 1e-6 if order["side"] == "buy"
+                   else high * scale >= order["price_units"] - 1e-6)
+            if hit:
+                fills.append(self._fill(order, date))
+        self.open_orders = [o for o in self.open_orders if o["ticker"] != ticker]
+        return fills
@@ -0,0 +1,402 @@
+"""
+여러 호스트가 나눠 돌리는 대규모 백테스트 캠페인 (종목 x 롤링 시작일 x 파라미터 그리드)
+
+- init: 작업을 결정적인 샤드로 나눠 공유 디렉터리에 기록 (같은 설정이면 항상 같은 샤드)
+- work: 워커가 todo/의 샤드를 rename으로 가져감 (원자적 → 한 워커만 성공)
+  처리 중에는 자기 claimed 파일 mtime을 갱신 (lease), 만료된 샤드는 다른 워커가 todo/로 되돌림
+- 끝난 샤드는 done/에 결과를 원자적으로 기록 (= 체크포인트) → 워커가 죽어도 끝난 샤드는 다시 안 함
+- merge: done/ 결과를 샤드 순서대로 합침 (DataFrame, ResultsStore)
+- todo/, done/은 샤드 id 순서로 bucket_size개씩 하위 디렉터리에 나눠 둠
+  → 가져가기는 버킷 하나만 읽고, 끝난 버킷은 다시 세지 않음 (샤드가 수십만 개여도 디렉터리 전체를 안 읽음)
+  claimed/는 워커 수만큼만 있으므로 나누지 않음
+
+중앙 서버 없이 파일 rename만 쓰므로 공유 디렉터리(NFS 등)만 있으면 호스트를 늘린 만큼 처리량이 늘어남.
+lease는 호스트 간 시계 차이보다 넉넉하게 (기본 10분).
+
+    root/
+      campaign.json              설정 + 샤드 수 + 설정 해시
+      todo/000000/000042.json    대기 샤드 (종목, 기간, 파라미터 목록, 버킷 = 첫 샤드 id)
+      claimed/000042@host-1.json 처리 중 (mtime = 마지막 heartbeat)
+      done/000000/000042.json    결과
+"""
+import hashlib
+import json
+import os
+import socket
+import tempfile
+import time
+import zlib
+from bisect import bisect_right
+from typing import Dict, List, Optional, Set
+
+import pandas as pd
+
+from . import metrics
+from .optimizer import expand_grid, grid_from_config
+from .simulator import InfiniteBuySimulator
+
+SHARDS = metrics.counter("campaign_shards_total", "캠페인 샤드 처리 (done / reclaimed = 만료 회수 / lost = lease 잃음)",
+                         ["result"])
+_DONE = SHARDS.labels("done")
+_RECLAIMED = SHARDS.labels("reclaimed")
+_LOST = SHARDS.labels("lost")
+SHARD_SECONDS = metrics.histogram("campaign_shard_duration_seconds", "샤드 하나 처리 시간",
+                                  buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0))
+
+DEFAULT_SHARD_SIZE = 20
+DEFAULT_LEASE = 600.0
+DEFAULT_BUCKET_SIZE = 1000
+
+
+class LeaseLost(Exception):
+    """처리 중인 샤드를 다른 워커가 회수함 (lease 만료)"""
+
+
+def _write_json(path: str, obj):
+    """임시 파일에 쓰고 rename → 읽는 쪽은 항상 완성된 파일만 봄
+    임시 파일은 mkstemp로 (여러 호스트가 같은 pid로 써도 겹치지 않음)"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        os.fchmod(fd, 0o644)   # 다른 호스트 / 사용자의 워커도 읽을 수 있게 (mkstemp 기본 0600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(obj, f, default=str)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _read_json(path: str):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def rolling_windows(cfg: Dict, backtest: Dict) -> List[tuple]:
+    """campaign.rolling {start, end, every_months, years} → [(시작일, 종료일)]
+    종료일이 end를 넘는 구간은 제외, rolling이 없으면 backtest 기간 하나"""
+    rolling = cfg.get('rolling')
+    if not rolling:
+        return [(str(backtest['start_date']), str(backtest['end_date']))]
+    end = pd.Timestamp(rolling['end'])
+    length = pd.DateOffset(years=rolling.get('years', 1))
+    step = pd.DateOffset(months=rolling.get('every_months', 1))
+    windows = []
+    start = pd.Timestamp(rolling['start'])
+    while start + length <= end:
+        windows.append((start.strftime('%Y-%m-%d'), (start + length).strftime('%Y-%m-%d')))
+        start += step
+    return windows
+
+
+def plan_shards(config: Dict) -> List[Dict]:
+    """config → 샤드 목록 (종목, 구간, 그리드 순서로 shard_size개씩 — 같은 설정이면 항상 같은 결과)
+    샤드 하나는 한 종목·한 구간만 담음 → 워커는 일봉을 한 번 준비해 샤드 안 후보가 공유"""
+    cfg = config.get('campaign') or {}
+    tickers = [t.upper() for t in cfg.get('tickers') or [config['ticker']]]
+    size = int(cfg.get('shard_size', DEFAULT_SHARD_SIZE))
+    candidates = expand_grid(grid_from_config(InfiniteBuySimulator.from_config(config)))
+    shards = []
+    for ticker in tickers:
+        for start, end in rolling_windows(cfg, config['backtest']):
+            for i in range(0, len(candidates), size):
+                shards.append({'id': f"{len(shards):06d}", 'ticker': ticker, 'start_date': start,
+                               'end_date': end, 'params': candidates[i:i + size]})
+    return shards
+
+
+class Campaign:
+    """공유 디렉터리 작업 큐 (샤드 계획 / 가져가기 / 체크포인트 / 합치기)"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.todo = os.path.join(root, "todo")
+        self.claimed = os.path.join(root, "claimed")
+        self.done = os.path.join(root, "done")
+        self._meta = None
+        self._drained: Set[int] = set()    # 마지막으로 봤을 때 비어 있던 todo 버킷 (가져가기 때 뒤로 미룸)
+        self._complete: Set[int] = set()   # 전부 끝난 done 버킷 (done 파일은 지워지지 않으므로 다시 안 셈)
+
+    # ─── 계획 ─────────────────────────────────────────
+
+    @staticmethod
+    def config_hash(config: Dict) -> str:
+        return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+
+    def init(self, config: Dict) -> int:
+        """샤드 계획 기록 → 새로 만든 대기 샤드 수
+        같은 설정으로 다시 호출하면 빠진 샤드만 채움 (이미 끝났거나 처리 중인 샤드는 그대로)"""
+        digest = self.config_hash(config)
+        path = os.path.join(self.root, "campaign.json")
+        if os.path.exists(path) and _read_json(path)['hash'] != digest:
+            raise ValueError(f"{self.root}: 다른 설정의 캠페인이 이미 있음 (새 디렉터리를 쓰거나 지우고 다시 시작)")
+        shards = plan_shards(config)
+        cfg = config.get('campaign') or {}
+        os.makedirs(self.claimed, exist_ok=True)
+        _write_json(path, {
+            'hash': digest,
+            'name': cfg.get('name') or digest[:12],
+            'shards': len(shards),
+            'bucket_size': int(cfg.get('bucket_size', DEFAULT_BUCKET_SIZE)),
+            'lease': float(cfg.get('lease_seconds', DEFAULT_LEASE)),
+            'span': [min(s['start_date'] for s in shards), max(s['end_date'] for s in shards)] if shards else None,
+            'config': config,
+        })
+        self._meta = None
+        for b in range(self._buckets()):
+            for d in (self.todo, self.done):
+                os.makedirs(self._bucket_dir(d, b), exist_ok=True)
+        busy = {name.partition("@")[0] for name in self._names(self.claimed)}
+        for b in range(self._buckets()):
+            busy.update(name[:-5] for d in (self.todo, self.done) for name in self._names(self._bucket_dir(d, b)))
+        created = 0
+        for shard in shards:
+            if shard['id'] not in busy:
+                _write_json(self._path(self.todo, shard['id']), shard)
+                created += 1
+        return created
+
+    @property
+    def meta(self) -> Dict:
+        if self._meta is None:
+            self._meta = _read_json(os.path.join(self.root, "campaign.json"))
+        return self._meta
+
+    # ─── 큐 ───────────────────────────────────────────
+
+    @staticmethod
+    def _names(directory: str) -> List[str]:
+        """완성된 파일만 (쓰는 중인 .tmp 제외)"""
+        return sorted(n for n in os.listdir(directory) if n.endswith(".json"))
+
+    def _buckets(self) -> int:
+        size = self.meta['bucket_size']
+        return (self.meta['shards'] + size - 1) // size
+
+    def _bucket_of(self, shard_id: str) -> int:
+        return int(shard_id) // self.meta['bucket_size']
+
+    def _bucket_dir(self, directory: str, bucket: int) -> str:
+        return os.path.join(directory, f"{bucket * self.meta['bucket_size']:06d}")
+
+    def _path(self, directory: str, shard_id: str) -> str:
+        return os.path.join(self._bucket_dir(directory, self._bucket_of(shard_id)), f"{shard_id}.json")
+
+    def claim(self, worker: str, after: Optional[str] = None) -> Optional[str]:
+        """대기 샤드 하나를 rename으로 가져감 → claimed 파일 경로 (없으면 None)
+        워커마다 시작 위치를 달리해서 동시에 같은 샤드를 노리는 경우를 줄이고,
+        after(직전 샤드 id)가 있으면 그 다음부터 → 같은 구간 샤드를 이어서 처리 (일봉 재사용)
+        버킷 하나씩 읽음, 지난번에 비어 있던 버킷은 마지막에 확인 (만료 회수로 다시 찼을 수 있음)"""
+        count = self._buckets()
+        if count == 0:
+            return None
+        first = self._bucket_of(after) if after is not None else zlib.crc32(worker.encode()) % count
+        order = [(first + i) % count for i in range(count)]
+        if after is not None:   # after 다음 샤드부터, 같은 버킷의 앞쪽 샤드는 맨 마지막에
+            order = order[1:]
+        order = [b for b in order if b not in self._drained] + [b for b in order if b in self._drained]
+        if after is not None:
+            order = [first] + order + [first]
+        for i, bucket in enumerate(order):
+            names = self._names(self._bucket_dir(self.todo, bucket))
+            if after is not None and i == 0:
+                names = names[bisect_right(names, f"{after}.json"):]
+            elif names:
+                self._drained.discard(bucket)
+            else:
+                self._drained.add(bucket)
+            offset = 0 if after is not None else zlib.crc32(worker.encode()) % max(len(names), 1)
+            for name in names[offset:] + names[:offset]:
+                source = os.path.join(self._bucket_dir(self.todo, bucket), name)
+                target = os.path.join(self.claimed, f"{name[:-5]}@{worker}.json")
+                try:
+                    os.utime(source)   # rename 전에 갱신 → 가져가자마자 만료로 보이지 않게
+                    os.rename(source, target)
+                except FileNotFoundError:
+                    continue   # 다른 워커가 먼저 가져감
+                return target
+        return None
+
+    def reclaim_expired(self, now: Optional[float] = None) -> int:
+        """lease가 만료된 샤드를 todo/로 되돌림 → 되돌린 수 (rename이라 여러 워커가 동시에 해도 한 번만)"""
+        now = time.time() if now is None else now
+        lease = self.meta['lease']
+        count = 0
+        for name in self._names(self.claimed):
+            path = os.path.join(self.claimed, name)
+            try:
+                if now - os.path.getmtime(path) <= lease:
+                    continue
+                os.rename(path, self._path(self.todo, name.partition('@')[0]))
+            except FileNotFoundError:
+                continue
+            _RECLAIMED.inc()
+            count += 1
+        return count
+
+    @staticmethod
+    def heartbeat(claim: str):
+        """lease 갱신 (claimed 파일이 회수됐으면 LeaseLost)"""
+        try:
+            os.utime(claim)
+        except FileNotFoundError:
+            raise LeaseLost(claim) from None
+
+    @staticmethod
+    def shard_id(claim: str) -> str:
+        return os.path.basename(claim).partition("@")[0]
+
+    def complete(self, claim: str, result: Optional[Dict] = None):
+        """결과를 done/에 기록 (체크포인트) 후 claimed 파일 삭제 (result=None이면 삭제만)"""
+        if result is not None:
+            _write_json(self._path(self.done, self.shard_id(claim)), result)
+        try:
+            os.remove(claim)
+        except FileNotFoundError:
+            pass
+
+    def is_done(self, shard_id: str) -> bool:
+        return os.path.exists(self._path(self.done, shard_id))
+
+    def _bucket_len(self, bucket: int) -> int:
+        size = self.meta['bucket_size']
+        return min(size, self.meta['shards'] - bucket * size)
+
+    def done_count(self) -> int:
+        """끝난 샤드 수 (전부 끝난 버킷은 기억해 두고 다시 읽지 않음)"""
+        count = 0
+        for bucket in range(self._buckets()):
+            if bucket not in self._complete:
+                n = len(self._names(self._bucket_dir(self.done, bucket)))
+                if n < self._bucket_len(bucket):
+                    count += n
+                    continue
+                self._complete.add(bucket)
+            count += self._bucket_len(bucket)
+        return count
+
+    def status(self) -> Dict[str, int]:
+        todo = sum(len(self._names(self._bucket_dir(self.todo, b))) for b in range(self._buckets()))
+        return {'shards': self.meta['shards'], 'todo': todo,
+                'claimed': len(self._names(self.claimed)), 'done': self.done_count()}
+
+    def finished(self) -> bool:
+        return self.done_count() >= self.meta['shards']
+
+    # ─── 합치기 ───────────────────────────────────────
+
+    def results(self, partial: bool = False) -> List[Dict]:
+        """끝난 샤드 결과 행을 샤드 순서대로 (partial=False면 미완료 샤드가 있을 때 RuntimeError)"""
+        done = self.done_count()
+        if not partial and done < self.meta['shards']:
+            raise RuntimeError(f"미완료 샤드 {self.meta['shards'] - done}개 (partial=True로 끝난 것만)")
+        rows = []
+        for bucket in range(self._buckets()):
+            directory = self._bucket_dir(self.done, bucket)
+            for name in self._names(directory):
+                rows.extend(_read_json(os.path.join(directory, name))['rows'])
+        return rows
+
+    def merge(self, store=None, batch: Optional[str] = None, partial: bool = False) -> pd.DataFrame:
+        """결과 합치기 → DataFrame, store(ResultsStore)가 있으면 배치를 한 트랜잭션으로 교체 (다시 합쳐도 중복 없음)"""
+        rows = self.results(partial=partial)
+        if store is not None:
+            store.replace(batch or self.meta['name'], rows)
+        return pd.DataFrame(rows)
+
+
+class CampaignWorker:
+    """샤드를 가져가서 처리 → 체크포인트, 대기 샤드가 없으면 만료 샤드 회수, 전부 끝나면 종료
+    worker = CampaignWorker(Campaign("/shared/campaign"))
+    worker.run()
+    """
+
+    def __init__(self, campaign: Campaign, worker_id: Optional[str] = None, poll: Optional[float] = None):
+        self.campaign = campaign
+        raw = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.worker_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in raw)
+        self.lease = campaign.meta['lease']
+        self.poll = poll if poll is not None else min(self.lease / 4, 5.0)
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._sim = None
+
+    def simulator(self, ticker: str, start: str, end: str) -> InfiniteBuySimulator:
+        """종목 전체 기간은 워커당 한 번만 받고, 구간은 잘라서 사용 (연속 샤드는 같은 시뮬레이터 재사용)"""
+        sim = self._sim
+        if sim is not None and (sim.ticker, sim.backtest_start, sim.backtest_end) == (ticker, start, end):
+            return sim
+        config = dict(self.campaign.meta['config'])
+        config['ticker'] = ticker
+        config['backtest'] = {**config['backtest'], 'start_date': start, 'end_date': end}
+        sim = InfiniteBuySimulator.from_config(config)
+        if ticker not in self._frames:
+            span_start, span_end = self.campaign.meta['span']
+            self._frames[ticker] = sim.prefetcher.fetch_one(ticker, span_start, span_end)
+        full = self._frames[ticker]
+        mask = (full['Date'] >= pd.Timestamp(start)) & (full['Date'] < pd.Timestamp(end))   # end 제외 (데이터 소스와 동일)
+        sim.set_data(full[mask].reset_index(drop=True))
+        self._sim = sim
+        return sim
+
+    def run_shard(self, claim: str, shard: Dict) -> Dict:
+        t0 = time.perf_counter()
+        beat = time.time()
+        sim = self.simulator(shard['ticker'], shard['start_date'], shard['end_date'])
+        meta = {'ticker': shard['ticker'], 'start_date': shard['start_date'], 'end_date': shard['end_date']}
+        rows = []
+        for params in shard['params']:
+            rows.append({**params, **sim.evaluate(sim.candidate_strategy(params)), **meta, 'shard': shard['id']})
+            if time.time() - beat > self.lease / 4:
+                self.campaign.heartbeat(claim)
+                beat = time.time()
+        seconds = time.perf_counter() - t0
+        SHARD_SECONDS.observe(seconds)
+        return {'id': shard['id'], 'worker': self.worker_id, 'seconds': round(seconds, 3), 'rows': rows}
+
+    def run(self, max_shards: Optional[int] = None, wait: bool = True) -> int:
+        """샤드 처리 → 이번에 처리한 샤드 수
+        - max_shards: 이만큼 처리하면 종료 (테스트 / 선점형 인스턴스 시간 제한)
+        - wait: 대기 샤드가 없어도 다른 워커가 처리 중이면 기다렸다가 만료 샤드를 회수"""
+        campaign = self.campaign
+        done = 0
+        last = None
+        while max_shards is None or done < max_shards:
+            claim = campaign.claim(self.worker_id, after=last)
+            if claim is None:
+                if campaign.reclaim_expired():
+                    continue
+                if not wait or campaign.finished():
+                    break
+                time.sleep(self.poll)
+                continue
+            last = campaign.shard_id(claim)
+            if campaign.is_done(last):
+                campaign.complete(claim)   # 회수된 뒤에 원래 워커가 끝낸 샤드
+                continue
+            try:
+                result = self.run_shard(claim, _read_json(claim))
+                campaign.heartbeat(claim)
+            except (LeaseLost, FileNotFoundError):   # 읽기 전에 회수된 경우 포함
+                _LOST.inc()
+                continue
+            campaign.complete(claim, result)
+            _DONE.inc()
+            done += 1
+        return done
+
+
+def _work(root: str, worker_id: Optional[str], max_shards: Optional[int], poll: Optional[float]) -> int:
+    return CampaignWorker(Campaign(root), worker_id, poll=poll).run(max_shards=max_shards)
+
+
+def run_workers(root: str, processes: int, prefix: Optional[str] = None,
+                max_shards: Optional[int] = None, poll: Optional[float] = None) -> int:
+    """로컬 워커 프로세스 여러 개로 처리 (호스트마다 하나씩 띄우면 여러 대로 확장) → 처리한 샤드 수"""
+    import multiprocessing as mp
+    prefix = prefix or f"{socket.gethostname()}-{os.getpid()}"
+    ctx = mp.get_context("spawn")
+    with ctx.Pool(processes) as pool:
+        counts = pool.starmap(_work, [(root, f"{prefix}-{i}", max_shards, poll) for i in range(processes)])
+    return sum(counts)
@@ -0,0 +1,44 @@
+"""
+시세 데이터 소스 공통 인터페이스
+"""
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import pandas as pd
+
+OHLC_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class DataSource(ABC):
+    """시세 데이터 소스 추상 클래스"""
+
+    name = "base"
+
+    @abstractmethod
+    def fetch(self, ticker: str, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """일봉 조회
+        - ticker: 종목코드
+        - start, end: "YYYY-MM-DD" (end는 포함하지 않음, yfinance와 동일)
+        - 반환: Date(datetime64) + Open/High/Low/Close/Volume 컬럼
+        """
+        pass
+
+
+def normalize_ohlc(df: pd.DataFrame, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+    """소스별 DataFrame을 공통 형식으로 정리 (Date 오름차순, 타임존 제거)"""
+    if 'Date' not in df.columns:
+        df = df.reset_index()
+        df = df.rename(columns={df.columns[0]: 'Date'})
+    dates = pd.to_datetime(df['Date'])
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    out = pd.DataFrame({'Date': dates.dt.normalize()})
+    for col in OHLC_COLUMNS:
+        out[col] = df[col].astype('float64').values if col in df.columns else 0.0
+    if start is not None:
+        out = out[out['Date'] >= pd.Timestamp(start)]
+    if end is not None:
+        out = out[out['Date'] < pd.Timestamp(end)]
+    out = out.dropna(subset=['Open', 'High', 'Low', 'Close'])
+    out = out.drop_duplicates(subset='Date', keep='last').sort_values('Date')
+    return out.reset_index(drop=True)
@@ -0,0 +1,70 @@
+"""
+테스트용 인메모리 데이터 소스
+"""
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .base import DataSource, normalize_ohlc
+
+
+class FakeSource(DataSource):
+    """미리 넣어둔 DataFrame 또는 종목별 시드 고정 랜덤워크 반환
+    - frames: {ticker: DataFrame} (없으면 랜덤워크 생성)
+    - failures: {ticker: n} 처음 n번 호출은 예외 (재시도 테스트용)
+    - delay: 호출당 지연 (초, 네트워크 흉내)
+    """
+
+    name = "fake"
+    BASE_DATE = "2000-01-03"   # 랜덤워크 시작일
+
+    def __init__(self, frames: Optional[Dict[str, pd.DataFrame]] = None,
+                 failures: Optional[Dict[str, int]] = None, delay: float = 0.0,
+                 start_price: float = 100.0, volatility: float = 0.03):
+        self.frames = {k.upper(): v for k, v in (frames or {}).items()}
+        self.failures = {k.upper(): v for k, v in (failures or {}).items()}
+        self.delay = delay
+        self.start_price = start_price
+        self.volatility = volatility
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, ticker: str, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        ticker = ticker.upper()
+        with self._lock:
+            self.calls[ticker] = self.calls.get(ticker, 0) + 1
+            n_call = self.calls[ticker]
+        if self.delay:
+            time.sleep(self.delay)
+        if n_call <= self.failures.get(ticker, 0):
+            raise ConnectionError(f"fake failure {n_call} for {ticker}")
+
+        if ticker in self.frames:
+            df = normalize_ohlc(self.frames[ticker], start, end)
+        else:
+            df = self.random_walk(ticker, start or "2024-01-01", end or "2024-12-31")
+        if df.empty:
+            raise ValueError(f"No data for {ticker}")
+        return df
+
+    def random_walk(self, ticker: str, start: str, end: str) -> pd.DataFrame:
+        """영업일 기준 랜덤워크 (같은 종목·같은 날짜면 조회 기간과 무관하게 같은 가격)"""
+        days = np.arange(np.datetime64(self.BASE_DATE), np.datetime64(end), dtype='datetime64[D]')
+        dates = days[np.is_busday(days)].astype('datetime64[ns]')
+        rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+        z = rng.standard_normal((len(dates), 2))  # 날짜 순서대로 뽑아서 기간이 늘어도 앞부분 동일
+        rets = 0.0005 + self.volatility * z[:, 0]
+        close = self.start_price * np.exp(np.cumsum(rets))
+        open_ = np.concatenate([[self.start_price], close[:-1]])
+        spread = np.abs(z[:, 1]) * self.volatility / 2
+        high = np.maximum(open_, close) * (1 + spread)
+        low = np.minimum(open_, close) * (1 - spread)
+        df = pd.DataFrame({
+            'Date': dates, 'Open': open_, 'High': high, 'Low': low,
+            'Close': close, 'Volume': np.zeros(len(dates)),
+        })
+        return df[df['Date'] >= pd.Timestamp(start)].reset_index(drop=True)
@@ -0,0 +1,48 @@
+"""
+로컬 파일 데이터 소스 (CSV / Parquet 디렉터리)
+"""
+import os
+from typing import Optional
+
+import pandas as pd
+
+from .base import DataSource, normalize_ohlc
+
+
+class LocalFileSource(DataSource):
+    """{directory}/{TICKER}.parquet 또는 {TICKER}.csv 파일에서 읽기"""
+
+    name = "local"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path_for(self, ticker: str) -> Optional[str]:
+        for ext in (".parquet", ".csv"):
+            path = os.path.join(self.directory, f"{ticker.upper()}{ext}")
+            if os.path.exists(path):
+                return path
+        return None
+
+    def fetch(self, ticker: str, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        path = self.path_for(ticker)
+        if path is None:
+            raise ValueError(f"No data file for {ticker} in {self.directory}")
+        if path.endswith(".parquet"):
+            df = pd.read_parquet(path)  # pyarrow 또는 fastparquet 필요
+        else:
+            df = pd.read_csv(path)
+        df = normalize_ohlc(df, start, end)
+        if df.empty:
+            raise ValueError(f"No data for {ticker}")
+        return df
+
+    def save(self, ticker: str, df: pd.DataFrame, fmt: str = "csv") -> str:
+        """다른 소스에서 받은 데이터를 로컬에 저장 (야간 워밍용)"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{ticker.upper()}.{fmt}")
+        if fmt == "parquet":
+            df.to_parquet(path, index=False)
+        else:
+            df.to_csv(path, index=False, date_format='%Y-%m-%d')
+        return path
@@ -0,0 +1,188 @@
+"""
+다종목 병렬 프리패치 & 날짜 정렬
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .. import metrics
+from .base import DataSource
+from .fake import FakeSource
+from .local import LocalFileSource
+from .store import StoreSource, get_store
+from .yahoo import YFinanceSource
+
+
+PREFETCH_CACHE = metrics.counter("data_prefetch_cache_requests_total", "프리패치 메모리 캐시 조회 (hit/miss)", ["result"])
+_CACHE_HIT = PREFETCH_CACHE.labels("hit")
+_CACHE_MISS = PREFETCH_CACHE.labels("miss")
+FETCH_SECONDS = metrics.histogram("data_fetch_duration_seconds", "데이터 소스 조회 시간 (재시도 포함)", ["source"],
+                                  buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+
+
+class DataFetchError(Exception):
+    """재시도 후에도 실패한 종목이 있을 때"""
+
+    def __init__(self, errors: Dict[str, Exception]):
+        self.errors = errors
+        detail = ", ".join(f"{t}: {e}" for t, e in errors.items())
+        super().__init__(f"Failed to fetch {len(errors)} ticker(s): {detail}")
+
+
+@dataclass
+class AlignedBars:
+    """공통 날짜축에 맞춘 종목별 OHLC 배열 (shape = 종목수 x 날짜수, 빈 날은 NaN)"""
+    tickers: List[str]
+    dates: np.ndarray          # datetime64[D]
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+    def index_of(self, ticker: str) -> int:
+        return self.tickers.index(ticker.upper())
+
+    def valid(self, ticker: str) -> np.ndarray:
+        return ~np.isnan(self.close[self.index_of(ticker)])
+
+    def to_frame(self, ticker: str) -> pd.DataFrame:
+        """한 종목을 시뮬레이터 입력 형식 DataFrame으로"""
+        i = self.index_of(ticker)
+        mask = ~np.isnan(self.close[i])
+        return pd.DataFrame({
+            'Date': pd.to_datetime(self.dates[mask]),
+            'Open': self.open[i][mask],
+            'High': self.high[i][mask],
+            'Low': self.low[i][mask],
+            'Close': self.close[i][mask],
+        })
+
+
+class DataPrefetcher:
+    """스레드 풀로 여러 종목을 동시에 받아오고, 실패 시 지수 백오프로 재시도
+    - 같은 (종목, 기간) 요청은 메모리 캐시에서 반환 (cache=False면 끔, 공유 저장소 사용 시)
+    """
+
+    def __init__(self, source: DataSource, max_workers: int = 8,
+                 retries: int = 3, backoff: float = 0.5, cache: bool = True):
+        self.source = source
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = cache
+        self._cache: Dict[Tuple[str, Optional[str], Optional[str]], pd.DataFrame] = {}
+        self._fetch_seconds = FETCH_SECONDS.labels(source.name)
+
+    def fetch_one(self, ticker: str, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        key = (ticker.upper(), start, end)
+        if key in self._cache:
+            _CACHE_HIT.inc()
+            return self._cache[key]
+        if self.cache:
+            _CACHE_MISS.inc()
+
+        delay = self.backoff
+        started = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            try:
+                df = self.source.fetch(key[0], start, end)
+                break
+            except ValueError:
+                raise  # 데이터 없음은 재시도해도 동일
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                time.sleep(delay)
+                delay *= 2
+        self._fetch_seconds.observe(time.perf_counter() - started)
+        if self.cache:
+            self._cache[key] = df
+        return df
+
+    def prefetch(self, tickers: List[str], start: Optional[str] = None,
+                 end: Optional[str] = None, raise_on_error: bool = True) -> Dict[str, pd.DataFrame]:
+        """여러 종목 동시 조회 → {ticker: DataFrame}"""
+        tickers = list(dict.fromkeys(t.upper() for t in tickers))
+        frames: Dict[str, pd.DataFrame] = {}
+        errors: Dict[str, Exception] = {}
+        workers = max(1, min(self.max_workers, len(tickers)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {t: pool.submit(self.fetch_one, t, start, end) for t in tickers}
+            for t, fut in futures.items():
+                try:
+                    frames[t] = fut.result()
+                except Exception as e:
+                    errors[t] = e
+        if errors and raise_on_error:
+            raise DataFetchError(errors)
+        return frames
+
+    def prefetch_aligned(self, tickers: List[str], start: Optional[str] = None,
+                         end: Optional[str] = None, how: str = "union") -> AlignedBars:
+        frames = self.prefetch(tickers, start, end)
+        return align(frames, how=how)
+
+
+def align(frames: Dict[str, pd.DataFrame], how: str = "union") -> AlignedBars:
+    """종목별 DataFrame을 공통 날짜축 배열로
+    - how="union": 전체 날짜 (없는 날은 NaN)
+    - how="inner": 모든 종목에 공통인 날짜만
+    """
+    tickers = list(frames)
+    day_sets = [frames[t]['Date'].values.astype('datetime64[D]') for t in tickers]
+    if not day_sets:
+        dates = np.array([], dtype='datetime64[D]')
+    elif how == "inner":
+        dates = day_sets[0]
+        for d in day_sets[1:]:
+            dates = np.intersect1d(dates, d)
+    else:
+        dates = np.unique(np.concatenate(day_sets))
+
+    shape = (len(tickers), len(dates))
+    cols = {c: np.full(shape, np.nan) for c in ('Open', 'High', 'Low', 'Close')}
+    for i, t in enumerate(tickers):
+        pos = np.searchsorted(dates, day_sets[i])
+        hit = (pos < len(dates)) & (dates[np.minimum(pos, len(dates) - 1)] == day_sets[i])
+        for c, arr in cols.items():
+            arr[i, pos[hit]] = frames[t][c].values[hit]
+
+    return AlignedBars(tickers=tickers, dates=dates, open=cols['Open'], high=cols['High'],
+                       low=cols['Low'], close=cols['Close'])
+
+
+def make_source(cfg: Optional[Dict] = None) -> DataSource:
+    """config의 data 섹션으로 소스 생성
+    data:
+      source: yfinance | local | fake
+      path: data/         # local 전용
+      store: /dev/shm/infinite_buy   # 지정 시 공유 memmap 저장소를 앞단에 둠
+    """
+    cfg = cfg or {}
+    kind = cfg.get('source', 'yfinance')
+    if kind == 'yfinance':
+        source = YFinanceSource()
+    elif kind == 'local':
+        source = LocalFileSource(cfg.get('path', 'data'))
+    elif kind == 'fake':
+        source = FakeSource()
+    else:
+        raise ValueError(f"Unknown data source: {kind}")
+    if cfg.get('store'):
+        source = StoreSource(get_store(cfg['store']), source)
+    return source
+
+
+def make_prefetcher(cfg: Optional[Dict] = None) -> DataPrefetcher:
+    cfg = cfg or {}
+    return DataPrefetcher(
+        make_source(cfg),
+        max_workers=int(cfg.get('workers', 8)),
+        retries=int(cfg.get('retries', 3)),
+        backoff=float(cfg.get('backoff', 0.5)),
+        cache=not cfg.get('store'),  # 공유 저장소가 캐시 역할 (워커별 사본 방지)
+    )
@@ -0,0 +1,277 @@
+"""
+공유 시세 저장소 (memory-mapped 컬럼 배열)
+
+종목별로 날짜(int64, 1970-01-01 기준 일수)와 OHLCV(float64, 컬럼별 연속) 배열을 .npy로 저장.
+각 워커 프로세스는 np.load(mmap_mode='r')로 읽기 전용 연결 → OS 페이지 캐시를 공유하므로
+워커/종목이 늘어도 메모리는 한 벌만 사용 (/dev/shm 같은 tmpfs에 두면 디스크 I/O도 없음).
+
+쓰기: 새 버전 파일을 만든 뒤 매니페스트(JSON)를 os.replace로 교체 → 읽는 쪽은 항상 완전한 버전만 봄
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .. import metrics
+from .base import DataSource, OHLC_COLUMNS
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 잠금 없이 동작 (중복 다운로드 가능)
+    fcntl = None
+
+EPOCH = np.datetime64('1970-01-01', 'D')
+# 마지막 봉과 받아 둔 종료일 사이에 허용하는 공백 (주말 + 연휴)
+MAX_GAP_DAYS = 5
+
+STORE_REQUESTS = metrics.counter("data_store_requests_total", "공유 시세 저장소 조회 (hit/miss)", ["result"])
+_STORE_HIT = STORE_REQUESTS.labels("hit")
+_STORE_MISS = STORE_REQUESTS.labels("miss")
+
+
+def to_day_ordinals(dates) -> np.ndarray:
+    """날짜 배열 → int64 일수"""
+    return (np.asarray(dates, dtype='datetime64[D]') - EPOCH).astype(np.int64)
+
+
+def from_day_ordinals(days: np.ndarray) -> np.ndarray:
+    return EPOCH + np.asarray(days, dtype='timedelta64[D]')
+
+
+def format_day_ordinals(days) -> np.ndarray:
+    """int64 일수 → 'YYYY-MM-DD' 배열"""
+    return np.datetime_as_string(from_day_ordinals(days), unit='D')
+
+
+def day_ordinal(value) -> int:
+    """날짜 하나 ('YYYY-MM-DD', Timestamp, datetime64, int 일수) → int 일수 (전략 입력용)"""
+    return int(to_day_ordinals(value))
+
+
+def format_day(day: int) -> str:
+    """int 일수 → 'YYYY-MM-DD' (출력용)"""
+    return str(EPOCH + np.timedelta64(int(day), 'D'))
+
+
+def is_mapped(values: np.ndarray) -> bool:
+    """배열이 저장소 memmap의 뷰인지 (base를 따라가며 확인)"""
+    while values is not None:
+        if isinstance(values, np.memmap):
+            return True
+        values = getattr(values, 'base', None)
+    return False
+
+
+def _today() -> str:
+    return date.today().isoformat()
+
+
+def clamp_end(end: Optional[str]) -> str:
+    """종료일(배타)을 오늘로 제한 → 아직 끝나지 않은 오늘 봉과 미래 기간은 받은 것으로 치지 않음"""
+    today = _today()
+    return today if end is None or end > today else end
+
+
+@dataclass
+class StoredBars:
+    """한 종목의 읽기 전용 배열 (memmap 뷰, 복사 없음)"""
+    ticker: str
+    dates: np.ndarray      # int64 일수
+    ohlcv: np.ndarray      # float64, shape = (5, 일수), 행 = Open/High/Low/Close/Volume
+
+    def column(self, name: str) -> np.ndarray:
+        return self.ohlcv[OHLC_COLUMNS.index(name)]
+
+    def slice(self, start: Optional[str] = None, end: Optional[str] = None) -> 'StoredBars':
+        """[start, end) 구간 뷰"""
+        lo = 0 if start is None else int(np.searchsorted(self.dates, to_day_ordinals(start)))
+        hi = len(self.dates) if end is None else int(np.searchsorted(self.dates, to_day_ordinals(end)))
+        return StoredBars(self.ticker, self.dates[lo:hi], self.ohlcv[:, lo:hi])
+
+    def to_frame(self) -> pd.DataFrame:
+        """OHLCV 컬럼은 memmap 뷰 그대로 (읽기 전용, 날짜 컬럼만 새로 만듦)"""
+        columns = {'Date': from_day_ordinals(self.dates).astype('datetime64[ns]')}
+        for i, col in enumerate(OHLC_COLUMNS):
+            columns[col] = self.ohlcv[i]
+        return pd.DataFrame(columns, copy=False)
+
+
+class MarketDataStore:
+    """디렉터리 기반 공유 저장소
+    {dir}/{TICKER}.json             매니페스트 (현재 버전, 기간 — start가 None이면 소스의 첫 봉부터)
+    {dir}/{TICKER}.{ver}.dates.npy  int64
+    {dir}/{TICKER}.{ver}.ohlcv.npy  float64 (5 x N)
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._attached: Dict[str, tuple] = {}   # {ticker: (version, StoredBars)}
+        self._lock = threading.Lock()
+
+    def _manifest_path(self, ticker: str) -> str:
+        return os.path.join(self.directory, f"{ticker}.json")
+
+    def _data_path(self, ticker: str, version: int, part: str) -> str:
+        return os.path.join(self.directory, f"{ticker}.{version}.{part}.npy")
+
+    def manifest(self, ticker: str) -> Optional[Dict]:
+        try:
+            with open(self._manifest_path(ticker.upper())) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def covers(self, ticker: str, start: Optional[str], end: Optional[str]) -> bool:
+        """저장된 데이터가 [start, end)를 포함하는지
+        - start=None(첫 봉부터)은 저장된 기간도 첫 봉부터 받았을 때만 (manifest start가 None)
+        - end는 오늘로 제한해서 비교 (받을 당시 오늘까지만 받았으므로 미래 종료일은 의미 없음)
+        - 종료일 직전까지 마지막 봉이 없으면, 받아 둔 종료일과 마지막 봉의 공백이 주말/연휴 수준일 때만 인정
+        """
+        m = self.manifest(ticker)
+        if m is None or 'last' not in m:
+            return False
+        if start is None:
+            if m['start'] is not None:
+                return False
+        elif m['start'] is not None and start < m['start']:
+            return False
+        end = clamp_end(end)
+        if end > m['end']:
+            return False
+        if m['last'] is None:
+            return False
+        last = int(to_day_ordinals(m['last']))
+        if int(to_day_ordinals(end)) <= last + 1:
+            return True
+        return int(to_day_ordinals(m['end'])) - last <= MAX_GAP_DAYS
+
+    def publish(self, ticker: str, df: pd.DataFrame, start: Optional[str] = None,
+                end: Optional[str] = None) -> Dict:
+        """DataFrame을 새 버전으로 저장하고 매니페스트 교체
+        - start, end: 이 데이터가 대표하는 요청 기간 (covers 판단용, start=None은 첫 봉부터, end는 오늘로 제한)
+        - last: 마지막 봉 날짜
+        """
+        ticker = ticker.upper()
+        old = self.manifest(ticker)
+        version = (old['version'] + 1) if old else 1
+        dates = to_day_ordinals(df['Date'].values)
+        ohlcv = np.vstack([df[c].to_numpy(dtype=np.float64) for c in OHLC_COLUMNS])
+        np.save(self._data_path(ticker, version, 'dates'), dates)
+        np.save(self._data_path(ticker, version, 'ohlcv'), np.ascontiguousarray(ohlcv))
+
+        last = str(format_day_ordinals(dates[-1:])[0]) if len(dates) else None
+        manifest = {'ticker': ticker, 'version': version, 'rows': int(len(dates)),
+                    'start': start, 'end': clamp_end(end), 'last': last}
+        tmp = self._manifest_path(ticker) + f".tmp{os.getpid()}"
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self._manifest_path(ticker))
+
+        # 이전 버전 삭제 (이미 연결된 워커의 mmap은 POSIX에서 그대로 유효)
+        if old:
+            for part in ('dates', 'ohlcv'):
+                try:
+                    os.remove(self._data_path(ticker, old['version'], part))
+                except OSError:
+                    pass
+        return manifest
+
+    def attach(self, ticker: str) -> Optional[StoredBars]:
+        """읽기 전용 memmap으로 연결 (프로세스 안에서는 버전이 바뀔 때만 다시 엶)"""
+        ticker = ticker.upper()
+        m = self.manifest(ticker)
+        if m is None:
+            return None
+        with self._lock:
+            cached = self._attached.get(ticker)
+            if cached and cached[0] == m['version']:
+                return cached[1]
+            try:
+                dates = np.load(self._data_path(ticker, m['version'], 'dates'), mmap_mode='r')
+                ohlcv = np.load(self._data_path(ticker, m['version'], 'ohlcv'), mmap_mode='r')
+            except FileNotFoundError:
+                return None  # 다른 워커가 방금 새 버전으로 교체
+            bars = StoredBars(ticker, dates, ohlcv)
+            self._attached[ticker] = (m['version'], bars)
+            return bars
+
+    @contextmanager
+    def writer_lock(self, ticker: str):
+        """종목별 프로세스 간 잠금 (한 워커만 다운로드)"""
+        path = os.path.join(self.directory, f"{ticker.upper()}.lock")
+        with open(path, 'w') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+
+_stores: Dict[str, MarketDataStore] = {}
+
+
+def get_store(directory: str) -> MarketDataStore:
+    """프로세스 안에서 디렉터리당 하나의 저장소 (memmap 연결 재사용)"""
+    key = os.path.abspath(directory)
+    if key not in _stores:
+        _stores[key] = MarketDataStore(directory)
+    return _stores[key]
+
+
+class StoreSource(DataSource):
+    """공유 저장소를 앞단 캐시로 쓰는 소스
+    저장소에 기간이 있으면 memmap에서 바로 반환, 없으면 한 워커만 upstream에서 받아 저장
+    """
+
+    name = "store"
+
+    def __init__(self, store: MarketDataStore, upstream: DataSource):
+        self.store = store
+        self.upstream = upstream
+        self.hits = 0
+        self.misses = 0
+
+    def bars(self, ticker: str, start: Optional[str] = None, end: Optional[str] = None) -> StoredBars:
+        """복사 없이 memmap 뷰 반환"""
+        ticker = ticker.upper()
+        while True:
+            if not self.store.covers(ticker, start, end):
+                with self.store.writer_lock(ticker):
+                    if not self.store.covers(ticker, start, end):  # 잠금 대기 중 다른 워커가 채웠을 수 있음
+                        self.misses += 1
+                        _STORE_MISS.inc()
+                        self._refresh(ticker, start, end)
+                    bars = self.store.attach(ticker)  # 잠금 안에서는 교체되지 않음
+            else:
+                self.hits += 1
+                _STORE_HIT.inc()
+                bars = self.store.attach(ticker)
+            if bars is not None:  # None: 연결 직전 다른 워커가 새 버전으로 교체 → 다시 시도
+                return bars.slice(start, end)
+
+    def _refresh(self, ticker: str, start: Optional[str], end: Optional[str]) -> None:
+        """기존 기간과 합쳐서 다시 받음 (기간이 줄어들지 않게, 종료일은 오늘까지)"""
+        end = clamp_end(end)
+        m = self.store.manifest(ticker)
+        if m is not None:
+            # 어느 쪽이든 첫 봉부터면 첫 봉부터 (None 유지)
+            start = None if start is None or m['start'] is None else min(start, m['start'])
+            if m.get('end') is not None:
+                end = max(end, clamp_end(m['end']))
+        df = self.upstream.fetch(ticker, start, end)
+        self.store.publish(ticker, df, start, end)
+
+    def fetch(self, ticker: str, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        bars = self.bars(ticker, start, end)
+        if len(bars.dates) == 0:
+            raise ValueError(f"No data for {ticker}")
+        return bars.to_frame()
@@ -0,0 +1,21 @@
+"""
+yfinance 데이터 소스
+"""
+from typing import Optional
+
+import pandas as pd
+
+from .base import DataSource, normalize_ohlc
+
+
+class YFinanceSource(DataSource):
+    """Yahoo Finance (yfinance)"""
+
+    name = "yfinance"
+
+    def fetch(self, ticker: str, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        import yfinance as yf
+        df = yf.Ticker(ticker).history(start=start, end=end)
+        if df.empty:
+            raise ValueError(f"No data for {ticker}")
+        return normalize_ohlc(df)
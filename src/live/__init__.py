@@ -0,0 +1 @@
+# live trading package
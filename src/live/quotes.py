@@ -0,0 +1,236 @@
+"""
+실시간 시세 스트림 소비 & 장중 매도 조건 감시
+
+- 메시지 형식 (JSON): {"s": "TQQQ", "p": 51.23, "t": 1700000000.1} 또는 그 배열 (배치)
+- 틱은 종목별로 합쳐짐 (마지막가/고가/저가/개수) → 평가 주기 사이에 몰린 틱은 한 번에 처리
+- 매도 조건: 고가 ≥ 평단 × (1 + 목표%) — 전략별 목표가를 종목별 정렬 배열에 두고 이분 탐색
+"""
+import asyncio
+import json
+import time
+from bisect import bisect_right, insort
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from .. import metrics
+from ..strategy import InfiniteBuyStrategyV3
+
+QUOTE_TICKS = metrics.counter("live_quote_ticks_total", "수신한 시세 틱 수")
+QUOTE_EVAL_SECONDS = metrics.histogram("live_quote_evaluate_seconds", "합쳐진 시세 한 번 평가에 걸린 시간",
+                                       buckets=(1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 0.01, 0.05))
+QUOTE_LAG_SECONDS = metrics.histogram("live_quote_lag_seconds", "틱 시각 ~ 평가 시각 지연 (종목별 가장 오래된 틱)",
+                                      buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0))
+SELL_TRIGGERS = metrics.counter("live_sell_triggers_total", "발동된 매도 조건 수")
+
+
+@dataclass
+class CoalescedQuote:
+    """평가 주기 동안 합쳐진 종목 시세"""
+    last: float
+    high: float
+    low: float
+    count: int
+    first_ts: float
+    last_ts: float
+
+
+class TickCoalescer:
+    """종목별 틱 합치기 (평가 전까지 dict 하나에 누적, drain 시 통째로 교체)"""
+
+    def __init__(self):
+        self._pending: Dict[str, list] = {}
+
+    def add(self, symbol: str, price: float, ts: float):
+        q = self._pending.get(symbol)
+        if q is None:
+            self._pending[symbol] = [price, price, price, 1, ts, ts]
+            return
+        q[0] = price
+        if price > q[1]:
+            q[1] = price
+        elif price < q[2]:
+            q[2] = price
+        q[3] += 1
+        q[5] = ts
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def drain(self) -> Dict[str, CoalescedQuote]:
+        pending, self._pending = self._pending, {}
+        return {s: CoalescedQuote(*q) for s, q in pending.items()}
+
+
+@dataclass(order=True)
+class _Watch:
+    threshold: float
+    seq: int
+    key: Hashable = field(compare=False)
+    strategy: InfiniteBuyStrategyV3 = field(compare=False)
+
+
+class SellTriggerMonitor:
+    """여러 전략 인스턴스의 목표 매도가 감시
+    - register(key, strategy): 전략 등록 (종목 = strategy.ticker)
+    - refresh(key): 매수 체결 등으로 평단이 바뀐 뒤 목표가 다시 계산 (발동된 감시도 재무장)
+    - evaluate(quotes): 고가 ≥ 목표가인 감시를 발동하고 목록에서 제거
+    """
+
+    def __init__(self, on_trigger: Optional[Callable[[Hashable, InfiniteBuyStrategyV3, CoalescedQuote], None]] = None):
+        self.on_trigger = on_trigger
+        self._watches: Dict[str, List[_Watch]] = {}   # 종목별 목표가 오름차순
+        self._by_key: Dict[Hashable, _Watch] = {}
+        self._seq = 0
+
+    def register(self, key: Hashable, strategy: InfiniteBuyStrategyV3):
+        self.unregister(key)
+        self._seq += 1
+        watch = _Watch(threshold=float('inf'), seq=self._seq, key=key, strategy=strategy)
+        self._by_key[key] = watch
+        self._arm(watch)
+
+    def unregister(self, key: Hashable):
+        watch = self._by_key.pop(key, None)
+        if watch is not None:
+            self._disarm(watch)
+
+    def refresh(self, key: Hashable):
+        watch = self._by_key[key]
+        self._disarm(watch)
+        self._arm(watch)
+
+    def refresh_all(self):
+        for key in list(self._by_key):
+            self.refresh(key)
+
+    def _arm(self, watch: _Watch):
+        strategy = watch.strategy
+        if strategy.position.total_shares == 0:
+            return  # 보유 없음 → 감시 대상 아님 (refresh 시 다시 확인)
+        watch.threshold = strategy._target_sell_price()
+        insort(self._watches.setdefault(strategy.ticker, []), watch)
+
+    def _disarm(self, watch: _Watch):
+        watches = self._watches.get(watch.strategy.ticker)
+        if watches and watch in watches:
+            watches.remove(watch)
+
+    def threshold(self, symbol: str) -> float:
+        """종목의 가장 낮은 목표가 (감시 없으면 inf)"""
+        watches = self._watches.get(symbol)
+        return watches[0].threshold if watches else float('inf')
+
+    def evaluate(self, quotes: Dict[str, CoalescedQuote]) -> List[Tuple[Hashable, InfiniteBuyStrategyV3, CoalescedQuote]]:
+        fired = []
+        for symbol, quote in quotes.items():
+            watches = self._watches.get(symbol)
+            if not watches or quote.high < watches[0].threshold:
+                continue
+            n = bisect_right([w.threshold for w in watches], quote.high)
+            hit, self._watches[symbol] = watches[:n], watches[n:]
+            for watch in hit:
+                fired.append((watch.key, watch.strategy, quote))
+                if self.on_trigger is not None:
+                    self.on_trigger(watch.key, watch.strategy, quote)
+        return fired
+
+
+def parse_ticks(message) -> Iterable[Tuple[str, float, float]]:
+    """메시지 → (종목, 가격, 시각) 목록 (배치 메시지 지원)"""
+    data = json.loads(message)
+    if isinstance(data, dict):
+        data = (data,)
+    return ((d["s"], float(d["p"]), float(d.get("t", 0.0))) for d in data if "p" in d)
+
+
+class QuoteConsumer:
+    """시세 스트림 소비자
+    수신 루프는 틱을 합치기만 하고, 평가 루프는 새 틱이 있을 때 바로 깨어나 한 번에 평가.
+    평가가 밀리면 그 사이 틱이 합쳐지므로 종목 수에 비례하는 일만 함 (틱 수와 무관)
+    """
+
+    YIELD_EVERY = 64   # 버퍼에 메시지가 쌓여 있어도 이만큼마다 평가 루프에 양보 (지연 상한)
+
+    def __init__(self, monitor: SellTriggerMonitor, min_interval: float = 0.0):
+        self.monitor = monitor
+        self.coalescer = TickCoalescer()
+        self.min_interval = min_interval   # 평가 최소 간격 (초), 0 = 가능한 즉시
+        self.ticks = 0
+        self.messages = 0
+        self.evaluations = 0
+        self.max_lag = 0.0                 # 틱 시각 → 평가 시각 최대 지연 (초)
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self._reported_ticks = 0
+
+    async def consume(self, messages: AsyncIterator):
+        """메시지 스트림을 끝까지 소비 (끝나면 남은 틱까지 평가)"""
+        evaluator = asyncio.ensure_future(self._evaluate_loop())
+        add = self.coalescer.add
+        try:
+            async for message in messages:
+                self.messages += 1
+                for symbol, price, ts in parse_ticks(message):
+                    add(symbol, price, ts)
+                    self.ticks += 1
+                self._wakeup.set()
+                if self.messages % self.YIELD_EVERY == 0:
+                    await asyncio.sleep(0)
+        finally:
+            self._closed = True
+            self._wakeup.set()
+            await evaluator
+
+    async def _evaluate_loop(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if len(self.coalescer):
+                self.evaluate_pending()
+            if self._closed:
+                if len(self.coalescer):
+                    self.evaluate_pending()
+                return
+            if self.min_interval:
+                await asyncio.sleep(self.min_interval)
+
+    def evaluate_pending(self):
+        started = time.perf_counter()
+        quotes = self.coalescer.drain()
+        now = time.time()
+        for q in quotes.values():
+            if q.first_ts:
+                lag = now - q.first_ts
+                QUOTE_LAG_SECONDS.observe(lag)
+                if lag > self.max_lag:
+                    self.max_lag = lag
+        fired = self.monitor.evaluate(quotes)
+        self.evaluations += 1
+        QUOTE_TICKS.inc(self.ticks - self._reported_ticks)
+        self._reported_ticks = self.ticks
+        if fired:
+            SELL_TRIGGERS.inc(len(fired))
+        QUOTE_EVAL_SECONDS.observe(time.perf_counter() - started)
+
+    async def run(self, url: str, symbols: List[str], reconnect: bool = False, backoff: float = 1.0):
+        """웹소켓 피드 구독 (reconnect=True면 끊겨도 지수 백오프로 재접속)"""
+        while True:
+            try:
+                await self.consume(websocket_feed(url, symbols))
+                if not reconnect:
+                    return
+            except Exception:  # 접속 실패, 연결 끊김 (websockets.ConnectionClosed)
+                if not reconnect:
+                    raise
+            self._closed = False
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+
+async def websocket_feed(url: str, symbols: List[str]):
+    """웹소켓 접속 → 구독 메시지 전송 → 수신 메시지 yield"""
+    from websockets.asyncio.client import connect
+    async with connect(url) as ws:
+        await ws.send(json.dumps({"action": "subscribe", "symbols": list(symbols)}))
+        async for message in ws:
+            yield message
@@ -0,0 +1,53 @@
+"""
+로컬 시세 리플레이 서버 (테스트 & 성능 측정용)
+QuoteConsumer와 같은 웹소켓 프로토콜로 기록된 틱을 다시 보냄
+"""
+import asyncio
+import json
+from typing import List, Optional, Tuple
+
+
+class ReplayServer:
+    """틱 목록을 구독한 종목만 골라 배치로 전송
+    - ticks: [(종목, 가격, 시각), ...]
+    - batch_size: 메시지당 틱 수 (1이면 틱마다 메시지 하나)
+    - rate: 초당 틱 수 제한 (None = 최대 속도)
+
+    async with ReplayServer(ticks) as server:
+        await consumer.run(server.url, ["TQQQ"])
+    """
+
+    def __init__(self, ticks: List[Tuple[str, float, float]], host: str = "127.0.0.1",
+                 port: int = 0, batch_size: int = 1, rate: Optional[float] = None):
+        self.ticks = ticks
+        self.host = host
+        self.port = port
+        self.batch_size = batch_size
+        self.rate = rate
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def __aenter__(self) -> 'ReplayServer':
+        from websockets.asyncio.server import serve
+        self._server = await serve(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, ws):
+        request = json.loads(await ws.recv())
+        symbols = set(request.get("symbols") or [])
+        ticks = [t for t in self.ticks if not symbols or t[0] in symbols]
+        delay = self.batch_size / self.rate if self.rate else 0.0
+        for i in range(0, len(ticks), self.batch_size):
+            batch = [{"s": s, "p": p, "t": t} for s, p, t in ticks[i:i + self.batch_size]]
+            await ws.send(json.dumps(batch[0] if self.batch_size == 1 else batch))
+            if delay:
+                await asyncio.sleep(delay)
+        await ws.close()
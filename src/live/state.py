@@ -0,0 +1,289 @@
+"""
+실시간 계좌 상태 푸시 (SSE, 바뀐 필드만 전송)
+
+- 계좌 상태 = summary() 필드 + 오늘 예정 주문 + 체결 + 손익 (평평한 dict)
+- publish(account, state): 직전 상태와 최상위 키 단위로 비교 → 바뀐 키만 delta 이벤트로 발행
+  (리스트 필드는 통째로 교체, 바뀐 게 없으면 이벤트 없음)
+- 이벤트는 발행 시 한 번만 SSE 텍스트로 인코딩 → 탭이 많아도 구독자마다 다시 직렬화하지 않음
+- 재연결: Last-Event-ID 이후 이벤트가 버퍼에 남아 있으면 이어서 전송, 아니면 전체 snapshot부터
+
+    event: snapshot   data: {"seq": 12, "accounts": {"acc1": {...}}}
+    event: delta      data: {"seq": 13, "account": "acc1", "set": {"avg_price": 51.2}, "unset": []}
+    event: remove     data: {"seq": 14, "account": "acc1"}
+"""
+import json
+import re
+import threading
+from collections import deque
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .. import metrics
+from ..broker.base import Broker
+from ..data.store import day_ordinal, format_day
+from ..strategy import InfiniteBuyStrategyV3
+
+PUBLISHED = metrics.counter("live_state_publish_total", "상태 발행 요청 (delta = 이벤트 발행, unchanged = 변화 없음)",
+                            ["result"])
+EVENT_BYTES = metrics.histogram("live_state_event_bytes", "발행된 SSE 이벤트 크기",
+                                buckets=(64, 128, 256, 512, 1024, 4096, 16384))
+SUBSCRIBERS = metrics.counter("live_state_subscribers_total", "SSE 구독 시작 수", ["start"])
+
+_MISSING = object()
+
+# 발행할 수 있는 상태 키 (account_state가 만드는 키) — 외부 발행 시 다른 키는 거부
+STATE_KEYS = frozenset({
+    "cycle", "t_value", "star_pct", "half", "unit_amount", "avg_price", "total_shares", "remaining_budget",
+    "cumulative_profit", "reserve_pool", "ticker", "date", "price", "market_value", "unrealized_pnl",
+    "realized_pnl", "total_pnl", "orders", "fills", "broker_cash", "broker_shares",
+})
+_ACCOUNT_RE = re.compile(r"[A-Za-z0-9_.-]{1,64}")
+
+
+def check_state(account: str, state: Dict) -> Dict:
+    """다른 프로세스가 보낸 상태 검증 (계좌 이름 형식, 허용 키) → state, 아니면 ValueError"""
+    if not isinstance(account, str) or not _ACCOUNT_RE.fullmatch(account):
+        raise ValueError(f"계좌 이름은 영문/숫자/_.- 64자 이내: {account!r}")
+    if not isinstance(state, dict):
+        raise ValueError("state는 dict")
+    unknown = sorted(set(state) - STATE_KEYS)
+    if unknown:
+        raise ValueError(f"알 수 없는 상태 키: {', '.join(map(str, unknown))}")
+    return state
+
+
+# ─── 계좌 상태 만들기 ─────────────────────────────────
+
+def planned_orders(strategy: InfiniteBuyStrategyV3, prev_close: float) -> List[Dict]:
+    """다음 장 예정 주문 (목표가 지정가 매도 + 규칙 세트의 LOC 매수 구간)
+    매수 금액은 앞 구간이 모두 체결된다고 보고 잔여 예산에서 차감
+    고정소수점 모드는 _do_buy_fixed와 같은 수량 (구간 금액으로 1주도 못 사면 잔고가 되는 한 1주)"""
+    orders = []
+    pos = strategy.position
+    if pos.total_shares > 0:
+        orders.append({"side": "sell", "type": "limit", "action": "sell",
+                       "price": round(strategy._target_sell_price(), 4),
+                       "shares": round(pos.total_shares, 6)})
+    if pos.round_num >= strategy.divisions or not prev_close:
+        return orders
+    star_pct = strategy.calc_star_pct()
+    legs = strategy.rules.first_legs if star_pct > 0 else strategy.rules.second_legs
+    if strategy.rounding is not None:
+        return orders + _planned_buys_fixed(strategy, prev_close, star_pct, legs)
+    budget = pos.remaining_budget
+    for a, b, fraction, action in legs:
+        amount = min(strategy.unit_amount * fraction, budget)
+        if amount <= 0:
+            break
+        budget -= amount
+        orders.append({"side": "buy", "type": "loc", "action": action,
+                       "price": round(strategy.loc_price(prev_close, a * star_pct + b), 4),
+                       "amount": round(amount, 2)})
+    return orders
+
+
+def _planned_buys_fixed(strategy: InfiniteBuyStrategyV3, prev_close: float, star_pct: float, legs) -> List[Dict]:
+    policy = strategy.rounding
+    budget = strategy.position.budget_units
+    orders = []
+    for a, b, fraction, action in legs:
+        amount = min(strategy.unit_amount * fraction, budget / policy.cash_scale)
+        if amount <= 0:
+            break
+        price_units = round(strategy.loc_price(prev_close, a * star_pct + b) * policy.price_scale)
+        share_units, cost = policy.shares_for(min(policy.cash_units(amount), budget), price_units)
+        if share_units == 0:
+            share_units, cost = 1, policy.fill_cost(1, price_units)
+            if price_units <= 0 or cost > budget:
+                continue
+        budget -= cost
+        orders.append({"side": "buy", "type": "loc", "action": action,
+                       "price": price_units / policy.price_scale,
+                       "shares": share_units / policy.share_scale,
+                       "amount": cost / policy.cash_scale})
+    return orders
+
+
+def strategy_fills(strategy: InfiniteBuyStrategyV3, date) -> List[Dict]:
+    """전략 매매 기록 중 해당 날짜 체결 (retention이 trades가 아니면 마지막 매매만 확인)
+    date: 'YYYY-MM-DD' 또는 int 일수 (매매 기록의 int 일수와 비교)"""
+    date = day_ordinal(date)
+    if strategy.retention == "trades":
+        fills = []
+        for t in reversed(strategy.trades):
+            if t.date != date:
+                break
+            fills.append(t)
+        fills.reverse()
+    else:
+        t = strategy.last_trade
+        fills = [t] if t is not None and t.date == date else []
+    return [{"side": "sell" if t.action == "sell" else "buy", "action": t.action,
+             "price": t.price, "shares": t.shares, "amount": t.amount} for t in fills]
+
+
+def account_state(strategy: InfiniteBuyStrategyV3, date, prev_close: float,
+                  price: Optional[float] = None, broker: Optional[Broker] = None) -> Dict:
+    """전략(+브로커) → 푸시용 평평한 상태 dict
+    - date: 'YYYY-MM-DD' 또는 int 일수 (상태/브로커 조회에는 문자열로)
+    - price: 현재가 (없으면 prev_close) → 평가 손익
+    - broker: 있으면 체결은 브로커 주문 내역, 예수금/보유 수량도 포함"""
+    date = format_day(day_ordinal(date))
+    price = float(price if price is not None else prev_close)
+    state = strategy.summary()
+    pos = strategy.position
+    market_value = pos.total_shares * price
+    unrealized = market_value - pos.total_cost if pos.total_shares > 0 else 0.0
+    state.update({
+        "ticker": strategy.ticker,
+        "date": date,
+        "price": round(price, 4),
+        "market_value": round(market_value, 2),
+        "unrealized_pnl": round(unrealized, 2),
+        "realized_pnl": round(strategy.cumulative_profit, 2),
+        "total_pnl": round(strategy.cumulative_profit + unrealized, 2),
+        "orders": planned_orders(strategy, prev_close),
+    })
+    if broker is None:
+        state["fills"] = strategy_fills(strategy, date)
+    else:
+        state["fills"] = [
+            {k: o[k] for k in ("side", "price", "shares", "amount") if k in o}
+            for o in broker.get_order_history(date, date)
+            if o.get("ticker", strategy.ticker) == strategy.ticker and o.get("status", "filled") == "filled"
+        ]
+        state["broker_cash"] = round(broker.get_balance(), 2)
+        state["broker_shares"] = broker.get_positions(strategy.ticker).get("shares", 0.0)
+    return state
+
+
+# ─── 발행 / 구독 ─────────────────────────────────────
+
+def _sse(seq: int, event: str, payload: Dict) -> str:
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {seq}\nevent: {event}\ndata: {data}\n\n"
+
+
+class StateHub:
+    """계좌별 최신 상태 + 최근 이벤트 버퍼 (스레드 안전)
+    - 발행 측: 봇 루프/브로커 콜백에서 publish()
+    - 구독 측: stream() 제너레이터를 SSE 응답 본문으로 사용 (구독자마다 스레드 하나가 대기)
+    - 프로세스 메모리에만 있음 → 멀티 프로세스 서버에서는 발행한 워커에 붙은 브라우저만 받음
+      (웹 서버는 프로세스 하나 + 스레드로 실행)
+    """
+
+    def __init__(self, history: int = 1024, keepalive: float = 15.0, retry_ms: int = 3000):
+        self.keepalive = keepalive
+        self.retry_ms = retry_ms
+        self._states: Dict[str, Dict] = {}
+        self._events: deque = deque(maxlen=history)   # (seq, account, SSE 텍스트)
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def accounts(self) -> List[str]:
+        with self._cond:
+            return list(self._states)
+
+    def publish(self, account: str, state: Dict) -> Optional[Dict]:
+        """새 상태 발행 → 바뀐 필드가 있으면 delta 반환 (없으면 None)
+        상태 값은 발행 후 수정하지 말 것 (다음 비교 기준으로 그대로 보관)"""
+        with self._cond:
+            old = self._states.get(account)
+            if old is None:
+                changed, removed = dict(state), []
+            else:
+                changed = {k: v for k, v in state.items() if old.get(k, _MISSING) != v}
+                removed = [k for k in old if k not in state]
+            if old is not None and not changed and not removed:
+                PUBLISHED.labels("unchanged").inc()
+                return None
+            self._states[account] = dict(state)
+            delta = {"seq": self._seq + 1, "account": account, "set": changed, "unset": removed}
+            self._append(account, "delta", delta)
+        PUBLISHED.labels("delta").inc()
+        return delta
+
+    def remove(self, account: str) -> bool:
+        """계좌 제거 (구독자에게 remove 이벤트)"""
+        with self._cond:
+            if self._states.pop(account, None) is None:
+                return False
+            self._append(account, "remove", {"seq": self._seq + 1, "account": account})
+        return True
+
+    def _append(self, account: str, event: str, payload: Dict):
+        self._seq += 1
+        text = _sse(self._seq, event, payload)
+        self._events.append((self._seq, account, text))
+        EVENT_BYTES.observe(len(text))
+        self._cond.notify_all()
+
+    def snapshot(self, accounts: Optional[Iterable[str]] = None) -> Dict:
+        with self._cond:
+            return self._snapshot(accounts)
+
+    def _snapshot(self, accounts) -> Dict:
+        states = self._states if accounts is None else {a: self._states[a] for a in accounts if a in self._states}
+        return {"seq": self._seq, "accounts": {a: dict(s) for a, s in states.items()}}
+
+    def _since(self, cursor: int) -> Optional[List]:
+        """cursor 이후 이벤트 (버퍼에서 이미 밀려났거나 cursor가 미래면 None → snapshot 필요)"""
+        if cursor > self._seq:
+            return None
+        if cursor == self._seq:
+            return []
+        if not self._events or self._events[0][0] > cursor + 1:
+            return None
+        # seq는 연속 → 뒤에서부터 필요한 개수만
+        return list(islice(reversed(self._events), self._seq - cursor))[::-1]
+
+    def stream(self, last_id: Optional[str] = None, accounts: Optional[Iterable[str]] = None,
+               keepalive: Optional[float] = None) -> Iterator[str]:
+        """SSE 텍스트 제너레이터 (last_id = Last-Event-ID 헤더)
+        처음엔 snapshot 또는 놓친 delta, 이후 새 이벤트마다 전송, 조용하면 keepalive 주석"""
+        keepalive = self.keepalive if keepalive is None else keepalive
+        accounts = set(accounts) if accounts else None
+        try:
+            cursor = int(last_id) if last_id not in (None, "") else None
+        except ValueError:
+            cursor = None
+        yield f"retry: {self.retry_ms}\n\n"
+
+        with self._cond:
+            pending = self._since(cursor) if cursor is not None else None
+            if pending is None:
+                snap = self._snapshot(accounts)
+                cursor = snap["seq"]
+                SUBSCRIBERS.labels("snapshot").inc()
+            else:
+                SUBSCRIBERS.labels("resume").inc()
+        if pending is None:
+            yield _sse(cursor, "snapshot", snap)
+        else:
+            for seq, account, text in pending:
+                if accounts is None or account in accounts:
+                    yield text
+            if pending:
+                cursor = pending[-1][0]
+
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._seq > cursor, timeout=keepalive)
+                pending = self._since(cursor)
+                if pending is None:   # 너무 느린 구독자 → 버퍼에서 밀려남, 다시 전체 상태
+                    snap = self._snapshot(accounts)
+            if pending is None:
+                cursor = snap["seq"]
+                yield _sse(cursor, "snapshot", snap)
+                continue
+            if not pending:
+                yield ": keepalive\n\n"
+                continue
+            for seq, account, text in pending:
+                if accounts is None or account in accounts:
+                    yield text
+            cursor = pending[-1][0]
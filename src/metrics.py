@@ -0,0 +1,273 @@
+"""
+Prometheus 형식 지표 (카운터 / 히스토그램)
+
+- 라벨은 미리 바인딩: child = METRIC.labels("route") 를 한 번 만들어 두고 핫 패스에서는 child.inc() 만 호출
+- 기록은 스레드별 셀에 누적 (잠금 없음) → /metrics 조회 시에만 셀을 합산 (끝난 스레드 셀은 합쳐서 정리)
+- 프로세스별 지표 (멀티 프로세스 워커는 워커마다 따로 노출)
+
+    REQUESTS = counter("web_requests_total", "요청 수", ["route"])
+    hit = REQUESTS.labels("/api/backtest")
+    hit.inc()
+    print(REGISTRY.exposition())
+"""
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _CellOwner:
+    """스레드 로컬에 셀과 함께 두는 표식 — 스레드가 끝나 로컬이 지워지면 finalize가 셀을 정리"""
+
+    __slots__ = ('__weakref__',)
+
+
+class _Cells:
+    """스레드별 누적 셀 (셀 생성/정리 시에만 잠금, 기록은 자기 스레드 셀에만)
+    끝난 스레드의 셀은 retired에 합산하고 버림 → 요청마다 스레드를 만드는 서버에서도 셀 수가 늘지 않음"""
+
+    __slots__ = ('_local', '_cells', '_retired', '_lock', '_size')
+
+    def __init__(self, size: int):
+        self._local = threading.local()
+        self._cells: Dict[int, list] = {}
+        self._retired = [0] * size
+        self._lock = threading.Lock()
+        self._size = size
+
+    def new_cell(self) -> list:
+        cell = [0] * self._size
+        owner = _CellOwner()
+        with self._lock:
+            self._cells[id(cell)] = cell
+        weakref.finalize(owner, self._retire, cell)
+        self._local.owner = owner
+        self._local.cell = cell
+        return cell
+
+    def _retire(self, cell: list):
+        with self._lock:
+            if self._cells.pop(id(cell), None) is not None:
+                for i, v in enumerate(cell):
+                    self._retired[i] += v
+
+    def total(self) -> list:
+        with self._lock:
+            out = list(self._retired)
+            cells = list(self._cells.values())
+        for cell in cells:
+            for i, v in enumerate(cell):
+                out[i] += v
+        return out
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+
+class CounterChild:
+    """라벨이 바인딩된 카운터"""
+
+    __slots__ = ('_cells', '_local')
+
+    def __init__(self):
+        self._cells = _Cells(1)
+        self._local = self._cells._local
+
+    def inc(self, amount: float = 1):
+        try:
+            cell = self._local.cell
+        except AttributeError:
+            cell = self._cells.new_cell()
+        cell[0] += amount
+
+    @property
+    def value(self) -> float:
+        return self._cells.total()[0]
+
+
+class HistogramChild:
+    """라벨이 바인딩된 히스토그램 (셀 = 버킷별 개수 + [+Inf 개수, 합계])"""
+
+    __slots__ = ('_cells', '_local', '_bounds')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._bounds = bounds
+        self._cells = _Cells(len(bounds) + 2)
+        self._local = self._cells._local
+
+    def observe(self, value: float):
+        try:
+            cell = self._local.cell
+        except AttributeError:
+            cell = self._cells.new_cell()
+        cell[bisect_left(self._bounds, value)] += 1
+        cell[-1] += value
+
+    def time(self) -> '_Timer':
+        """with child.time(): ... → 걸린 시간(초) 기록"""
+        return _Timer(self)
+
+    def snapshot(self) -> Tuple[List[int], int, float]:
+        """(누적 버킷 개수, 전체 개수, 합계)"""
+        total = self._cells.total()
+        buckets, running = [], 0
+        for n in total[:-1]:
+            running += n
+            buckets.append(running)
+        return buckets[:-1], running, total[-1]
+
+    @property
+    def count(self) -> int:
+        return self.snapshot()[1]
+
+
+class _Timer:
+    __slots__ = ('_child', '_start')
+
+    def __init__(self, child: HistogramChild):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._start)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """라벨 값 → 바인딩된 child (같은 값이면 같은 객체, 핫 패스 밖에서 미리 만들어 둘 것)"""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: 라벨 {self.labelnames} 필요, {key} 받음")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_str(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return CounterChild()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{self._label_str(k)} {_fmt(c.value)}" for k, c in list(self._children.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def _new_child(self):
+        return HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self) -> _Timer:
+        return self.labels().time()
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, child in list(self._children.items()):
+            cumulative, count, total = child.snapshot()
+            for bound, n in zip(self.buckets, cumulative):
+                le = 'le="%s"' % _fmt(bound)
+                lines.append(f"{self.name}_bucket{self._label_str(key, le)} {n}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{self._label_str(key, le)} {count}")
+            lines.append(f"{self.name}_sum{self._label_str(key)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{self._label_str(key)} {count}")
+        return lines
+
+
+class Registry:
+    """지표 모음 (같은 이름으로 다시 만들면 기존 지표 반환)"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"지표 {name}이 다른 형식으로 이미 등록됨")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def exposition(self) -> str:
+        """텍스트 노출 형식 (Prometheus 0.0.4)"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _fmt(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+histogram = REGISTRY.histogram
@@ -0,0 +1,179 @@
+"""
+V3 파라미터 탐색 (Successive Halving)
+
+후보 전체를 짧은 기간으로 평가 → 지배당한(Pareto 순위 낮은) 후보를 eta분의 1만 남기고 제거
+→ 남은 후보를 더 긴 기간으로 재평가 … 마지막 단계는 전체 기간.
+모든 후보는 같은 InfiniteBuySimulator의 메모리 데이터(bars)를 공유한다.
+"""
+import itertools
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .simulator import InfiniteBuySimulator
+
+# (지표, 방향) : 1 = 클수록 좋음, -1 = 작을수록 좋음
+OBJECTIVES: List[Tuple[str, int]] = [
+    ('total_return_pct', 1),
+    ('max_drawdown_pct', 1),     # 음수 → 0에 가까울수록 좋음
+    ('exhaustion_pct', -1),
+]
+
+PARAM_KEYS = ('rules', 'divisions', 'target_profit_pct', 'star_base', 'star_coeff')
+
+
+@dataclass
+class Candidate:
+    """탐색 후보"""
+    params: Dict
+    metrics: Dict = field(default_factory=dict)
+    rung: int = -1            # 마지막으로 평가된 단계
+    bars: int = 0             # 마지막 평가에 쓴 일봉 수
+
+
+def dominates(a: Dict, b: Dict, objectives=OBJECTIVES) -> bool:
+    """a가 b를 지배하면 True (모든 지표에서 같거나 좋고, 하나 이상 더 좋음)"""
+    better = False
+    for key, sign in objectives:
+        diff = (a[key] - b[key]) * sign
+        if diff < 0:
+            return False
+        if diff > 0:
+            better = True
+    return better
+
+
+def pareto_ranks(metrics: List[Dict], objectives=OBJECTIVES) -> List[int]:
+    """비지배 정렬 순위 (0 = Pareto front), 쌍별 비교는 한 번만 (O(n^2))"""
+    n = len(metrics)
+    dominated_by = [[] for _ in range(n)]   # i가 지배하는 후보들
+    counts = [0] * n                        # i를 지배하는 후보 수
+    for i in range(n):
+        for j in range(i + 1, n):
+            if dominates(metrics[i], metrics[j], objectives):
+                dominated_by[i].append(j)
+                counts[j] += 1
+            elif dominates(metrics[j], metrics[i], objectives):
+                dominated_by[j].append(i)
+                counts[i] += 1
+    ranks = [-1] * n
+    front = [i for i in range(n) if counts[i] == 0]
+    rank = 0
+    while front:
+        nxt = []
+        for i in front:
+            ranks[i] = rank
+            for j in dominated_by[i]:
+                counts[j] -= 1
+                if counts[j] == 0:
+                    nxt.append(j)
+        front = nxt
+        rank += 1
+    return ranks
+
+
+def pareto_front(candidates: List[Candidate], objectives=OBJECTIVES) -> List[Candidate]:
+    ranks = pareto_ranks([c.metrics for c in candidates], objectives)
+    front = [c for c, r in zip(candidates, ranks) if r == 0]
+    return sorted(front, key=lambda c: -c.metrics['total_return_pct'])
+
+
+def expand_grid(grid: Dict[str, List]) -> List[Dict]:
+    """{'divisions': [20, 40], ...} → 모든 조합"""
+    keys = [k for k in PARAM_KEYS if k in grid]
+    values = [list(grid[k]) for k in keys]
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+
+class SuccessiveHalving:
+    """Successive Halving 탐색기
+    - eta: 단계마다 1/eta 만 남김
+    - min_bars: 첫 단계 최소 일봉 수
+    """
+
+    def __init__(self, sim: InfiniteBuySimulator, candidates: List[Dict],
+                 eta: int = 3, min_bars: int = 120):
+        if eta < 2:
+            raise ValueError("eta는 2 이상")
+        self.sim = sim
+        self.candidates = [Candidate(params=dict(p)) for p in candidates]
+        self.eta = eta
+        self.min_bars = min_bars
+        self.evaluations = 0
+        self.bars_evaluated = 0   # 평가에 쓴 일봉 수 합계 (실제 비용, 전수 탐색 = 후보 수 x 전체 일봉)
+
+    def schedule(self, total_bars: int) -> List[Tuple[int, int]]:
+        """단계별 (남길 후보 수, 일봉 수) — 마지막 단계는 전체 기간
+        최소 일봉 수에 막혀 기간이 같은 단계는 하나로 합침 (같은 데이터로 여러 번 자르지 않음)
+        → 일봉 수는 단계마다 늘어남"""
+        n = len(self.candidates)
+        rungs = 0
+        while self.eta ** (rungs + 1) <= n:
+            rungs += 1
+        plan = []
+        for r in range(rungs + 1):
+            keep = max(1, math.ceil(n / self.eta ** r))
+            bars = min(max(self.min_bars, int(total_bars / self.eta ** (rungs - r))), total_bars)
+            if plan and plan[-1][1] == bars:
+                continue   # 앞 단계와 같은 기간 → 다음 기간에서 한 번에 자름
+            plan.append((keep, bars))
+        return plan
+
+    def _evaluate(self, cand: Candidate, rung: int, bars: int):
+        strategy = self.sim.candidate_strategy(cand.params)
+        cand.metrics = self.sim.evaluate(strategy, end=bars)
+        cand.rung = rung
+        cand.bars = bars
+        self.evaluations += 1
+        self.bars_evaluated += bars
+
+    def run(self) -> List[Candidate]:
+        """탐색 실행 → 전체 기간까지 살아남은 후보 목록"""
+        total_bars = len(self.sim.bars()[0])
+        alive = list(self.candidates)
+        for rung, (keep, bars) in enumerate(self.schedule(total_bars)):
+            if len(alive) > keep:
+                ranks = pareto_ranks([c.metrics for c in alive])
+                order = sorted(range(len(alive)),
+                               key=lambda i: (ranks[i], -alive[i].metrics['total_return_pct']))
+                alive = [alive[i] for i in order[:keep]]
+            for cand in alive:
+                self._evaluate(cand, rung, bars)
+        return alive
+
+    def to_frame(self, candidates: Optional[List[Candidate]] = None) -> pd.DataFrame:
+        rows = []
+        for c in candidates if candidates is not None else self.candidates:
+            rows.append({**c.params, **c.metrics, 'rung': c.rung})
+        return pd.DataFrame(rows)
+
+    def save(self, store, batch: Optional[str] = None) -> int:
+        """평가된 후보 전체를 결과 저장소에 추가 (단계/일봉 수는 extra로 보관)"""
+        sim = self.sim
+        rows = [{**c.params, **c.metrics, 'rung': c.rung} for c in self.candidates if c.rung >= 0]
+        return store.append(rows, batch=batch or time.strftime('%Y%m%d-%H%M%S'), ticker=sim.ticker,
+                            start_date=sim.backtest_start, end_date=sim.backtest_end)
+
+
+def grid_from_config(sim: InfiniteBuySimulator) -> Dict[str, List]:
+    """config의 optimize 섹션 (없으면 현재 설정 한 개)
+    rules 목록이 있으면 (예: [v3, v2.2]) 지정하지 않은 별% / 목표는 각 규칙의 값을 사용
+    """
+    opt = sim.config.get('optimize') or {}
+    strategy = sim.make_strategy()
+    grid = {'divisions': opt.get('divisions', [strategy.divisions])}
+    if 'rules' in opt:
+        grid['rules'] = list(opt['rules'])
+        for key in ('target_profit_pct', 'star_base', 'star_coeff'):
+            if key in opt:
+                grid[key] = opt[key]
+        return grid
+    grid.update({
+        'target_profit_pct': opt.get('target_profit_pct', [strategy.target_profit_pct]),
+        'star_base': opt.get('star_base', [strategy.star_base]),
+        'star_coeff': opt.get('star_coeff', [strategy.star_coeff]),
+    })
+    return grid
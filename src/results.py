@@ -0,0 +1,239 @@
+"""
+파라미터 탐색 / 배치 실행 결과 저장소 (SQLite)
+
+- 행 = 실행 하나: 종목/기간 + 파라미터 + 지표, 나머지 값은 extra(JSON)
+- append()는 한 트랜잭션에 executemany → 수만 행도 한 번에
+- 플래너 통계(ANALYZE)는 마지막 갱신 이후 행 수가 크게 늘었을 때만 (대량 적재 후에는 analyze() 한 번)
+- query()는 조건/정렬/개수를 SQL로 넘겨 인덱스로 처리 → pandas로 전부 읽지 않음
+
+    store = ResultsStore("results.sqlite")
+    store.query({"ticker": "SOXL", "divisions": 30, "max_drawdown_pct__gt": -40},
+                order_by="total_return_pct", limit=20)
+
+조건 키: 컬럼명 (같음) 또는 컬럼명__gt / __ge / __lt / __le / __ne / __in
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+from .rules import RuleSet
+
+# 컬럼 → SQLite 타입 (순서 = 테이블 컬럼 순서)
+META_COLUMNS = {
+    "batch": "TEXT",
+    "ticker": "TEXT",
+    "start_date": "TEXT",
+    "end_date": "TEXT",
+    "created": "REAL",
+}
+PARAM_COLUMNS = {
+    "rules": "TEXT",
+    "divisions": "INTEGER",
+    "target_profit_pct": "REAL",
+    "star_base": "REAL",
+    "star_coeff": "REAL",
+}
+METRIC_COLUMNS = {
+    "total_return_pct": "REAL",
+    "max_drawdown_pct": "REAL",
+    "exhaustion_pct": "REAL",
+    "cycles_completed": "INTEGER",
+    "bars": "INTEGER",
+}
+COLUMNS = {**META_COLUMNS, **PARAM_COLUMNS, **METRIC_COLUMNS}
+
+# 수익률 순위 질의용: (종목, 분할) / 종목 / 전체 / 배치별로 정렬된 인덱스 → 순서대로 읽다가 limit개 차면 멈춤
+INDEXES = {
+    "idx_runs_ticker_div_return": ("ticker", "divisions", "total_return_pct"),
+    "idx_runs_ticker_return": ("ticker", "total_return_pct"),
+    "idx_runs_return": ("total_return_pct",),
+    "idx_runs_batch_return": ("batch", "total_return_pct"),
+}
+
+_OPS = {"": "=", "gt": ">", "ge": ">=", "lt": "<", "le": "<=", "ne": "!="}
+MAX_LIMIT = 10000
+# 이 프로세스가 추가한 행이 max(이 값, 마지막 ANALYZE 때 행 수) 이상이면 통계 갱신 (행 수가 두 배쯤 될 때마다)
+ANALYZE_MIN_ROWS = 1000
+
+
+def _rules_name(value) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, RuleSet):
+        return value.name
+    return value.get("name") or f"{value.get('base', 'v3')}-custom"
+
+
+class ResultsStore:
+    """SQLite 결과 저장소 (스레드별 연결, WAL 모드라 쓰는 중에도 웹 조회 가능)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending = 0   # 마지막 ANALYZE 이후 추가한 행 수
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._init_schema()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _init_schema(self):
+        cols = ", ".join(f"{name} {kind}" for name, kind in COLUMNS.items())
+        with self._conn() as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, {cols}, extra TEXT)")
+            for name, cols in INDEXES.items():
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON runs ({', '.join(cols)})")
+
+    # ─── 쓰기 ─────────────────────────────────────────
+
+    def append(self, rows: Iterable[Dict], **meta) -> int:
+        """결과 행 일괄 추가 → 추가한 행 수
+        meta (batch, ticker, start_date, end_date)는 행에 없을 때 기본값으로 사용"""
+        values = self._values(rows, meta)
+        if not values:
+            return 0
+        with self._conn() as conn:
+            self._insert(conn, values)
+        self._added(len(values))
+        return len(values)
+
+    def replace(self, batch: str, rows: Iterable[Dict], **meta) -> int:
+        """배치를 통째로 교체 → 추가한 행 수
+        삭제와 추가를 한 트랜잭션으로 → 중간에 실패하거나 동시에 조회해도 이전 또는 새 결과만 보임"""
+        values = self._values(rows, {**meta, "batch": batch})
+        with self._conn() as conn:
+            conn.execute("DELETE FROM runs WHERE batch = ?", (batch,))
+            if values:
+                self._insert(conn, values)
+        self._added(len(values))
+        return len(values)
+
+    @staticmethod
+    def _values(rows: Iterable[Dict], meta: Dict) -> List[list]:
+        now = time.time()
+        values = []
+        for row in rows:
+            row = {**meta, **row}
+            row.setdefault("created", now)
+            rules = row.get("rules")
+            if rules is not None and not isinstance(rules, str):
+                if isinstance(rules, dict):
+                    row.setdefault("rules_config", rules)   # config로 풀어 쓴 규칙은 원본도 보관
+                row["rules"] = _rules_name(rules)
+            extra = {k: v for k, v in row.items() if k not in COLUMNS and v is not None}
+            values.append([row.get(k) for k in COLUMNS] + [json.dumps(extra, default=str) if extra else None])
+        return values
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, values: List[list]):
+        names = list(COLUMNS)
+        sql = f"INSERT INTO runs ({', '.join(names)}, extra) VALUES ({', '.join('?' * (len(names) + 1))})"
+        conn.executemany(sql, values)
+
+    def _added(self, count: int):
+        with self._lock:
+            self._pending += count
+            pending = self._pending
+        if pending >= max(ANALYZE_MIN_ROWS, self._analyzed_rows()):
+            self.analyze()
+
+    def _analyzed_rows(self) -> int:
+        """마지막 ANALYZE 때 행 수 (통계가 없으면 0)"""
+        try:
+            row = self._conn().execute("SELECT stat FROM sqlite_stat1 WHERE tbl = 'runs' LIMIT 1").fetchone()
+        except sqlite3.OperationalError:   # 아직 ANALYZE 전 (sqlite_stat1 없음)
+            return 0
+        return int(row[0].split()[0]) if row else 0
+
+    def analyze(self):
+        """플래너 통계 갱신 (표본만 읽어서 빠름) → 정렬 인덱스를 고름"""
+        with self._conn() as conn:
+            conn.execute("PRAGMA analysis_limit=1000")
+            conn.execute("ANALYZE")
+        with self._lock:
+            self._pending = 0
+
+    def delete(self, batch: str) -> int:
+        with self._conn() as conn:
+            return conn.execute("DELETE FROM runs WHERE batch = ?", (batch,)).rowcount
+
+    # ─── 조회 ─────────────────────────────────────────
+
+    @staticmethod
+    def _where(where: Optional[Dict]):
+        clauses, args = [], []
+        for key, value in (where or {}).items():
+            name, _, op = key.partition("__")
+            if name not in COLUMNS and name != "id":
+                raise ValueError(f"알 수 없는 컬럼: {name}")
+            if op == "in":
+                value = list(value)
+                if not value:
+                    clauses.append("0")
+                    continue
+                clauses.append(f"{name} IN ({', '.join('?' * len(value))})")
+                args.extend(value)
+            elif op in _OPS:
+                if value is None and op in ("", "ne"):
+                    clauses.append(f"{name} IS {'NOT ' if op == 'ne' else ''}NULL")
+                    continue
+                clauses.append(f"{name} {_OPS[op]} ?")
+                args.append(value)
+            else:
+                raise ValueError(f"알 수 없는 조건: {key} ({', '.join(k or '(같음)' for k in _OPS)}, in)")
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), args
+
+    def query(self, where: Optional[Dict] = None, order_by: Optional[str] = "total_return_pct",
+              desc: bool = True, limit: Optional[int] = 20, columns: Optional[Sequence[str]] = None) -> List[Dict]:
+        """조건에 맞는 행을 정렬해서 limit개 (dict 목록, extra는 풀어서 합침)
+        limit은 0 ~ MAX_LIMIT로 제한 (SQLite는 음수 LIMIT을 무제한으로 처리)"""
+        if columns is not None:
+            unknown = [c for c in columns if c not in COLUMNS and c not in ("id", "extra")]
+            if unknown:
+                raise ValueError(f"알 수 없는 컬럼: {', '.join(unknown)}")
+        select = ", ".join(columns) if columns else "*"
+        clause, args = self._where(where)
+        sql = f"SELECT {select} FROM runs{clause}"
+        if order_by:
+            if order_by not in COLUMNS and order_by != "id":
+                raise ValueError(f"알 수 없는 정렬 컬럼: {order_by}")
+            sql += f" ORDER BY {order_by} {'DESC' if desc else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(max(0, min(int(limit), MAX_LIMIT)))
+        out = []
+        for r in self._conn().execute(sql, args):
+            row = dict(r)
+            extra = row.pop("extra", None)
+            if extra:
+                row.update(json.loads(extra))
+            out.append(row)
+        return out
+
+    def count(self, where: Optional[Dict] = None) -> int:
+        clause, args = self._where(where)
+        return self._conn().execute(f"SELECT COUNT(*) FROM runs{clause}", args).fetchone()[0]
+
+    def to_frame(self, where: Optional[Dict] = None, **kwargs) -> pd.DataFrame:
+        kwargs.setdefault("limit", None)
+        return pd.DataFrame(self.query(where, **kwargs))
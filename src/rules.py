@@ -0,0 +1,163 @@
+"""
+전략 규칙 세트 (별% 공식, 매수 분할, 매도 목표, 반복리)
+
+규칙은 config 또는 파이썬 객체(RuleSet)로 정의하고, 전략 생성 시 compile()로
+숫자/튜플 상수(CompiledRules)로 풀어서 InfiniteBuyStrategyV3 일봉 루프가 그대로 사용 → 변형 비교도 같은 속도.
+
+strategy:
+  rules: v3              # 등록된 이름 (v3, v2.2)
+  # 또는 기존 규칙에서 일부만 변경
+  # rules:
+  #   base: v3
+  #   star: {TQQQ: [12, 1.2]}
+  #   first_half: [[star, 0.5], [zero, 0.5]]
+  #   second_half: [[abs_star, 1.0]]
+  #   reinvest_divisor: 20
+"""
+from dataclasses import dataclass, field, replace
+from typing import Dict, Optional, Tuple, Union
+
+# 매수 구간 종류 → (별% 계수 a, 고정 % b, 기록 action) : LOC % = a * 별% + b
+LEG_KINDS = {
+    "star": (1.0, 0.0, "buy_star"),        # 별%LOC
+    "zero": (0.0, 0.0, "buy_zero"),        # 0%LOC (전일 종가)
+    "abs_star": (-1.0, 0.0, "buy_star"),   # |별%|LOC (후반전, 별% ≤ 0)
+}
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """전략 변형 정의
+    - star: 종목별 (base, coeff) → 별% = base - coeff * T ("default"는 나머지 종목)
+    - first_half / second_half: 매수 구간 [(종류 또는 고정 %, 1회매수금 비율), ...]
+      종류는 LEG_KINDS, 숫자면 전일 종가 대비 고정 % LOC
+    - target_profit_pct: 매도 목표 (평단 대비 %, None = 전략 인자 사용)
+    - profit_share: 실현 수익 중 반복리에 쓰는 비율 (나머지는 적립금)
+    - reinvest_divisor: 1회매수금 += 반복리 누적 / reinvest_divisor
+    - keep_max_on_loss: 손실 시 1회매수금을 과거 최대 수익 기준으로 유지
+    - t_decimals: T 올림 자릿수
+    """
+    name: str
+    star: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+    first_half: Tuple = (("star", 0.5), ("zero", 0.5))
+    second_half: Tuple = (("abs_star", 1.0),)
+    target_profit_pct: Optional[float] = None
+    profit_share: float = 0.5
+    reinvest_divisor: int = 40
+    keep_max_on_loss: bool = True
+    t_decimals: int = 2
+
+    def star_params(self, ticker: str) -> Tuple[float, float]:
+        params = self.star.get(ticker.upper()) or self.star.get("default")
+        if params is None:
+            raise ValueError(f"규칙 {self.name}: {ticker} 별% 설정 없음")
+        return float(params[0]), float(params[1])
+
+    def compile(self, ticker: str) -> 'CompiledRules':
+        base, coeff = self.star_params(ticker)
+        first_legs = _compile_legs(self.first_half)
+        second_legs = _compile_legs(self.second_half)
+        return CompiledRules(
+            name=self.name,
+            star_base=base,
+            star_coeff=coeff,
+            first_legs=first_legs,
+            second_legs=second_legs,
+            v3_legs=(first_legs, second_legs) == _V3_LEGS,
+            target_profit_pct=self.target_profit_pct,
+            profit_share=float(self.profit_share),
+            reinvest_divisor=int(self.reinvest_divisor),
+            keep_max_on_loss=bool(self.keep_max_on_loss),
+            t_scale=10 ** int(self.t_decimals),
+        )
+
+
+@dataclass(frozen=True)
+class CompiledRules:
+    """일봉 루프용 상수 (legs = ((a, b, 비율, action), ...))"""
+    name: str
+    star_base: float
+    star_coeff: float
+    first_legs: Tuple[Tuple[float, float, float, str], ...]
+    second_legs: Tuple[Tuple[float, float, float, str], ...]
+    v3_legs: bool                  # 기본 V3 구간 (절반 별% + 절반 0% / 전액 |별%|) → 전략이 펼친 경로 사용
+    target_profit_pct: Optional[float]
+    profit_share: float
+    reinvest_divisor: int
+    keep_max_on_loss: bool
+    t_scale: int
+
+
+def _compile_legs(legs) -> Tuple[Tuple[float, float, float, str], ...]:
+    out = []
+    for kind, fraction in legs:
+        if isinstance(kind, str):
+            if kind not in LEG_KINDS:
+                raise ValueError(f"매수 구간 종류 {kind!r} 없음 ({', '.join(LEG_KINDS)} 또는 숫자 %)")
+            a, b, action = LEG_KINDS[kind]
+        else:
+            a, b, action = 0.0, float(kind), "buy_pct"
+        if not 0 < float(fraction) <= 1:
+            raise ValueError(f"매수 비율은 0 초과 1 이하: {fraction}")
+        out.append((a, b, float(fraction), action))
+    if not out:
+        raise ValueError("매수 구간이 비어 있음")
+    return tuple(out)
+
+
+# RuleSet 기본 매수 구간(V3)의 컴파일 결과
+_V3_LEGS = (_compile_legs(RuleSet.first_half), _compile_legs(RuleSet.second_half))
+
+
+# ─── 등록된 규칙 ─────────────────────────────────────
+
+V3 = RuleSet(
+    name="v3",
+    star={"TQQQ": (15, 1.5), "SOXL": (20, 2.0), "default": (15, 1.5)},
+)
+
+# V2.2: 별% = 10 - T/2 (40분할 기준 T=20에서 전후반 전환), 목표 10%
+# 쿼터 매도 / 평단 기준 LOC 같은 V2.2 고유 매도 규칙은 반영하지 않음
+V2_2 = RuleSet(
+    name="v2.2",
+    star={"default": (10, 0.5)},
+    target_profit_pct=10.0,
+)
+
+RULES: Dict[str, RuleSet] = {}
+
+
+def register_rules(rules: RuleSet) -> RuleSet:
+    """규칙 등록 (같은 이름은 교체)"""
+    RULES[rules.name] = rules
+    return rules
+
+
+def get_rules(name: str) -> RuleSet:
+    try:
+        return RULES[name]
+    except KeyError:
+        raise ValueError(f"규칙 {name!r} 없음 (등록: {', '.join(RULES)})") from None
+
+
+def rules_from_config(cfg: Union[None, str, Dict, RuleSet]) -> RuleSet:
+    """config의 strategy.rules → RuleSet (없으면 v3)"""
+    if cfg is None:
+        return V3
+    if isinstance(cfg, RuleSet):
+        return cfg
+    if isinstance(cfg, str):
+        return get_rules(cfg)
+    cfg = dict(cfg)
+    base = get_rules(cfg.pop('base', 'v3'))
+    if 'star' in cfg:
+        cfg['star'] = {**base.star, **{k.upper() if k != 'default' else k: tuple(v) for k, v in cfg['star'].items()}}
+    for key in ('first_half', 'second_half'):
+        if key in cfg:
+            cfg[key] = tuple(tuple(leg) for leg in cfg[key])
+    cfg.setdefault('name', f"{base.name}-custom")
+    return replace(base, **cfg)
+
+
+register_rules(V3)
+register_rules(V2_2)
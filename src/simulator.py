@@ -1,15 +1,115 @@
 """
 백테스트 및 시뮬레이션 (V3.0)
 """
-import yfinance as yf
 import pandas as pd
 import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
+from contextlib import contextmanager
+from dataclasses import astuple
+import hashlib
+import json
+import os
+import time
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import yaml
 
+try:
+    import fcntl
+except ImportError:  # Windows: 잠금 없이 동작 (같은 설정을 동시에 실행하지 말 것)
+    fcntl = None
+
 from .strategy import InfiniteBuyStrategyV3, TradeRecord
+from .accounting import policy_from_config
+from .rules import rules_from_config
+from .data.prefetch import make_prefetcher
+from .data.store import format_day_ordinals, is_mapped, to_day_ordinals
+from . import metrics
+
+BACKTEST_SECONDS = metrics.histogram("backtest_duration_seconds", "백테스트 실행 시간 (스냅샷 복원 포함)",
+                                     buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+BACKTEST_BARS = metrics.counter("backtest_bars_total", "백테스트로 처리한 일봉 수")
+BACKTEST_BAR_RATE = metrics.histogram("backtest_bars_per_second", "백테스트 실행별 처리 속도 (일봉/초)",
+                                      buckets=(1e3, 1e4, 5e4, 1e5, 2e5, 5e5, 1e6, 2e6))
+SNAPSHOT_REQUESTS = metrics.counter("backtest_snapshot_requests_total", "이어서 실행용 스냅샷 조회 (hit/miss)", ["result"])
+_SNAPSHOT_HIT = SNAPSHOT_REQUESTS.labels("hit")
+_SNAPSHOT_MISS = SNAPSHOT_REQUESTS.labels("miss")
+
+# 2: 일자를 int 일수로 저장 (이전 문자열 스냅샷은 처음부터 다시 실행)
+# 3: 규칙 세트의 매도 목표가 config 목표보다 우선 (이전 스냅샷은 잘못된 목표로 진행됐을 수 있음)
+# 4: 정수 주 모드에서 구간 금액으로 1주를 못 사면 1주 매수 (이전 스냅샷은 매수가 멈춰 있었을 수 있음)
+SNAPSHOT_VERSION = 4
+
+# 일봉 순회 시 한 번에 파이썬 값으로 바꾸는 행 수 (전체 기간 사본 없이 float 연산 속도 유지)
+ROW_CHUNK = 4096
+
+# TradeRecord 필드 → get_trade_df 컬럼
+_TRADE_COLUMNS = (
+    ('date', 'Date'), ('cycle', 'Cycle'), ('round_num', 'Round'), ('action', 'Action'), ('half', 'Half'),
+    ('price', 'Price'), ('shares', 'Shares'), ('amount', 'Amount'), ('total_shares', 'Total Shares'),
+    ('avg_price', 'Avg Price'), ('target_sell_price', 'Target Sell Price'),
+    ('remaining_budget', 'Remaining Budget'), ('t_value', 'T'), ('star_pct', 'Star %'),
+    ('unit_amount', 'Unit Amount'),
+)
+
+
+def iter_rows(columns: Tuple[np.ndarray, ...], start: int = 0, stop: Optional[int] = None):
+    """컬럼 배열 → 일봉 행 튜플 (ROW_CHUNK개씩만 리스트로 변환, int 일수/float 그대로)"""
+    stop = len(columns[0]) if stop is None else stop
+    for lo in range(start, stop, ROW_CHUNK):
+        hi = min(lo + ROW_CHUNK, stop)
+        yield from zip(*(col[lo:hi].tolist() for col in columns))
+
+
+def _ffill_zero(values: np.ndarray) -> np.ndarray:
+    """NaN을 직전 값으로 채우고 맨 앞 NaN은 0"""
+    idx = np.where(np.isnan(values), 0, np.arange(len(values)))
+    np.maximum.accumulate(idx, out=idx)
+    out = values[idx]
+    out[np.isnan(out)] = 0.0
+    return out
+
+
+def holdings_mdd(bars: np.ndarray, shares: np.ndarray, closes: np.ndarray) -> float:
+    """보유 평가금(수량 x 종가) MDD %
+    매매 있는 날은 매매마다 한 행, 없는 날은 직전 수량 한 행 (HoldingsDrawdown과 같은 순서)
+    bars: 매매별 일봉 인덱스 (오름차순, -1은 제외)"""
+    ok = bars >= 0
+    bars, shares = bars[ok], shares[ok]
+    rows = np.maximum(np.bincount(bars, minlength=len(closes)), 1)
+    offsets = np.cumsum(rows) - rows
+    rank = np.arange(len(bars)) - np.searchsorted(bars, bars)   # 같은 날 안에서 순서
+    held = np.full(int(rows.sum()), np.nan)
+    held[offsets[bars] + rank] = shares
+    value = _ffill_zero(held) * np.repeat(closes, rows)
+    peak = np.maximum.accumulate(value)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dd = (value - peak) / peak * 100
+    if np.isnan(dd).all():
+        return 0.0
+    return float(np.nanmin(dd))
+
+
+class HoldingsDrawdown:
+    """보유 평가금(수량 x 종가) 기준 MDD를 일봉 순회 중에 계산
+    매매 기록을 보관하지 않는 보존 수준에서 calculate_performance의 병합 계산을 대신함 (같은 값)
+    """
+
+    __slots__ = ('shares', 'peak', 'mdd')
+
+    def __init__(self, shares: float = 0.0, peak: float = 0.0, mdd: float = 0.0):
+        self.shares = shares   # 마지막 매매 후 보유 수량 (매매 없는 날은 그대로)
+        self.peak = peak
+        self.mdd = mdd
+
+    def update(self, shares: float, close: float):
+        self.shares = shares
+        value = shares * close
+        if value > self.peak:
+            self.peak = value
+        elif self.peak > 0:
+            dd = (value - self.peak) / self.peak * 100
+            if dd < self.mdd:
+                self.mdd = dd
 
 
 class InfiniteBuySimulator:
@@ -17,85 +117,385 @@ class InfiniteBuySimulator:
 
     def __init__(self, config_path: str):
         with open(config_path, 'r') as f:
-            self.config = yaml.safe_load(f)
-        
-        self.strategy = InfiniteBuyStrategyV3(
-            total_investment=self.config['strategy']['total_investment'],
-            divisions=self.config['strategy']['divisions'],
-            target_profit_pct=self.config['strategy']['target_profit_pct'],
-            ticker=self.config['ticker'],
-        )
+            self._setup(yaml.safe_load(f))
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'InfiniteBuySimulator':
+        """config dict로 생성 (파일 없이, 캠페인 워커 등)"""
+        sim = cls.__new__(cls)
+        sim._setup(config)
+        return sim
+
+    def _setup(self, config: Dict):
+        self.config = config
+        self.strategy = self.make_strategy()
         self.ticker = self.config['ticker']
         self.backtest_start = self.config['backtest']['start_date']
         self.backtest_end = self.config['backtest']['end_date']
+        self.snapshot_dir = self.config['backtest'].get('snapshot_dir')
+        self._log_bytes = None     # 매매 기록 로그에 저장된 바이트 수 (None = 새로 씀)
+        self._saved_offset = 0     # 로그에 저장된 매매 기록 수
         self.data = None
+        self.prefetcher = make_prefetcher(self.config.get('data'))
+        self._bars = None
+        self._bar_lookup = None    # (첫 일수, 일수 → 일봉 인덱스 배열)
+        self.drawdown = HoldingsDrawdown()
+
+    def make_strategy(self, **overrides) -> InfiniteBuyStrategyV3:
+        """config 기반 전략 생성 (overrides로 divisions, target_profit_pct, star_base, rules 등 변경)
+        rules는 등록 이름 / dict / RuleSet 모두 가능
+        매도 목표: overrides에 직접 준 값 > 규칙 세트의 목표 > config의 target_profit_pct
+        """
+        cfg = self.config['strategy']
+        params = dict(
+            total_investment=cfg['total_investment'],
+            divisions=cfg['divisions'],
+            target_profit_pct=cfg.get('target_profit_pct'),
+            ticker=self.config['ticker'],
+            rounding=policy_from_config(cfg),
+            retention=cfg.get('retention', 'trades'),
+            rules=cfg.get('rules'),
+        )
+        params.update(overrides)
+        params['rules'] = rules_from_config(params['rules'])
+        if 'target_profit_pct' not in overrides and params['rules'].target_profit_pct is not None:
+            params['target_profit_pct'] = params['rules'].target_profit_pct
+        return InfiniteBuyStrategyV3(**params)
 
     def fetch_data(self) -> pd.DataFrame:
-        """yfinance로 데이터 가져오기"""
-        ticker = yf.Ticker(self.ticker)
-        df = ticker.history(start=self.backtest_start, end=self.backtest_end)
-        if df.empty:
-            raise ValueError(f"No data for {self.ticker}")
-        df.reset_index(inplace=True)
-        df['Date'] = df['Date'].dt.strftime('%Y-%m-%d')
-        df['Prev_Close'] = df['Close'].shift(1)
-        df.dropna(subset=['Prev_Close'], inplace=True)
+        """데이터 가져오기 (config의 data.source, 기본 yfinance)
+        Date는 datetime64 그대로, Day = int64 일수 (전략/매매 기록이 쓰는 일자)"""
+        return self.set_data(self.prefetcher.fetch_one(self.ticker, self.backtest_start, self.backtest_end))
+
+    def set_data(self, df: pd.DataFrame) -> pd.DataFrame:
+        """이미 받아 둔 일봉으로 데이터 설정 (긴 기간을 한 번 받아 구간별로 잘라 쓸 때)
+        입력 프레임은 바꾸지 않음. 공유 저장소(memmap) 컬럼은 복사 없이 읽기 전용 뷰 그대로 사용
+        → 워커 프로세스마다 시세 사본을 만들지 않음 (Prev_Close, Day만 새 배열)"""
+        mapped = is_mapped(df['Close'].to_numpy())
+        columns = {c: df[c].to_numpy() if mapped else df[c].to_numpy(copy=True) for c in df.columns}
+        close = columns['Close']
+        prev_close = np.empty(len(close))
+        prev_close[:1] = np.nan
+        prev_close[1:] = close[:-1]
+        valid = ~np.isnan(prev_close)
+        rows = slice(1, None) if valid[1:].all() else valid   # 보통 첫 행만 빠짐 → 슬라이스 (뷰 유지)
+        columns = {c: values[rows] for c, values in columns.items()}
+        columns['Prev_Close'] = prev_close[rows]
+        columns['Day'] = to_day_ordinals(columns['Date'])
+        df = pd.DataFrame(columns, index=df.index[rows], copy=False)
         self.data = df
+        self._bars = None
+        self._bar_lookup = None
         return df
 
-    def run_backtest(self) -> List[TradeRecord]:
-        """백테스트 실행"""
-        if self.data is None:
-            self.fetch_data()
+    def bars(self) -> Tuple[np.ndarray, ...]:
+        """일봉 컬럼 배열 (self.data의 뷰, 복사 없음) → (day, open, high, low, close, prev_close)
+        day = int64 일수, 순회는 iter_rows로 (청크 단위로만 파이썬 값 변환)
+        """
+        if self._bars is None:
+            if self.data is None:
+                self.fetch_data()
+            df = self.data
+            self._bars = tuple(df[c].to_numpy() for c in ('Day', 'Open', 'High', 'Low', 'Close', 'Prev_Close'))
+        return self._bars
+
+    def bar_index(self, days) -> np.ndarray:
+        """int 일수 배열 → 일봉 인덱스 (조회 배열 직접 인덱싱, 데이터에 없는 날은 -1)"""
+        if self._bar_lookup is None:
+            if self.data is None:
+                self.fetch_data()
+            all_days = self.data['Day'].values
+            first = int(all_days[0]) if len(all_days) else 0
+            lookup = np.full(int(all_days[-1]) - first + 1 if len(all_days) else 0, -1, dtype=np.int64)
+            lookup[all_days - first] = np.arange(len(all_days))
+            self._bar_lookup = (first, lookup)
+        first, lookup = self._bar_lookup
+        pos = np.asarray(days, dtype=np.int64) - first
+        out = np.full(pos.shape, -1, dtype=np.int64)
+        ok = (pos >= 0) & (pos < len(lookup))
+        out[ok] = lookup[pos[ok]]
+        return out
+
+    def run_backtest(self, resume: Optional[bool] = None) -> List[TradeRecord]:
+        """백테스트 실행 → 이번 실행에서 생긴 매매 기록 (strategy.retention이 trades가 아니면 빈 목록)
+        - resume: 저장된 스냅샷 이후 일봉만 처리 (기본: backtest.snapshot_dir 설정 시)
+        """
+        if resume is None:
+            resume = self.snapshot_dir is not None
+        started = time.perf_counter()
+        bars = self.bars()
+        start = self.load_snapshot() if resume else 0
+        if resume:
+            (_SNAPSHOT_HIT if start else _SNAPSHOT_MISS).inc()
 
         trades = []
-        for _, row in self.data.iterrows():
-            day_trades = self.strategy.process_day(
-                date=row['Date'],
-                open_price=row['Open'],
-                high=row['High'],
-                low=row['Low'],
-                close=row['Close'],
-                prev_close=row['Prev_Close'],
-            )
-            trades.extend(day_trades)
+        process_day = self.strategy.process_day
+        rows = iter_rows(bars, start)
+        if self.strategy.retention == "trades":
+            for date, open_, high, low, close, prev_close in rows:
+                trades.extend(process_day(date, open_, high, low, close, prev_close))
+        else:
+            # 매매 기록 없이 MDD만 누적
+            dd = self.drawdown
+            for date, open_, high, low, close, prev_close in rows:
+                day_trades = process_day(date, open_, high, low, close, prev_close)
+                if day_trades:
+                    for rec in day_trades:
+                        dd.update(rec.total_shares, close)
+                else:
+                    dd.update(dd.shares, close)
+
+        if self.snapshot_dir:
+            self.save_snapshot()
 
+        elapsed = time.perf_counter() - started
+        processed = len(bars[0]) - start
+        BACKTEST_SECONDS.observe(elapsed)
+        BACKTEST_BARS.inc(processed)
+        if processed and elapsed > 0:
+            BACKTEST_BAR_RATE.observe(processed / elapsed)
         return trades
 
-    def get_trade_df(self) -> pd.DataFrame:
-        """매매 기록을 DataFrame으로"""
-        records = []
-        for t in self.strategy.trades:
-            records.append({
-                'Date': t.date,
-                'Cycle': t.cycle,
-                'Round': t.round_num,
-                'Action': t.action,
-                'Half': t.half,
-                'Price': t.price,
-                'Shares': t.shares,
-                'Amount': t.amount,
-                'Total Shares': t.total_shares,
-                'Avg Price': t.avg_price,
-                'Target Sell Price': t.target_sell_price,
-                'Remaining Budget': t.remaining_budget,
-                'T': t.t_value,
-                'Star %': t.star_pct,
-                'Unit Amount': t.unit_amount,
-            })
-        return pd.DataFrame(records)
+    # ─── 스냅샷 (종료일이 늘어나면 이어서 실행) ─────────
 
-    def calculate_performance(self) -> Dict:
-        """성과 계산"""
+    def snapshot_key(self) -> str:
+        """설정 해시 (종료일 제외 → 종료일만 바뀌면 같은 스냅샷)"""
+        cfg = {
+            'strategy': self.config['strategy'],
+            'ticker': self.ticker,
+            'start_date': self.backtest_start,
+            'data': self.config.get('data'),
+        }
+        return hashlib.sha1(json.dumps(cfg, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+    def _snapshot_paths(self) -> Tuple[str, str]:
+        base = os.path.join(self.snapshot_dir, self.snapshot_key())
+        return base + '.json', base + '.trades.jsonl'
+
+    @contextmanager
+    def _snapshot_lock(self):
+        """스냅샷 키별 프로세스 간 잠금 (같은 설정의 동시 요청이 로그를 자르거나 섞지 않게)"""
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        path = os.path.join(self.snapshot_dir, self.snapshot_key() + '.lock')
+        with open(path, 'w') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def save_snapshot(self):
+        """전략 상태 저장 + 새 매매 기록만 로그에 추가"""
+        with self._snapshot_lock():
+            self._save_snapshot()
+
+    def _save_snapshot(self):
+        snap_path, log_path = self._snapshot_paths()
+        dates, _, _, _, closes, _ = self.bars()
+        if not len(dates):
+            return
+        try:
+            with open(snap_path) as f:
+                saved = json.load(f)
+            if saved.get('version') == SNAPSHOT_VERSION and saved['last_date'] > int(dates[-1]):
+                return   # 다른 요청이 더 긴 기간을 이미 저장 → 되돌리지 않음
+        except (OSError, ValueError, KeyError):
+            pass
+        state = self.strategy.snapshot()
+
+        if self._log_bytes is not None and (not os.path.exists(log_path)
+                                            or os.path.getsize(log_path) < self._log_bytes):
+            self._log_bytes = None   # 불러온 뒤 다른 요청이 로그를 새로 씀 → 전체 다시 기록
+        if self._log_bytes is None:
+            new_trades = self.strategy.trades
+            f = open(log_path, 'wb')
+        else:
+            new_trades = self.strategy.trades[self._saved_offset:]
+            f = open(log_path, 'r+b')
+            f.seek(self._log_bytes)
+            f.truncate()  # 이전에 중단된 쓰기 잔여분 제거
+        with f:
+            for t in new_trades:
+                f.write(json.dumps(astuple(t), ensure_ascii=False).encode() + b'\n')
+            self._log_bytes = f.tell()
+        self._saved_offset = len(self.strategy.trades)
+
+        snap = {
+            'version': SNAPSHOT_VERSION,
+            'key': self.snapshot_key(),
+            'last_date': int(dates[-1]),
+            'last_close': float(closes[-1]),
+            'bars': len(dates),
+            'log_bytes': self._log_bytes,
+            'state': state,
+            'drawdown': [self.drawdown.shares, self.drawdown.peak, self.drawdown.mdd],
+        }
+        tmp = snap_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(snap, f, ensure_ascii=False)
+        os.replace(tmp, snap_path)
+
+    def load_snapshot(self) -> int:
+        """스냅샷 복원 → 이어서 처리할 첫 일봉 인덱스 (복원 불가 시 0)"""
+        if not self.snapshot_dir:
+            return 0
+        with self._snapshot_lock():
+            return self._load_snapshot()
+
+    def _load_snapshot(self) -> int:
+        snap_path, log_path = self._snapshot_paths()
+        if not os.path.exists(snap_path) or not os.path.exists(log_path):
+            return 0
+        with open(snap_path) as f:
+            snap = json.load(f)
+        if snap.get('version', 1) != SNAPSHOT_VERSION:
+            return 0
+
+        # 스냅샷 마지막 날의 종가가 지금 데이터와 다르면 (수정주가 반영 등) 처음부터
+        dates, _, _, _, closes, _ = self.bars()
+        start = int(np.searchsorted(dates, snap['last_date'], side='right'))
+        if start == 0 or dates[start - 1] != snap['last_date']:
+            return 0
+        if abs(closes[start - 1] - snap['last_close']) > 1e-9 * max(1.0, abs(snap['last_close'])):
+            return 0
+
+        with open(log_path, 'rb') as f:
+            lines = f.read(snap['log_bytes']).splitlines()
+        if len(lines) != snap['state']['trade_offset']:
+            return 0
+        trades = [TradeRecord(*json.loads(line)) for line in lines]
+        self.strategy.restore(snap['state'], trades)
+        self.drawdown = HoldingsDrawdown(*snap.get('drawdown', ()))
+        self._log_bytes = snap['log_bytes']
+        self._saved_offset = len(trades)
+        return start
+
+    def evaluate(self, strategy: InfiniteBuyStrategyV3, end: int = None) -> Dict:
+        """전략을 처음 end개 일봉으로 실행하고 지표만 계산 (매매 기록 DataFrame 없이)
+        - total_return_pct: (현금 + 평가금) / 원금
+        - max_drawdown_pct: 계좌 평가금 기준 MDD
+        - exhaustion_pct: 잔여 예산 < 1회매수금 인 일수 비율 (시드 소진)
+        """
+        bars = self.bars()
+        n = len(bars[0]) if end is None else min(end, len(bars[0]))
+        pos = strategy.position
+        process_day = strategy.process_day
+        peak = strategy.initial_investment
+        mdd = 0.0
+        exhausted = 0
+        equity = peak
+        for date, open_, high, low, close, prev_close in iter_rows(bars, 0, n):
+            process_day(date, open_, high, low, close, prev_close)
+            equity = pos.remaining_budget + pos.total_shares * close
+            if equity > peak:
+                peak = equity
+            elif (equity - peak) / peak < mdd:
+                mdd = (equity - peak) / peak
+            if pos.remaining_budget < strategy.unit_amount:
+                exhausted += 1
+        return {
+            'total_return_pct': round((equity / strategy.initial_investment - 1) * 100, 2),
+            'max_drawdown_pct': round(mdd * 100, 2),
+            'exhaustion_pct': round(exhausted / n * 100, 2) if n else 0.0,
+            'cycles_completed': strategy.cycle - 1,
+            'bars': n,
+        }
+
+    def candidate_strategy(self, params: Dict) -> InfiniteBuyStrategyV3:
+        """탐색/배치용 전략 (최종 요약만 보관)"""
+        return self.make_strategy(retention="summary", **params)
+
+    def run_batch(self, candidates: List[Dict], store=None, batch: Optional[str] = None) -> List[Dict]:
+        """파라미터 조합마다 전체 기간 평가 → 결과 행 (파라미터 + 지표)
+        store(ResultsStore)가 있으면 모든 행을 한 번에 추가"""
+        rows = [{**params, **self.evaluate(self.candidate_strategy(params))} for params in candidates]
+        if store is not None:
+            store.append(rows, batch=batch or time.strftime('%Y%m%d-%H%M%S'), ticker=self.ticker,
+                         start_date=self.backtest_start, end_date=self.backtest_end)
+        return rows
+
+    def get_trade_df(self) -> pd.DataFrame:
+        """매매 기록을 DataFrame으로 (Date는 여기서 한 번에 문자열로)"""
         trades = self.strategy.trades
         if not trades:
+            return pd.DataFrame()
+        df = pd.DataFrame({label: [getattr(t, name) for t in trades] for name, label in _TRADE_COLUMNS})
+        df['Date'] = format_day_ordinals(df['Date'].values)
+        return df
+
+    def get_cycle_df(self) -> pd.DataFrame:
+        """사이클별 요약 (strategy.cycles 인덱스 기반, O(사이클 수))"""
+        cycles = self.strategy.cycles
+        if not cycles:
+            return pd.DataFrame()
+        starts = np.array([c.start_date for c in cycles], dtype=np.int64)
+        ends = np.array([c.end_date for c in cycles], dtype=np.int64)
+        return pd.DataFrame({
+            'Cycle': [c.cycle for c in cycles],
+            'Start': format_day_ordinals(starts),
+            'End': format_day_ordinals(ends),
+            'Days': ends - starts,
+            'Bars': self.bar_index(ends) - self.bar_index(starts) + 1,
+            'Buys': [c.buys for c in cycles],
+            'Max T': [round(c.max_t, 2) for c in cycles],
+            'Second Half': [c.second_half for c in cycles],
+            'Buy Amount': [round(c.buy_amount, 2) for c in cycles],
+            'Profit': [round(c.profit, 2) for c in cycles],
+            'Unit Amount': [round(c.unit_amount, 2) for c in cycles],
+            'Next Unit Amount': [round(c.next_unit_amount, 2) for c in cycles],
+            'Closed': [c.closed for c in cycles],
+        })
+
+    def trade_points(self) -> Dict[str, np.ndarray]:
+        """차트용 배열 (문자열 병합 없이 일봉 인덱스로)
+        - bar / price / buy: 매매별 일봉 인덱스, 체결가, 매수 여부
+        - holdings: 일봉별 장 마감 보유 수량"""
+        trades = self.strategy.trades
+        bars = self.bar_index([t.date for t in trades])
+        ok = bars >= 0
+        bars = bars[ok]
+        shares = np.array([t.total_shares for t in trades], dtype=float)[ok]
+        holdings = np.full(len(self.data), np.nan)
+        if len(bars):
+            last = np.r_[bars[1:] != bars[:-1], True]   # 하루 여러 매매면 마지막 매매 후 수량
+            holdings[bars[last]] = shares[last]
+        return {
+            'bar': bars,
+            'price': np.array([t.price for t in trades], dtype=float)[ok],
+            'buy': np.array([t.action != 'sell' for t in trades], dtype=bool)[ok],
+            'holdings': _ffill_zero(holdings),
+        }
+
+    def cycle_summary(self) -> Dict:
+        """사이클 통계 요약 (strategy.cycle_totals 누적 집계 → 보존 수준과 무관)"""
+        totals = self.strategy.cycle_totals
+        n = totals.closed
+        if not n:
+            return {'cycles_completed': 0}
+        return {
+            'cycles_completed': n,
+            'avg_days': round(totals.days / n, 1),
+            'max_days': totals.max_days,
+            'avg_max_t': round(totals.max_t_sum / n, 2),
+            'max_t': round(totals.max_t, 2),
+            'second_half_pct': round(totals.second_half / n * 100, 1),
+            'total_profit': round(totals.profit, 2),
+            'avg_profit': round(totals.profit / n, 2),
+            'unit_amount_growth_pct': round((self.strategy.unit_amount / self.strategy.base_unit_amount - 1) * 100, 2),
+        }
+
+    def calculate_performance(self) -> Dict:
+        """성과 계산 (매매 기록 대신 마지막 매매 + 사이클 집계 사용 → 모든 보존 수준에서 동작)"""
+        last_trade = self.strategy.last_trade
+        if last_trade is None:
             return {'total_return': 0.0, 'cycles_completed': 0, 'max_drawdown': 0.0}
 
-        cycles = max(t.cycle for t in trades)
-        completed_cycles = sum(1 for t in trades if t.action == 'sell')
+        cycles = last_trade.cycle
+        completed_cycles = self.strategy.cycle_totals.closed
         total_return = 0.0
         initial_investment = self.strategy.initial_investment
-        last_trade = trades[-1]
         last_close = self.data['Close'].iloc[-1] if not self.data.empty else 0.0
         if last_trade.action == 'sell':
             current_value = last_trade.remaining_budget
@@ -105,14 +505,14 @@ class InfiniteBuySimulator:
 
         # 최대 낙폭 (MDD)
         max_drawdown = 0.0
-        df = self.get_trade_df()
-        if not df.empty and 'Total Shares' in df.columns and not df[df['Total Shares'] > 0].empty and not self.data.empty:
-            merged = self.data[['Date', 'Close']].merge(df, on='Date', how='left')
-            merged['Total Shares'] = merged['Total Shares'].ffill().fillna(0)
-            merged['Portfolio Value'] = merged['Total Shares'] * merged['Close']
-            merged['Peak'] = merged['Portfolio Value'].cummax()
-            merged['Drawdown'] = (merged['Portfolio Value'] - merged['Peak']) / merged['Peak'] * 100
-            max_drawdown = merged['Drawdown'].min() if not merged['Drawdown'].isna().all() else 0.0
+        if self.strategy.retention != "trades":
+            max_drawdown = self.drawdown.mdd
+        trades = self.strategy.trades
+        if trades and not self.data.empty:
+            shares = np.array([t.total_shares for t in trades], dtype=float)
+            if (shares > 0).any():
+                bars = self.bar_index([t.date for t in trades])
+                max_drawdown = holdings_mdd(bars, shares, self.data['Close'].values)
 
         return {
             'total_return_pct': round(total_return, 2),
@@ -127,25 +527,19 @@ class InfiniteBuySimulator:
             print("No data to plot")
             return
 
-        df = self.get_trade_df()
-        if df.empty:
+        points = self.trade_points()
+        if not len(points['bar']):
             print("No trades to plot")
             return
-
-        # 가격 데이터와 매매 기록 병합
-        price_df = self.data[['Date', 'Close']].copy()
-        price_df['Date'] = price_df['Date'].astype(str)
-        df['Date'] = df['Date'].astype(str)
-        merged = price_df.merge(df, on='Date', how='left')
+        dates = self.data['Date'].values
+        bars, buy = points['bar'], points['buy']
 
         fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10), sharex=True)
 
         # 1) 가격 차트 + 매수/매도 포인트
-        ax1.plot(merged['Date'], merged['Close'], label=f"{self.ticker} Close", alpha=0.5)
-        buy_points = merged[merged['Action'].str.contains('buy')]
-        sell_points = merged[merged['Action'] == 'sell']
-        ax1.scatter(buy_points['Date'], buy_points['Price'], color='green', marker='^', s=100, label='Buy')
-        ax1.scatter(sell_points['Date'], sell_points['Price'], color='red', marker='v', s=100, label='Sell')
+        ax1.plot(dates, self.data['Close'].values, label=f"{self.ticker} Close", alpha=0.5)
+        ax1.scatter(dates[bars[buy]], points['price'][buy], color='green', marker='^', s=100, label='Buy')
+        ax1.scatter(dates[bars[~buy]], points['price'][~buy], color='red', marker='v', s=100, label='Sell')
         ax1.set_title(f"Infinite Buy Strategy V3.0 - {self.ticker}")
         ax1.set_ylabel("Price")
         ax1.legend()
@@ -153,8 +547,7 @@ class InfiniteBuySimulator:
         plt.setp(ax1.get_xticklabels(), rotation=45)
 
         # 2) 포지션 수량
-        merged['Total Shares'] = merged['Total Shares'].ffill().fillna(0)
-        ax2.bar(merged['Date'], merged['Total Shares'], color='purple', alpha=0.3, label='Position')
+        ax2.bar(dates, points['holdings'], color='purple', alpha=0.3, label='Position')
         ax2.set_xlabel("Date")
         ax2.set_ylabel("Shares")
         ax2.legend()
@@ -12,16 +12,25 @@
 - 수익 시: 수익금 40분할 → 1회매수금에 반복리 반영
 - 손실 시: 1회매수금 불변 (과거 수익Max 기준)
 """
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, asdict
 from typing import List, Optional, Tuple
 import math
 
+from .accounting import FixedPosition, RoundingPolicy
+from .rules import V3, RuleSet
 
-# 종목별 별% 설정
-STAR_CONFIG = {
-    "TQQQ": {"base": 15, "coeff": 1.5},   # 별% = 15 - 1.5*T
-    "SOXL": {"base": 20, "coeff": 2.0},   # 별% = 20 - 2*T
-}
+# 일자: int 일수 (1970-01-01 기준) — 입력에서 한 번 변환 (data.store.day_ordinal), 문자열은 출력할 때만
+DateKey = int
+
+
+# 종목별 별% 설정 (V3 규칙 세트 기준, 다른 변형은 src/rules.py)
+STAR_CONFIG = {t: {"base": b, "coeff": c} for t, (b, c) in V3.star.items() if t != "default"}
+
+# 매매 기록 보존 수준
+# - trades: 모든 TradeRecord + 사이클 인덱스 (기본)
+# - cycles: 사이클 인덱스만 (TradeRecord 미보관)
+# - summary: 진행 중 사이클 + 종료 사이클 누적 집계만 (대량 탐색용)
+RETENTION_LEVELS = ("trades", "cycles", "summary")
 
 
 @dataclass
@@ -50,7 +59,7 @@ class Position:
 @dataclass
 class TradeRecord:
     """매매 기록"""
-    date: str
+    date: DateKey
     cycle: int
     round_num: int
     action: str             # "buy_star", "buy_zero", "sell", "quarter_sell"
@@ -67,6 +76,48 @@ class TradeRecord:
     unit_amount: float = 0.0  # 당시 1회매수금
 
 
+@dataclass
+class CycleStats:
+    """사이클 인덱스: 매매 기록 오프셋 + 누적 집계"""
+    cycle: int
+    start: int                    # trades 시작 인덱스
+    end: int                      # trades 끝 인덱스 (미포함)
+    start_date: DateKey = 0
+    end_date: DateKey = 0
+    buys: int = 0
+    buy_amount: float = 0.0       # 사이클 매수 총액
+    max_t: float = 0.0
+    second_half: bool = False     # 후반전(T≥10) 진입 여부
+    unit_amount: float = 0.0      # 사이클 시작 시 1회매수금
+    next_unit_amount: float = 0.0  # 매도 후 (반복리 반영) 1회매수금
+    profit: float = 0.0           # 실현 손익
+    closed: bool = False
+
+
+@dataclass
+class CycleTotals:
+    """종료된 사이클 누적 집계 (보존 수준과 무관하게 유지)"""
+    closed: int = 0
+    days: int = 0
+    max_days: int = 0
+    max_t_sum: float = 0.0
+    max_t: float = 0.0
+    second_half: int = 0
+    profit: float = 0.0
+
+    def add(self, stats: CycleStats):
+        days = int(stats.end_date - stats.start_date)
+        self.closed += 1
+        self.days += days
+        if days > self.max_days:
+            self.max_days = days
+        self.max_t_sum += stats.max_t
+        if stats.max_t > self.max_t:
+            self.max_t = stats.max_t
+        self.second_half += stats.second_half
+        self.profit += stats.profit
+
+
 class InfiniteBuyStrategyV3:
     """라오어 무한매수법 V3.0"""
 
@@ -74,17 +125,38 @@ class InfiniteBuyStrategyV3:
         self,
         total_investment: float,
         divisions: int = 40,
-        target_profit_pct: float = 5.0,
+        target_profit_pct: Optional[float] = None,
         ticker: str = "TQQQ",
+        rounding: Optional[RoundingPolicy] = None,
+        star_base: Optional[float] = None,
+        star_coeff: Optional[float] = None,
+        retention: str = "trades",
+        rules: Optional[RuleSet] = None,
     ):
+        """rounding 지정 시 고정소수점 회계 (현금/수량 정수 단위, 브로커와 같은 반올림)
+        star_base/star_coeff 지정 시 종목 기본 별% 설정 대신 사용 (파라미터 탐색용)
+        retention: 매매 기록 보존 수준 (RETENTION_LEVELS)
+        rules: 별% 공식 / 매수 분할 / 매도 목표 / 반복리 규칙 (기본 V3), 생성 시 상수로 컴파일
+        target_profit_pct 미지정 시 규칙의 목표, 규칙에도 없으면 5%
+        """
         if divisions not in (20, 30, 40):
             raise ValueError("divisions는 20, 30, 40 중 선택")
+        if retention not in RETENTION_LEVELS:
+            raise ValueError(f"retention은 {', '.join(RETENTION_LEVELS)} 중 선택")
 
         self.initial_investment = total_investment
         self.total_investment = total_investment
         self.divisions = divisions
-        self.target_profit_pct = target_profit_pct
         self.ticker = ticker.upper()
+        self.rules = (rules or V3).compile(self.ticker)
+        # 일봉 루프에서 속성 조회를 줄이도록 컴파일된 상수를 인스턴스에 바인딩
+        self._first_legs = self.rules.first_legs
+        self._second_legs = self.rules.second_legs
+        self._v3_legs = self.rules.v3_legs
+        self._t_scale = self.rules.t_scale
+        if target_profit_pct is None:
+            target_profit_pct = self.rules.target_profit_pct if self.rules.target_profit_pct is not None else 5.0
+        self.target_profit_pct = target_profit_pct
 
         # 1회 매수금 = 원금 / 분할수
         self.base_unit_amount = total_investment / divisions
@@ -96,23 +168,42 @@ class InfiniteBuyStrategyV3:
         self.reserve_pool = 0.0            # 나머지 절반 수익 (손절 대비)
 
         # 별% 설정
-        star_cfg = STAR_CONFIG.get(self.ticker, STAR_CONFIG["TQQQ"])
-        self.star_base = star_cfg["base"]
-        self.star_coeff = star_cfg["coeff"]
+        self.star_base = self.rules.star_base if star_base is None else star_base
+        self.star_coeff = self.rules.star_coeff if star_coeff is None else star_coeff
 
-        self.position = Position()
-        self.position.remaining_budget = total_investment
+        self.rounding = rounding
+        if rounding is None:
+            self.position = Position()
+            self.position.remaining_budget = total_investment
+        else:
+            # 정수 단위 상태 (float 속성은 여기서 파생)
+            self.position = FixedPosition(policy=rounding)
+            self.position.budget_units = rounding.cash_units(total_investment)
+            self.base_unit_units = self.position.budget_units // divisions
+            self.unit_units = self.base_unit_units
+            self.cum_profit_units = 0
+            self.max_cum_profit_units = 0
+            self.reserve_units = 0
+            self.base_unit_amount = self.unit_amount = self.base_unit_units / rounding.cash_scale
         self.cycle = 1
+        self.retention = retention
         self.trades: List[TradeRecord] = []
+        self.cycles: List[CycleStats] = []
+        self.cycle_totals = CycleTotals()
+        self.trade_count = 0                          # 보존 수준과 무관한 매매 수
+        self.last_trade: Optional[TradeRecord] = None
 
     # ─── T 값 / 별% ───────────────────────────────────
 
     def calc_t(self) -> float:
-        """T = 매수누적액 / 1회매수액 (소수점 둘째자리 올림)"""
+        """T = 매수누적액 / 1회매수액 (규칙의 t_decimals 자리 올림, 기본 둘째자리)"""
         if self.unit_amount <= 0:
             return 0.0
+        scale = self._t_scale
+        if self.rounding is not None:
+            return -(-self.position.cum_buy_units * scale // self.unit_units) / scale
         raw = self.position.cumulative_buy_amount / self.unit_amount
-        return math.ceil(raw * 100) / 100
+        return math.ceil(raw * scale) / scale
 
     def calc_star_pct(self) -> float:
         """별% = base - coeff * T"""
@@ -129,60 +220,77 @@ class InfiniteBuyStrategyV3:
         """LOC 가격 = 전일종가 * (1 - pct/100)
         pct=0 이면 0%LOC (전일 종가 그대로)
         pct=5 이면 5%LOC (전일 종가 -5%)
+        고정소수점 모드에서는 호가 단위로 내림
         """
-        return prev_close * (1 - pct / 100)
+        price = prev_close * (1 - pct / 100)
+        if self.rounding is not None:
+            return self.rounding.buy_price_units(price) / self.rounding.price_scale
+        return price
 
     # ─── 매수 실행 ─────────────────────────────────────
 
-    def execute_daily_buy(self, date: str, prev_close: float, open_price: float,
+    def execute_daily_buy(self, date: DateKey, prev_close: float, open_price: float,
                           high: float, low: float, close: float) -> List[TradeRecord]:
-        """하루 매수 로직 (V3.0)"""
+        """하루 매수 로직 (규칙 세트의 매수 구간 순서대로)"""
         records = []
         if self.position.round_num >= self.divisions:
             return records
 
-        star_pct = self.calc_star_pct()
         t_val = self.calc_t()
+        star_pct = self.star_base - self.star_coeff * t_val
         half_label = "전반전" if star_pct > 0 else "후반전"
+        if self._v3_legs:
+            return self._execute_v3_buy(date, prev_close, low, t_val, star_pct, half_label)
+
+        # 전반전 / 후반전 매수 구간 (규칙에서 컴파일된 (a, b, 비율, action) 순서대로)
+        legs = self._first_legs if star_pct > 0 else self._second_legs
+        for a, b, fraction, action in legs:
+            loc = self.loc_price(prev_close, a * star_pct + b)
+            if low <= loc:  # 장중 저가가 LOC 가격 이하면 체결
+                actual_amount = min(self.unit_amount * fraction, self.position.remaining_budget)
+                if actual_amount > 0:
+                    rec = self._do_buy(date, loc, actual_amount, action, t_val, star_pct, half_label)
+                    if rec:
+                        records.append(rec)
 
-        if star_pct > 0:
-            # ── 전반전: 절반 별%LOC + 절반 0%LOC ──
-            half_amount = self.unit_amount / 2
+        return records
 
-            # 1) 별%LOC 매수 시도
+    def _execute_v3_buy(self, date: DateKey, prev_close: float, low: float,
+                        t_val: float, star_pct: float, half_label: str) -> List[TradeRecord]:
+        """기본 V3 구간을 펼친 경로 (execute_daily_buy의 구간 루프와 같은 결과, 일봉 루프 속도용)
+        전반전: 절반 별%LOC + 절반 0%LOC / 후반전: 전액 |별%|LOC"""
+        records = []
+        if star_pct > 0:
+            half_amount = self.unit_amount * 0.5
             star_loc = self.loc_price(prev_close, star_pct)
             if low <= star_loc:  # 장중 저가가 LOC 가격 이하면 체결
-                buy_price = star_loc
-                actual_amount = min(half_amount, self.position.remaining_budget)
-                if actual_amount > 0:
-                    rec = self._do_buy(date, buy_price, actual_amount, "buy_star", t_val, star_pct, half_label)
-                    records.append(rec)
-
-            # 2) 0%LOC 매수 시도 (전일 종가)
-            zero_loc = self.loc_price(prev_close, 0)
-            if low <= zero_loc:  # 거의 항상 체결
-                buy_price = zero_loc
-                actual_amount = min(half_amount, self.position.remaining_budget)
-                if actual_amount > 0:
-                    rec = self._do_buy(date, buy_price, actual_amount, "buy_zero", t_val, star_pct, half_label)
-                    records.append(rec)
-
+                amount = min(half_amount, self.position.remaining_budget)
+                if amount > 0:
+                    rec = self._do_buy(date, star_loc, amount, "buy_star", t_val, star_pct, half_label)
+                    if rec:
+                        records.append(rec)
+            zero_loc = self.loc_price(prev_close, 0.0)
+            if low <= zero_loc:
+                amount = min(half_amount, self.position.remaining_budget)
+                if amount > 0:
+                    rec = self._do_buy(date, zero_loc, amount, "buy_zero", t_val, star_pct, half_label)
+                    if rec:
+                        records.append(rec)
         else:
-            # ── 후반전: 전액 |별%|LOC ──
-            abs_star = abs(star_pct)
-            star_loc = self.loc_price(prev_close, abs_star)
+            star_loc = self.loc_price(prev_close, -star_pct)
             if low <= star_loc:
-                buy_price = star_loc
-                actual_amount = min(self.unit_amount, self.position.remaining_budget)
-                if actual_amount > 0:
-                    rec = self._do_buy(date, buy_price, actual_amount, "buy_star", t_val, star_pct, half_label)
-                    records.append(rec)
-
+                amount = min(self.unit_amount, self.position.remaining_budget)
+                if amount > 0:
+                    rec = self._do_buy(date, star_loc, amount, "buy_star", t_val, star_pct, half_label)
+                    if rec:
+                        records.append(rec)
         return records
 
-    def _do_buy(self, date: str, price: float, amount: float,
-                action: str, t_val: float, star_pct: float, half: str) -> TradeRecord:
+    def _do_buy(self, date: DateKey, price: float, amount: float,
+                action: str, t_val: float, star_pct: float, half: str) -> Optional[TradeRecord]:
         """실제 매수 처리"""
+        if self.rounding is not None:
+            return self._do_buy_fixed(date, price, amount, action, half)
         shares = amount / price
 
         self.position.round_num += 1
@@ -212,15 +320,117 @@ class InfiniteBuyStrategyV3:
             half=half,
             unit_amount=round(self.unit_amount, 2),
         )
-        self.trades.append(record)
+        self._record(record)
+        self._index_buy(date, amount, new_t, new_star)
+        return record
+
+    def _do_buy_fixed(self, date: DateKey, price: float, amount: float,
+                      action: str, half: str) -> Optional[TradeRecord]:
+        """고정소수점 매수: 수량 내림, 체결금액은 정책대로 → 기록값 == 내부 상태
+        구간 금액으로 1주(수량 단위)도 못 사면 잔고가 되는 한 1주 → 주가가 구간 금액보다 비싸도 사이클이 멈추지 않음"""
+        policy = self.rounding
+        pos = self.position
+        price_units = round(price * policy.price_scale)
+        cash_units = min(policy.cash_units(amount), pos.budget_units)
+        share_units, cost_units = policy.shares_for(cash_units, price_units)
+        if share_units == 0:
+            share_units, cost_units = 1, policy.fill_cost(1, price_units)
+            if price_units <= 0 or cost_units > pos.budget_units:
+                return None  # 남은 예산으로 1주도 못 사는 경우 (소진)
+
+        pos.round_num += 1
+        pos.shares_units += share_units
+        pos.cost_units += cost_units
+        pos.budget_units -= cost_units
+        pos.cum_buy_units += cost_units
+
+        new_t = self.calc_t()
+        new_star = self.calc_star_pct()
+
+        record = TradeRecord(
+            date=date,
+            cycle=self.cycle,
+            round_num=pos.round_num,
+            action=action,
+            price=price_units / policy.price_scale,
+            shares=share_units / policy.share_scale,
+            amount=cost_units / policy.cash_scale,
+            total_shares=pos.total_shares,
+            avg_price=pos.avg_price,
+            target_sell_price=self._target_sell_price(),
+            remaining_budget=pos.remaining_budget,
+            t_value=new_t,
+            star_pct=new_star,
+            half=half,
+            unit_amount=self.unit_amount,
+        )
+        self._record(record)
+        self._index_buy(date, record.amount, new_t, new_star)
         return record
 
+    # ─── 사이클 인덱스 ─────────────────────────────────
+
+    def _record(self, record: TradeRecord):
+        self.trade_count += 1
+        self.last_trade = record
+        if self.retention == "trades":
+            self.trades.append(record)
+
+    def _cycle_stats(self, date: DateKey) -> CycleStats:
+        """현재 사이클 집계 (첫 매매 시 생성)"""
+        if not self.cycles or self.cycles[-1].cycle != self.cycle:
+            self.cycles.append(CycleStats(
+                cycle=self.cycle,
+                start=self.trade_count - 1,
+                end=self.trade_count,
+                start_date=date,
+                unit_amount=self.unit_amount,
+            ))
+        return self.cycles[-1]
+
+    def _index_buy(self, date: DateKey, amount: float, new_t: float, new_star: float):
+        stats = self._cycle_stats(date)
+        stats.end = self.trade_count
+        stats.end_date = date
+        stats.buys += 1
+        stats.buy_amount += amount
+        if new_t > stats.max_t:
+            stats.max_t = new_t
+        if new_star <= 0:
+            stats.second_half = True
+
+    def _index_sell(self, date: DateKey, profit: float) -> CycleStats:
+        stats = self._cycle_stats(date)
+        stats.end = self.trade_count
+        stats.end_date = date
+        stats.profit = profit
+        stats.closed = True
+        self.cycle_totals.add(stats)
+        if self.retention == "summary":
+            self.cycles.pop()
+        return stats
+
+    def cycle_trades(self, cycle: int) -> List[TradeRecord]:
+        """해당 사이클의 매매 기록 (trades 전체 탐색 없이 슬라이스)
+        진행 중 사이클은 첫 매매 전이면 빈 목록, 없는 사이클 번호는 ValueError"""
+        if self.retention != "trades":
+            raise ValueError("매매 기록은 retention='trades'에서만 보관")
+        if cycle == self.cycle and len(self.cycles) < cycle:
+            return []
+        if not 1 <= cycle <= len(self.cycles):
+            raise ValueError(f"사이클 번호는 1 ~ {self.cycle}: {cycle}")
+        stats = self.cycles[cycle - 1]
+        return self.trades[stats.start:stats.end]
+
     # ─── 매도 실행 ─────────────────────────────────────
 
     def _target_sell_price(self) -> float:
         if self.position.avg_price == 0:
             return 0.0
-        return self.position.avg_price * (1 + self.target_profit_pct / 100)
+        target = self.position.avg_price * (1 + self.target_profit_pct / 100)
+        if self.rounding is not None:
+            return self.rounding.sell_price_units(target) / self.rounding.price_scale
+        return target
 
     def should_sell(self, high: float) -> bool:
         """매도 조건: 고가가 목표매도가 이상"""
@@ -228,10 +438,12 @@ class InfiniteBuyStrategyV3:
             return False
         return high >= self._target_sell_price()
 
-    def execute_sell(self, date: str) -> Optional[TradeRecord]:
+    def execute_sell(self, date: DateKey) -> Optional[TradeRecord]:
         """전량 매도 (목표가에 체결)"""
         if self.position.total_shares == 0:
             return None
+        if self.rounding is not None:
+            return self._execute_sell_fixed(date)
 
         sell_price = self._target_sell_price()
         sell_amount = self.position.total_shares * sell_price
@@ -261,21 +473,25 @@ class InfiniteBuyStrategyV3:
             half="매도",
             unit_amount=round(self.unit_amount, 2),
         )
-        self.trades.append(record)
-
-        # ── V3.0 수익 반복리 처리 ──
-        if profit > 0:
-            half_profit = profit / 2
-            self.cumulative_profit += half_profit
-            self.reserve_pool += half_profit
+        self._record(record)
+        stats = self._index_sell(date, profit)
+
+        # ── 수익 반복리 처리 (V3: 절반 반복리 + 절반 적립, /40) ──
+        rules = self.rules
+        if profit > 0 or not rules.keep_max_on_loss:
+            reinvest = profit * rules.profit_share
+            self.cumulative_profit += reinvest
+            if profit > 0:
+                self.reserve_pool += profit - reinvest
             # 과거 최대 수익 갱신
             if self.cumulative_profit > self.max_cumulative_profit:
                 self.max_cumulative_profit = self.cumulative_profit
             # 1회매수금 = 기본 + 누적수익/40
-            self.unit_amount = self.base_unit_amount + self.cumulative_profit / 40
+            self.unit_amount = self.base_unit_amount + self.cumulative_profit / rules.reinvest_divisor
         else:
             # 손실 시 1회매수금 불변 (과거 Max 기준)
-            self.unit_amount = self.base_unit_amount + self.max_cumulative_profit / 40
+            self.unit_amount = self.base_unit_amount + self.max_cumulative_profit / rules.reinvest_divisor
+        stats.next_unit_amount = self.unit_amount
 
         # 새 사이클
         self.cycle += 1
@@ -284,9 +500,62 @@ class InfiniteBuyStrategyV3:
 
         return record
 
+    def _execute_sell_fixed(self, date: DateKey) -> TradeRecord:
+        """고정소수점 전량 매도: 반복리 배분도 정수 단위 (홀수 단위는 적립금으로)"""
+        policy = self.rounding
+        pos = self.position
+        price_units = policy.sell_price_units(self._target_sell_price())
+        proceeds = policy.fill_cost(pos.shares_units, price_units)
+        profit = proceeds - pos.cost_units
+        new_budget = proceeds + pos.budget_units
+
+        record = TradeRecord(
+            date=date,
+            cycle=self.cycle,
+            round_num=pos.round_num,
+            action="sell",
+            price=price_units / policy.price_scale,
+            shares=pos.total_shares,
+            amount=proceeds / policy.cash_scale,
+            total_shares=0.0,
+            avg_price=0.0,
+            target_sell_price=0.0,
+            remaining_budget=new_budget / policy.cash_scale,
+            t_value=self.calc_t(),
+            star_pct=self.calc_star_pct(),
+            half="매도",
+            unit_amount=self.unit_amount,
+        )
+        self._record(record)
+        stats = self._index_sell(date, profit / policy.cash_scale)
+
+        rules = self.rules
+        if profit > 0 or not rules.keep_max_on_loss:
+            reinvest = math.floor(profit * rules.profit_share)
+            self.cum_profit_units += reinvest
+            if profit > 0:
+                self.reserve_units += profit - reinvest
+            if self.cum_profit_units > self.max_cum_profit_units:
+                self.max_cum_profit_units = self.cum_profit_units
+            self.unit_units = self.base_unit_units + self.cum_profit_units // rules.reinvest_divisor
+        else:
+            self.unit_units = self.base_unit_units + self.max_cum_profit_units // rules.reinvest_divisor
+        scale = policy.cash_scale
+        self.cumulative_profit = self.cum_profit_units / scale
+        self.max_cumulative_profit = self.max_cum_profit_units / scale
+        self.reserve_pool = self.reserve_units / scale
+        self.unit_amount = self.unit_units / scale
+        stats.next_unit_amount = self.unit_amount
+
+        self.cycle += 1
+        self.total_investment = new_budget / scale
+        pos.reset(new_budget)
+
+        return record
+
     # ─── 하루 전체 처리 ────────────────────────────────
 
-    def process_day(self, date: str, open_price: float, high: float,
+    def process_day(self, date: DateKey, open_price: float, high: float,
                     low: float, close: float, prev_close: float) -> List[TradeRecord]:
         """하루 처리: 매도 체크 → 매수"""
         records = []
@@ -304,6 +573,50 @@ class InfiniteBuyStrategyV3:
 
         return records
 
+    # ─── 스냅샷 (이어서 백테스트) ──────────────────────
+
+    _STATE_FIELDS = ('total_investment', 'unit_amount', 'cumulative_profit',
+                     'max_cumulative_profit', 'reserve_pool', 'cycle')
+    _FIXED_STATE_FIELDS = ('unit_units', 'cum_profit_units', 'max_cum_profit_units', 'reserve_units')
+
+    def snapshot(self) -> dict:
+        """재개용 상태 (포지션, 사이클, 1회매수금, 수익 풀, 매매 기록 오프셋)
+        매매 기록 자체는 포함하지 않음 → trade_offset 개수만큼 별도 로그에서 복원
+        """
+        fields = self._STATE_FIELDS + (self._FIXED_STATE_FIELDS if self.rounding is not None else ())
+        state = {f: getattr(self, f) for f in fields}
+        state['position'] = {k: v for k, v in vars(self.position).items() if k != 'policy'}
+        state['cycles'] = [asdict(c) for c in self.cycles]
+        state['cycle_totals'] = asdict(self.cycle_totals)
+        state['trade_count'] = self.trade_count
+        state['last_trade'] = asdict(self.last_trade) if self.last_trade is not None else None
+        state['trade_offset'] = len(self.trades)
+        return state
+
+    def restore(self, state: dict, trades: List[TradeRecord]):
+        """snapshot() 상태로 되돌림 (같은 파라미터로 생성한 전략에 적용)"""
+        if len(trades) != state['trade_offset']:
+            raise ValueError("매매 기록 수가 스냅샷 오프셋과 다름")
+        fields = self._STATE_FIELDS + (self._FIXED_STATE_FIELDS if self.rounding is not None else ())
+        for f in fields:
+            setattr(self, f, state[f])
+        for k, v in state['position'].items():
+            setattr(self.position, k, v)
+        self.cycles = [CycleStats(**c) for c in state['cycles']]
+        self.trades = list(trades)
+        self.trade_count = state.get('trade_count', len(trades))
+        if state.get('last_trade') is not None:
+            self.last_trade = TradeRecord(**state['last_trade'])
+        else:
+            self.last_trade = trades[-1] if trades else None
+        if 'cycle_totals' in state:
+            self.cycle_totals = CycleTotals(**state['cycle_totals'])
+        else:  # 집계 도입 전 스냅샷 → 사이클 인덱스에서 다시 계산
+            self.cycle_totals = CycleTotals()
+            for c in self.cycles:
+                if c.closed:
+                    self.cycle_totals.add(c)
+
     # ─── 상태 요약 ─────────────────────────────────────
 
     def summary(self) -> dict:
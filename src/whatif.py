@@ -0,0 +1,241 @@
+"""
+내일 장 결과 미리보기 (What-if 그리드)
+
+현재 전략 상태를 불변 스냅샷(SessionState)으로 떠 두고, 종가 x 저가 격자 전체에 대해
+process_day 하루치 결과(LOC 체결 여부, 새 T/별%, 평단, 목표가, 사이클 종료)를 numpy로 한 번에 계산.
+전략 객체를 복사하거나 시나리오마다 process_day를 호출하지 않는다.
+"""
+import math
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+
+from .accounting import _EPS, RoundingPolicy
+from .rules import CompiledRules
+from .strategy import InfiniteBuyStrategyV3
+
+
+@dataclass(frozen=True)
+class SessionState:
+    """전략의 하루 계산에 필요한 값만 담은 불변 스냅샷 (O(1) 생성, 원본 전략과 공유 없음)"""
+    divisions: int
+    target_profit_pct: float
+    star_base: float
+    star_coeff: float
+    round_num: int
+    unit_amount: float
+    total_shares: float
+    total_cost: float
+    remaining_budget: float
+    cumulative_buy_amount: float
+    t_value: float
+    base_unit_amount: float
+    cumulative_profit: float
+    max_cumulative_profit: float
+    rules: CompiledRules
+    rounding: Optional[RoundingPolicy] = None
+    # 고정소수점 모드 정수 상태
+    base_unit_units: int = 0
+    cum_profit_units: int = 0
+    max_cum_profit_units: int = 0
+    unit_units: int = 0
+    shares_units: int = 0
+    cost_units: int = 0
+    budget_units: int = 0
+    cum_buy_units: int = 0
+
+    @classmethod
+    def from_strategy(cls, strategy: InfiniteBuyStrategyV3) -> 'SessionState':
+        pos = strategy.position
+        fixed = {}
+        if strategy.rounding is not None:
+            fixed = dict(base_unit_units=strategy.base_unit_units, cum_profit_units=strategy.cum_profit_units,
+                         max_cum_profit_units=strategy.max_cum_profit_units,
+                         unit_units=strategy.unit_units, shares_units=pos.shares_units,
+                         cost_units=pos.cost_units, budget_units=pos.budget_units,
+                         cum_buy_units=pos.cum_buy_units)
+        return cls(
+            divisions=strategy.divisions,
+            target_profit_pct=strategy.target_profit_pct,
+            star_base=strategy.star_base,
+            star_coeff=strategy.star_coeff,
+            round_num=pos.round_num,
+            unit_amount=strategy.unit_amount,
+            total_shares=pos.total_shares,
+            total_cost=pos.total_cost,
+            remaining_budget=pos.remaining_budget,
+            cumulative_buy_amount=pos.cumulative_buy_amount,
+            t_value=strategy.calc_t(),
+            base_unit_amount=strategy.base_unit_amount,
+            cumulative_profit=strategy.cumulative_profit,
+            max_cumulative_profit=strategy.max_cumulative_profit,
+            rules=strategy.rules,
+            rounding=strategy.rounding,
+            **fixed,
+        )
+
+    @property
+    def star_pct(self) -> float:
+        return self.star_base - self.star_coeff * self.t_value
+
+    def target_sell_price(self) -> float:
+        if self.total_shares == 0:
+            return 0.0
+        target = self.total_cost / self.total_shares * (1 + self.target_profit_pct / 100)
+        if self.rounding is not None:
+            return self.rounding.sell_price_units(target) / self.rounding.price_scale
+        return target
+
+    def sell_outcome(self):
+        """목표가 전량 매도 시 (새 사이클 투자금, 새 1회매수금) — 반복리 규칙은 execute_sell과 동일"""
+        policy = self.rounding
+        rules = self.rules
+        if policy is None:
+            proceeds = self.total_shares * self.target_sell_price()
+            profit = proceeds - self.total_cost
+            if profit > 0 or not rules.keep_max_on_loss:
+                unit = self.base_unit_amount + (self.cumulative_profit + profit * rules.profit_share) / rules.reinvest_divisor
+            else:
+                unit = self.base_unit_amount + self.max_cumulative_profit / rules.reinvest_divisor
+            return proceeds + self.remaining_budget, unit
+        proceeds = policy.fill_cost(self.shares_units, policy.sell_price_units(self.target_sell_price()))
+        profit = proceeds - self.cost_units
+        if profit > 0 or not rules.keep_max_on_loss:
+            cum = self.cum_profit_units + math.floor(profit * rules.profit_share)
+            unit = self.base_unit_units + cum // rules.reinvest_divisor
+        else:
+            unit = self.base_unit_units + self.max_cum_profit_units // rules.reinvest_divisor
+        return (proceeds + self.budget_units) / policy.cash_scale, unit / policy.cash_scale
+
+
+def next_session_grid(state: SessionState, prev_close: float, closes, lows,
+                      highs=None) -> Dict[str, np.ndarray]:
+    """종가 x 저가 격자에서 다음 날 결과 계산
+    - closes: 종가 후보 (n), lows: 저가 후보 (m) → 결과 배열 shape = (n, m)
+    - highs: 고가 (기본 = 종가, 즉 장중 최고가가 종가인 가장 보수적인 경우)
+    - valid: 저가 ≤ 종가 인 칸만 True
+    체결 규칙은 InfiniteBuyStrategyV3.process_day와 동일 (매도일은 매수 없음, LOC는 저가 ≤ 지정가면 체결)
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    lows = np.asarray(lows, dtype=np.float64)
+    close = closes[:, None] * np.ones((1, len(lows)))
+    low = np.ones((len(closes), 1)) * lows[None, :]
+    high = close if highs is None else np.broadcast_to(np.asarray(highs, dtype=np.float64)[:, None], close.shape)
+
+    if state.rounding is not None:
+        out = _grid_fixed(state, prev_close, low, high)
+    else:
+        out = _grid_float(state, prev_close, low, high)
+    out['valid'] = low <= close
+    return out
+
+
+def _loc_plan(state: SessionState, prev_close: float):
+    """오늘 낼 LOC 주문 (action, 지정가, 주문 금액) — 규칙 세트의 전반전/후반전 매수 구간"""
+    star = state.star_pct
+    legs = state.rules.first_legs if star > 0 else state.rules.second_legs
+    return [(action, prev_close * (1 - (a * star + b) / 100), state.unit_amount * fraction)
+            for a, b, fraction, action in legs]
+
+
+def _grid_float(state: SessionState, prev_close: float, low: np.ndarray, high: np.ndarray) -> Dict[str, np.ndarray]:
+    shape = low.shape
+    target = state.target_sell_price()
+    sell = (high >= target) if state.total_shares > 0 else np.zeros(shape, dtype=bool)
+    can_buy = ~sell & (state.round_num < state.divisions)
+
+    shares = np.full(shape, state.total_shares)
+    cost = np.full(shape, state.total_cost)
+    budget = np.full(shape, state.remaining_budget)
+    cum = np.full(shape, state.cumulative_buy_amount)
+    fills = {}
+    for action, price, amount in _loc_plan(state, prev_close):
+        filled = can_buy & (low <= price)
+        amt = np.where(filled, np.minimum(amount, budget), 0.0)
+        filled &= amt > 0
+        amt = np.where(filled, amt, 0.0)
+        shares = np.where(filled, shares + amt / price, shares)
+        cost = np.where(filled, cost + amt, cost)
+        budget = np.where(filled, budget - amt, budget)
+        cum = np.where(filled, cum + amt, cum)
+        fills[action] = fills[action] | filled if action in fills else filled
+
+    scale = state.rules.t_scale
+    t = np.ceil(cum / state.unit_amount * scale) / scale if state.unit_amount > 0 else np.zeros(shape)
+    return _finish(state, sell, fills, shares, cost, budget, t)
+
+
+def _grid_fixed(state: SessionState, prev_close: float, low: np.ndarray, high: np.ndarray) -> Dict[str, np.ndarray]:
+    policy = state.rounding
+    shape = low.shape
+    target = state.target_sell_price()
+    sell = (high >= target) if state.shares_units > 0 else np.zeros(shape, dtype=bool)
+    can_buy = ~sell & (state.round_num < state.divisions)
+
+    den = policy.share_scale * policy.price_scale
+    shares = np.full(shape, state.shares_units, dtype=np.int64)
+    cost = np.full(shape, state.cost_units, dtype=np.int64)
+    budget = np.full(shape, state.budget_units, dtype=np.int64)
+    cum = np.full(shape, state.cum_buy_units, dtype=np.int64)
+    fills = {}
+    for action, price, amount in _loc_plan(state, prev_close):
+        price_units = policy.buy_price_units(price)
+        price = price_units / policy.price_scale
+        # execute_daily_buy: min(금액, 잔여 예산) → _do_buy_fixed: 센트 내림 후 다시 예산으로 제한
+        amount = np.minimum(amount, budget / policy.cash_scale)
+        cash = np.minimum(np.floor(amount * policy.cash_scale + _EPS).astype(np.int64), budget)
+        # RoundingPolicy.shares_for 벡터화
+        qty = np.where(cash > 0, cash * den // max(price_units * policy.cash_scale, 1), 0)
+        spent = (qty * price_units * policy.cash_scale + den // 2) // den
+        while True:
+            over = (qty > 0) & (spent > cash)
+            if not over.any():
+                break
+            qty = np.where(over, qty - 1, qty)
+            spent = (qty * price_units * policy.cash_scale + den // 2) // den
+        # _do_buy_fixed: 구간 금액으로 1주도 못 사면 잔고가 되는 한 1주
+        one = policy.fill_cost(1, price_units)
+        single = (qty == 0) & (price_units > 0) & (one <= budget)
+        qty = np.where(single, 1, qty)
+        spent = np.where(single, one, spent)
+        filled = can_buy & (low <= price) & (amount > 0) & (qty > 0)
+        shares = np.where(filled, shares + qty, shares)
+        cost = np.where(filled, cost + spent, cost)
+        budget = np.where(filled, budget - spent, budget)
+        cum = np.where(filled, cum + spent, cum)
+        fills[action] = fills[action] | filled if action in fills else filled
+
+    scale = state.rules.t_scale
+    t = -(-cum * scale // state.unit_units) / scale if state.unit_units > 0 else np.zeros(shape)
+    return _finish(state, sell, fills, shares / policy.share_scale,
+                   cost / policy.cash_scale, budget / policy.cash_scale, t)
+
+
+def _finish(state, sell, fills, shares, cost, budget, t) -> Dict[str, np.ndarray]:
+    """매수 후 평단/목표가/별% 정리, 매도 칸은 사이클 종료 상태로"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg = np.where(shares > 0, cost / shares, 0.0)
+    new_target = avg * (1 + state.target_profit_pct / 100)
+    if state.rounding is not None:
+        scale = state.rounding.price_scale
+        new_target = np.ceil(new_target * scale - _EPS) / scale
+    new_target = np.where(shares > 0, new_target, 0.0)
+    star = state.star_base - state.star_coeff * t
+
+    new_budget, new_unit = state.sell_outcome() if sell.any() else (state.remaining_budget, state.unit_amount)
+    return {
+        'sell': sell,
+        'star_fill': fills.get('buy_star', np.zeros(sell.shape, dtype=bool)),
+        'zero_fill': fills.get('buy_zero', np.zeros(sell.shape, dtype=bool)),
+        'pct_fill': fills.get('buy_pct', np.zeros(sell.shape, dtype=bool)),
+        'buy_amount': np.where(sell, 0.0, state.remaining_budget - budget),
+        't_value': np.where(sell, 0.0, t),
+        'star_pct': np.where(sell, state.star_base, star),
+        'avg_price': np.where(sell, 0.0, avg),
+        'target_sell_price': np.where(sell, 0.0, new_target),
+        'total_shares': np.where(sell, 0.0, shares),
+        'remaining_budget': np.where(sell, new_budget, budget),
+        'unit_amount': np.where(sell, new_unit, state.unit_amount),
+        'cycle_end': sell,
+    }
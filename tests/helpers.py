@@ -0,0 +1,35 @@
+"""
+테스트 공용 설정 / 시뮬레이터 생성 (fake 데이터 소스)
+"""
+import copy
+import os
+import tempfile
+
+import yaml
+
+from src.simulator import InfiniteBuySimulator
+
+CONFIG = {
+    'strategy': {'divisions': 40, 'total_investment': 10000000, 'target_profit_pct': 5.0},
+    'ticker': 'TQQQ',
+    'backtest': {'start_date': '2020-01-01', 'end_date': '2023-01-01'},
+    'data': {'source': 'fake'},
+}
+
+
+def make_config(**backtest):
+    """CONFIG 복사본 (backtest 항목 덮어쓰기)"""
+    config = copy.deepcopy(CONFIG)
+    config['backtest'].update(backtest)
+    return config
+
+
+def make_sim(config=CONFIG):
+    """설정을 임시 yaml로 써서 시뮬레이터 생성 (config 파일 로딩 경로 그대로)"""
+    fd, path = tempfile.mkstemp(suffix='.yaml')
+    with os.fdopen(fd, 'w') as f:
+        yaml.dump(config, f)
+    try:
+        return InfiniteBuySimulator(path)
+    finally:
+        os.remove(path)
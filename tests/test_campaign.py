@@ -0,0 +1,128 @@
+"""
+분산 배치 캠페인 테스트 (결정적 샤드, 체크포인트 재개, lease 회수, 로컬 워커 프로세스)
+"""
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from src.campaign import Campaign, CampaignWorker, LeaseLost, plan_shards, run_workers
+from src.results import ResultsStore
+from tests.helpers import make_config, make_sim
+
+CONFIG = {
+    **make_config(),
+    'optimize': {'divisions': [20, 40], 'target_profit_pct': [3.0, 5.0], 'star_base': [15], 'star_coeff': [1.5]},
+    'campaign': {'name': 'test', 'tickers': ['TQQQ', 'SOXL'], 'shard_size': 3, 'lease_seconds': 60,
+                 'rolling': {'start': '2020-01-01', 'end': '2023-01-01', 'every_months': 6, 'years': 2}},
+}
+
+
+def expected_rows():
+    """샤드 없이 구간마다 run_batch로 직접 계산한 결과"""
+    out = {}
+    for shard in plan_shards(CONFIG):
+        config = {**CONFIG, 'ticker': shard['ticker'],
+                  'backtest': {'start_date': shard['start_date'], 'end_date': shard['end_date']}}
+        sim = make_sim(config)
+        for row in sim.run_batch(shard['params']):
+            key = (shard['ticker'], shard['start_date'], row['divisions'], row['target_profit_pct'])
+            out[key] = row['total_return_pct'], row['max_drawdown_pct'], row['bars']
+    return out
+
+
+def done_worker(root, n):
+    with open(os.path.join(root, "done", "000000", f"{n:06d}.json")) as f:
+        return json.load(f)['worker']
+
+
+def as_dict(rows):
+    return {(r['ticker'], r['start_date'], r['divisions'], r['target_profit_pct']):
+            (r['total_return_pct'], r['max_drawdown_pct'], r['bars']) for r in rows}
+
+
+class TestCampaign(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.campaign = Campaign(self.root)
+
+    def test_plan_is_deterministic(self):
+        shards = plan_shards(CONFIG)
+        self.assertEqual(len(shards), 2 * 3 * 2)   # 종목 2 x 구간 3 x (후보 4개를 3개씩)
+        self.assertEqual(shards, plan_shards(CONFIG))
+        self.assertEqual((shards[2]['start_date'], shards[2]['end_date']), ('2020-07-01', '2022-07-01'))
+        self.assertEqual(self.campaign.init(CONFIG), 12)
+        self.assertEqual(self.campaign.init(CONFIG), 0)   # 같은 설정으로 다시 → 그대로
+        with self.assertRaises(ValueError):
+            self.campaign.init({**CONFIG, 'ticker': 'SOXL'})
+
+    def test_resume_after_crash(self):
+        self.campaign.init(CONFIG)
+        first = CampaignWorker(self.campaign, "w1")
+        self.assertEqual(first.run(max_shards=4), 4)
+        # 샤드를 가져간 채 죽은 워커 (heartbeat 끊김)
+        stale = self.campaign.claim("dead")
+        old = time.time() - 3600
+        os.utime(stale, (old, old))
+        self.assertEqual(self.campaign.status(), {'shards': 12, 'todo': 7, 'claimed': 1, 'done': 4})
+
+        second = CampaignWorker(self.campaign, "w2", poll=0.01)
+        self.assertEqual(second.run(), 8)            # 끝난 4개는 다시 안 함, 만료 샤드는 회수
+        self.assertTrue(self.campaign.finished())
+        workers = [done_worker(self.root, n) for n in range(12)]
+        self.assertEqual((workers.count("w1"), workers.count("w2")), (4, 8))
+
+        rows = self.campaign.results()
+        self.assertEqual([r['shard'] for r in rows], sorted(r['shard'] for r in rows))
+        self.assertEqual(as_dict(rows), expected_rows())
+
+        store = ResultsStore(os.path.join(self.root, "results.sqlite"))
+        self.addCleanup(store.close)
+        self.campaign.merge(store)
+        self.campaign.merge(store)                    # 다시 합쳐도 중복 없음
+        self.assertEqual(store.count({'batch': 'test'}), 24)
+        self.assertEqual(store.count({'batch': 'test', 'ticker': 'SOXL'}), 12)
+
+    def test_buckets(self):
+        """샤드를 버킷 디렉터리로 나눔 → 가져가기는 버킷 하나씩, after는 다음 버킷으로 이어짐"""
+        config = {**CONFIG, 'campaign': {**CONFIG['campaign'], 'bucket_size': 5}}
+        self.assertEqual(self.campaign.init(config), 12)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.root, "todo"))), ["000000", "000005", "000010"])
+        self.assertEqual(len(os.listdir(os.path.join(self.root, "todo", "000010"))), 2)
+        claim = self.campaign.claim("w", after="000004")
+        self.assertEqual(self.campaign.shard_id(claim), "000005")
+        self.campaign.complete(claim)
+        os.remove(os.path.join(self.root, "todo", "000000", "000003.json"))   # 다른 워커가 가져갔다고 치고
+        self.assertEqual(CampaignWorker(self.campaign, "w2").run(wait=False), 10)
+        self.assertEqual(self.campaign.status(), {'shards': 12, 'todo': 0, 'claimed': 0, 'done': 10})
+        self.assertFalse(self.campaign.finished())
+        self.assertEqual(self.campaign._complete, {2})   # 다 끝난 버킷만 기억
+        self.assertEqual(len(self.campaign.results(partial=True)), 22)   # 빠진 두 샤드는 1행씩
+        leftovers = [n for _, _, names in os.walk(self.root) for n in names if n.endswith(".tmp")]
+        self.assertEqual(leftovers, [])
+
+    def test_lease_lost(self):
+        self.campaign.init(CONFIG)
+        claim = self.campaign.claim("slow")
+        self.assertEqual(self.campaign.reclaim_expired(), 0)
+        self.assertEqual(self.campaign.reclaim_expired(now=time.time() + 120), 1)
+        with self.assertRaises(LeaseLost):
+            self.campaign.heartbeat(claim)
+        with self.assertRaises(RuntimeError):
+            self.campaign.results()
+        self.assertEqual(self.campaign.results(partial=True), [])
+
+    def test_local_worker_processes(self):
+        self.campaign.init(CONFIG)
+        self.assertEqual(run_workers(self.root, 3, prefix="local", poll=0.05), 12)
+        self.assertEqual(self.campaign.status(), {'shards': 12, 'todo': 0, 'claimed': 0, 'done': 12})
+        rows = self.campaign.results()
+        self.assertEqual(len(rows), 24)
+        self.assertEqual(as_dict(rows), expected_rows())
+
+
+if __name__ == '__main__':
+    unittest.main()
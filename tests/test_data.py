@@ -0,0 +1,201 @@
+"""
+데이터 소스 & 프리패치 테스트
+"""
+import multiprocessing
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from src.data.fake import FakeSource
+from src.data.local import LocalFileSource
+from src.data.prefetch import DataPrefetcher, DataFetchError, align
+from src.data.store import MarketDataStore, StoreSource
+from tests.helpers import make_sim
+
+
+class TestPrefetch(unittest.TestCase):
+    def test_parallel_prefetch(self):
+        """40종목이 지연 0.05초여도 병렬로 빠르게"""
+        source = FakeSource(delay=0.05)
+        prefetcher = DataPrefetcher(source, max_workers=20, backoff=0.0)
+        tickers = [f"T{i:02d}" for i in range(40)]
+        frames = prefetcher.prefetch(tickers, "2024-01-01", "2024-03-01")
+        self.assertEqual(len(frames), 40)
+        self.assertTrue(all(len(df) > 0 for df in frames.values()))
+
+    def test_retry_then_success(self):
+        source = FakeSource(failures={"TQQQ": 2})
+        prefetcher = DataPrefetcher(source, retries=3, backoff=0.0)
+        df = prefetcher.fetch_one("TQQQ", "2024-01-01", "2024-02-01")
+        self.assertFalse(df.empty)
+        self.assertEqual(source.calls["TQQQ"], 3)
+
+    def test_retry_exhausted(self):
+        source = FakeSource(failures={"SOXL": 5})
+        prefetcher = DataPrefetcher(source, retries=1, backoff=0.0)
+        with self.assertRaises(DataFetchError) as ctx:
+            prefetcher.prefetch(["TQQQ", "SOXL"], "2024-01-01", "2024-02-01")
+        self.assertIn("SOXL", ctx.exception.errors)
+
+    def test_cache(self):
+        source = FakeSource()
+        prefetcher = DataPrefetcher(source)
+        prefetcher.fetch_one("TQQQ", "2024-01-01", "2024-02-01")
+        prefetcher.fetch_one("TQQQ", "2024-01-01", "2024-02-01")
+        self.assertEqual(source.calls["TQQQ"], 1)
+
+    def test_align_union(self):
+        a = pd.DataFrame({'Date': pd.to_datetime(["2024-01-02", "2024-01-03"]),
+                          'Open': [1.0, 2.0], 'High': [1.0, 2.0], 'Low': [1.0, 2.0], 'Close': [1.0, 2.0]})
+        b = pd.DataFrame({'Date': pd.to_datetime(["2024-01-03", "2024-01-04"]),
+                          'Open': [3.0, 4.0], 'High': [3.0, 4.0], 'Low': [3.0, 4.0], 'Close': [3.0, 4.0]})
+        bars = align({"A": a, "B": b})
+        self.assertEqual(len(bars.dates), 3)
+        np.testing.assert_array_equal(bars.close[0], [1.0, 2.0, np.nan])
+        np.testing.assert_array_equal(bars.close[1], [np.nan, 3.0, 4.0])
+        self.assertEqual(len(align({"A": a, "B": b}, how="inner").dates), 1)
+
+
+class TestLocalFileSource(unittest.TestCase):
+    def test_roundtrip_csv(self):
+        df = FakeSource().fetch("TQQQ", "2024-01-01", "2024-02-01")
+        with tempfile.TemporaryDirectory() as tmp:
+            store = LocalFileSource(tmp)
+            store.save("TQQQ", df)
+            self.assertTrue(os.path.exists(os.path.join(tmp, "TQQQ.csv")))
+            loaded = store.fetch("TQQQ", "2024-01-10", "2024-02-01")
+        self.assertEqual(loaded['Date'].iloc[0], pd.Timestamp("2024-01-10"))
+        np.testing.assert_allclose(loaded['Close'].values, df[df['Date'] >= "2024-01-10"]['Close'].values)
+
+
+class CountingSource(FakeSource):
+    """upstream 호출을 파일에 기록 (프로세스 간 집계용)"""
+
+    def __init__(self, log_path, **kwargs):
+        super().__init__(**kwargs)
+        self.log_path = log_path
+
+    def fetch(self, ticker, start=None, end=None):
+        with open(self.log_path, 'a') as f:
+            f.write(ticker + "\n")
+        return super().fetch(ticker, start, end)
+
+
+def _worker(directory, log_path, queue):
+    source = StoreSource(MarketDataStore(directory), CountingSource(log_path, delay=0.2))
+    bars = source.bars("TQQQ", "2020-01-01", "2021-01-01")
+    queue.put((len(bars.dates), float(bars.column('Close')[-1]), isinstance(bars.ohlcv, np.memmap)))
+
+
+class TestMarketDataStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_publish_attach_zero_copy(self):
+        df = FakeSource().fetch("TQQQ", "2020-01-01", "2021-01-01")
+        store = MarketDataStore(self.tmp.name)
+        store.publish("TQQQ", df, "2020-01-01", "2021-01-01")
+        bars = store.attach("TQQQ")
+        self.assertIsInstance(bars.ohlcv, np.memmap)
+        self.assertFalse(bars.ohlcv.flags.writeable)
+        self.assertEqual(bars.dates.dtype, np.int64)
+        np.testing.assert_array_equal(bars.column('Close'), df['Close'].values)
+        part = bars.slice("2020-06-01", "2020-07-01")
+        self.assertTrue(np.shares_memory(part.ohlcv, bars.ohlcv))
+        frame = bars.to_frame()
+        pd.testing.assert_frame_equal(frame, df)
+        self.assertTrue(np.shares_memory(frame['Close'].values, bars.ohlcv))
+
+    def test_store_source_hit_and_extend(self):
+        upstream = FakeSource()
+        source = StoreSource(MarketDataStore(self.tmp.name), upstream)
+        source.fetch("TQQQ", "2020-01-01", "2021-01-01")
+        source.fetch("TQQQ", "2020-03-01", "2020-06-01")
+        self.assertEqual((source.hits, source.misses), (1, 1))
+        df = source.fetch("TQQQ", "2020-01-01", "2021-06-01")  # 종료일 연장 → 다시 받음
+        self.assertEqual(source.misses, 2)
+        self.assertEqual(df['Date'].iloc[0], pd.Timestamp("2020-01-01"))
+        self.assertLess(df['Date'].iloc[-1], pd.Timestamp("2021-06-01"))
+
+    def test_future_end_clamped_to_today(self):
+        """미래 종료일은 받은 날까지만 인정 → 날이 지나면 다시 받음"""
+        source = StoreSource(MarketDataStore(self.tmp.name), FakeSource())
+        with mock.patch('src.data.store._today', return_value="2020-06-01"):
+            df = source.fetch("TQQQ", "2020-01-01", "2030-01-01")
+            self.assertLess(df['Date'].iloc[-1], pd.Timestamp("2020-06-01"))
+            self.assertEqual(source.store.manifest("TQQQ")['end'], "2020-06-01")
+            source.fetch("TQQQ", "2020-01-01", None)
+            self.assertEqual((source.hits, source.misses), (1, 1))
+        with mock.patch('src.data.store._today', return_value="2020-07-01"):
+            df = source.fetch("TQQQ", "2020-01-01", "2030-01-01")
+        self.assertEqual(source.misses, 2)
+        self.assertGreaterEqual(df['Date'].iloc[-1], pd.Timestamp("2020-06-29"))
+
+    def test_covers_checks_last_bar(self):
+        store = MarketDataStore(self.tmp.name)
+        df = FakeSource().fetch("TQQQ", "2020-01-01", "2021-01-01")
+        store.publish("TQQQ", df[df['Date'] < "2020-11-01"], "2020-01-01", "2021-01-01")
+        self.assertEqual(store.manifest("TQQQ")['last'], "2020-10-30")
+        self.assertTrue(store.covers("TQQQ", "2020-02-01", "2020-10-31"))
+        self.assertFalse(store.covers("TQQQ", "2020-02-01", "2020-12-01"))   # 마지막 봉 이후 두 달 비어 있음
+        store.publish("TQQQ", df, "2020-01-01", "2021-01-01")
+        self.assertTrue(store.covers("TQQQ", "2020-02-01", "2021-01-01"))   # 연말 휴장 공백은 허용
+
+    def test_open_start_needs_first_bar(self):
+        """start=None(첫 봉부터)은 저장된 기간이 첫 봉부터일 때만 인정"""
+        full = FakeSource().fetch("TQQQ", "2020-01-01", "2021-01-01")
+        source = StoreSource(MarketDataStore(self.tmp.name), FakeSource(frames={"TQQQ": full}))
+        source.fetch("TQQQ", "2020-06-01", "2021-01-01")
+        self.assertFalse(source.store.covers("TQQQ", None, "2021-01-01"))
+        df = source.fetch("TQQQ", None, "2021-01-01")
+        self.assertEqual(source.misses, 2)
+        self.assertEqual(df['Date'].iloc[0], full['Date'].iloc[0])
+        self.assertIsNone(source.store.manifest("TQQQ")['start'])
+        source.fetch("TQQQ", "2020-03-01", "2020-09-01")   # 첫 봉부터 받았으므로 어떤 시작일도 포함
+        source.fetch("TQQQ", None, "2020-09-01")
+        self.assertEqual((source.hits, source.misses), (2, 2))
+
+    def test_simulator_keeps_store_view(self):
+        """저장소 프레임으로 set_data → OHLC는 memmap 뷰 그대로 (워커별 사본 없음), 다른 입력은 복사"""
+        source = StoreSource(MarketDataStore(self.tmp.name), FakeSource())
+        frame = source.fetch("TQQQ", "2020-01-01", "2021-01-01")
+        sim = make_sim()
+        data = sim.set_data(frame)
+        ohlcv = source.store.attach("TQQQ").ohlcv
+        self.assertTrue(np.shares_memory(data['Close'].to_numpy(), ohlcv))
+        self.assertTrue(all(np.shares_memory(col, ohlcv) for col in sim.bars()[1:5]))
+        np.testing.assert_array_equal(data['Prev_Close'].to_numpy(), frame['Close'].to_numpy()[:-1])
+        self.assertEqual(len(data), len(frame) - 1)
+
+        plain = FakeSource().fetch("TQQQ", "2020-01-01", "2021-01-01")
+        data = sim.set_data(plain)
+        self.assertFalse(np.shares_memory(data['Close'].to_numpy(), plain['Close'].to_numpy()))
+        self.assertNotIn('Prev_Close', plain.columns)
+
+    def test_workers_share_one_fetch(self):
+        """여러 프로세스가 동시에 요청해도 upstream은 한 번만 호출"""
+        log_path = os.path.join(self.tmp.name, "calls.log")
+        directory = os.path.join(self.tmp.name, "store")
+        ctx = multiprocessing.get_context("fork")
+        queue = ctx.Queue()
+        procs = [ctx.Process(target=_worker, args=(directory, log_path, queue)) for _ in range(4)]
+        for p in procs:
+            p.start()
+        results = [queue.get(timeout=30) for _ in procs]
+        for p in procs:
+            p.join()
+        self.assertEqual(len(set(results)), 1)
+        self.assertTrue(results[0][2])
+        with open(log_path) as f:
+            self.assertEqual(f.read().split(), ["TQQQ"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+실시간 계좌 상태 푸시 테스트 (delta 계산, SSE 재연결, 계좌 상태 구성)
+"""
+import json
+import threading
+import unittest
+
+from src.accounting import RoundingPolicy
+from src.broker.paper import PaperBroker
+from src.data.fake import FakeSource
+from src.data.store import day_ordinal, format_day
+from src.live.state import STATE_KEYS, StateHub, account_state, check_state, planned_orders
+from src.strategy import InfiniteBuyStrategyV3
+from tests.helpers import make_sim
+from tests.test_strategy_v3 import run_bars
+
+
+def parse(text):
+    """SSE 텍스트 한 덩어리 → (id, event, data)"""
+    fields = dict(line.split(": ", 1) for line in text.strip().split("\n") if not line.startswith(":"))
+    return int(fields["id"]), fields["event"], json.loads(fields["data"])
+
+
+def take(stream, n):
+    """retry/keepalive를 건너뛰고 이벤트 n개"""
+    out = []
+    while len(out) < n:
+        text = next(stream)
+        if text.startswith("id:"):
+            out.append(parse(text))
+    return out
+
+
+class TestStateHub(unittest.TestCase):
+    def test_delta_only_changed_fields(self):
+        hub = StateHub()
+        first = hub.publish("a", {"t_value": 1.0, "orders": [{"price": 50.0}], "half": "전반전"})
+        self.assertEqual(set(first["set"]), {"t_value", "orders", "half"})
+        self.assertIsNone(hub.publish("a", {"t_value": 1.0, "orders": [{"price": 50.0}], "half": "전반전"}))
+        delta = hub.publish("a", {"t_value": 1.5, "orders": [{"price": 50.0}]})
+        self.assertEqual(delta["set"], {"t_value": 1.5})
+        self.assertEqual(delta["unset"], ["half"])
+        self.assertEqual(hub.seq, 2)
+
+    def test_stream_snapshot_then_deltas(self):
+        hub = StateHub(keepalive=0.01)
+        hub.publish("a", {"x": 1})
+        hub.publish("b", {"x": 1})
+        stream = hub.stream()
+        (seq, event, data), = take(stream, 1)
+        self.assertEqual((seq, event), (2, "snapshot"))
+        self.assertEqual(data["accounts"], {"a": {"x": 1}, "b": {"x": 1}})
+
+        threading.Timer(0.05, hub.publish, ("a", {"x": 2})).start()
+        (seq, event, data), = take(stream, 1)
+        self.assertEqual((seq, event, data["set"]), (3, "delta", {"x": 2}))
+        hub.remove("b")
+        self.assertEqual(take(stream, 1)[0][1], "remove")
+
+    def test_resume_and_gap(self):
+        hub = StateHub(history=4)
+        for i in range(3):
+            hub.publish("a", {"x": i})
+        # 놓친 이벤트가 버퍼에 있으면 그것만
+        events = take(hub.stream(last_id="1"), 2)
+        self.assertEqual([(s, e) for s, e, _ in events], [(2, "delta"), (3, "delta")])
+        # 버퍼에서 밀려났거나 서버 재시작으로 id가 미래면 snapshot
+        for i in range(3, 10):
+            hub.publish("a", {"x": i})
+        self.assertEqual(take(hub.stream(last_id="2"), 1)[0][1], "snapshot")
+        self.assertEqual(take(hub.stream(last_id="999"), 1)[0][1], "snapshot")
+
+    def test_account_filter(self):
+        hub = StateHub()
+        hub.publish("a", {"x": 1})
+        hub.publish("b", {"x": 1})
+        hub.publish("a", {"x": 2})
+        events = take(hub.stream(last_id="0", accounts=["a"]), 2)
+        self.assertEqual([d["account"] for _, _, d in events], ["a", "a"])
+        self.assertEqual(take(hub.stream(accounts=["b"]), 1)[0][2]["accounts"], {"b": {"x": 1}})
+
+
+class TestAccountState(unittest.TestCase):
+    def test_strategy_state(self):
+        df = FakeSource().fetch("TQQQ", "2020-01-01", "2020-06-01")
+        s = run_bars(InfiniteBuyStrategyV3(100000, divisions=40), df)
+        last = s.trades[-1]
+        state = account_state(s, last.date, prev_close=float(df['Close'].iloc[-1]))
+        for key, value in s.summary().items():
+            self.assertEqual(state[key], value)
+        self.assertTrue(state["fills"])
+        self.assertTrue(all(f["price"] > 0 for f in state["fills"]))
+        buys = [o for o in state["orders"] if o["side"] == "buy"]
+        self.assertEqual([o["action"] for o in buys], [a for _, _, _, a in (
+            s.rules.first_legs if s.is_first_half() else s.rules.second_legs)])
+        self.assertAlmostEqual(state["total_pnl"], state["realized_pnl"] + state["unrealized_pnl"], places=1)
+        self.assertIs(check_state("acc-1", state), state)   # 만든 상태는 모두 허용 키
+
+    def test_simulator_strategy_fills(self):
+        """시뮬레이터가 돌린 전략 (매매 기록 = int 일수): 문자열/int 날짜 모두 그날 체결을 찾음"""
+        sim = make_sim()
+        sim.run_backtest()
+        last = sim.strategy.trades[-1]
+        expected = [t.price for t in sim.strategy.trades if t.date == last.date]
+        for date in (format_day(last.date), last.date):
+            state = account_state(sim.strategy, date, prev_close=float(sim.data['Close'].iloc[-1]))
+            self.assertEqual(state["date"], format_day(last.date))
+            self.assertEqual([f["price"] for f in state["fills"]], expected)
+
+    def test_planned_orders_fixed_whole_share(self):
+        """정수 주: 구간 금액($25)으로 1주도 못 사면 1주 주문 (_do_buy_fixed와 같은 수량)"""
+        s = InfiniteBuyStrategyV3(2000, divisions=40, rounding=RoundingPolicy())
+        orders = planned_orders(s, prev_close=100.0)
+        self.assertEqual([(o["action"], o["price"], o["shares"], o["amount"]) for o in orders],
+                         [("buy_star", 85.0, 1.0, 85.0), ("buy_zero", 100.0, 1.0, 100.0)])
+        records = s.process_day(day_ordinal("2024-01-02"), 100.0, 100.0, 80.0, 100.0, 100.0)
+        self.assertEqual([(r.action, r.price, r.shares, r.amount) for r in records],
+                         [(o["action"], o["price"], o["shares"], o["amount"]) for o in orders])
+
+    def test_broker_fills(self):
+        broker = PaperBroker(cash=10000.0)
+        broker.place_buy_order("TQQQ", 50.0, 10, "loc")
+        broker.match("TQQQ", "2024-01-02", high=51.0, low=49.0, close=50.5)
+        s = InfiniteBuyStrategyV3(10000, divisions=40)
+        state = account_state(s, "2024-01-02", prev_close=50.0, price=50.5, broker=broker)
+        self.assertEqual(state["fills"], [{"side": "buy", "price": 50.0, "shares": 10.0, "amount": 500.0}])
+        self.assertEqual((state["broker_cash"], state["broker_shares"]), (9500.0, 10.0))
+        self.assertLessEqual(set(state), STATE_KEYS)
+
+    def test_check_state_rejects(self):
+        with self.assertRaises(ValueError):
+            check_state("<img src=x onerror=alert(1)>", {"t_value": 1.0})
+        with self.assertRaises(ValueError):
+            check_state("acc1", {"t_value": 1.0, "<script>": "x"})
+        with self.assertRaises(ValueError):
+            check_state("acc1", ["t_value"])
+
+
+if __name__ == '__main__':
+    unittest.main()
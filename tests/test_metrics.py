@@ -0,0 +1,96 @@
+"""
+지표 레지스트리 & 브로커 계측 테스트
+"""
+import threading
+import unittest
+from datetime import datetime, timezone
+
+from src import metrics
+from src.broker.instrumented import InstrumentedBroker, seconds_to_close
+from src.broker.paper import PaperBroker
+from src.metrics import Registry
+
+
+class TestRegistry(unittest.TestCase):
+    def test_counter_threads(self):
+        """스레드별 셀에 나눠 기록해도 합계는 정확"""
+        registry = Registry()
+        child = registry.counter("jobs_total", "작업 수", ["kind"]).labels("a")
+
+        def work():
+            for _ in range(10000):
+                child.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(child.value, 80000)
+        self.assertIn('jobs_total{kind="a"} 80000', registry.exposition())
+
+    def test_finished_threads_release_cells(self):
+        """요청마다 새 스레드를 만드는 서버처럼: 끝난 스레드의 셀은 합산 후 정리, 값은 유지"""
+        registry = Registry()
+        counter = registry.counter("req_total", "요청 수").labels()
+        hist = registry.histogram("req_seconds", "요청 시간").labels()
+
+        def request():
+            counter.inc()
+            hist.observe(0.01)
+
+        for _ in range(300):
+            t = threading.Thread(target=request)
+            t.start()
+            t.join()
+        self.assertLessEqual(len(counter._cells), 1)
+        self.assertLessEqual(len(hist._cells), 1)
+        counter.inc()
+        self.assertEqual((counter.value, hist.count), (301, 300))
+
+    def test_histogram_exposition(self):
+        registry = Registry()
+        hist = registry.histogram("lat_seconds", "지연", ["route"], buckets=(0.1, 1.0))
+        child = hist.labels('/a"b')
+        for v in (0.05, 0.1, 0.5, 3.0):
+            child.observe(v)
+        text = registry.exposition()
+        self.assertIn("# TYPE lat_seconds histogram", text)
+        self.assertIn('lat_seconds_bucket{route="/a\\"b",le="0.1"} 2', text)
+        self.assertIn('lat_seconds_bucket{route="/a\\"b",le="1.0"} 3', text)
+        self.assertIn('lat_seconds_bucket{route="/a\\"b",le="+Inf"} 4', text)
+        self.assertIn('lat_seconds_count{route="/a\\"b"} 4', text)
+
+    def test_get_or_create(self):
+        registry = Registry()
+        c = registry.counter("x_total", "x", ["a"])
+        self.assertIs(registry.counter("x_total", "x", ["a"]), c)
+        self.assertIs(c.labels("1"), c.labels(1))
+        with self.assertRaises(ValueError):
+            registry.histogram("x_total", "x", ["a"])
+        with self.assertRaises(ValueError):
+            c.labels("1", "2")
+
+
+class TestInstrumentedBroker(unittest.TestCase):
+    def test_calls_errors_and_lead_time(self):
+        # 뉴욕 15:50 (EST) = 마감 10분 전
+        now = datetime(2024, 1, 16, 20, 50, tzinfo=timezone.utc)
+        self.assertEqual(seconds_to_close(now), 600)
+
+        broker = InstrumentedBroker(PaperBroker(cash=1000.0), name="paper-test", clock=lambda: now)
+        broker.connect()
+        self.assertTrue(broker.is_connected)
+        broker.place_buy_order("TQQQ", 50.0, 2, "loc")
+        broker.place_buy_order("TQQQ", 50.0, 0, "loc")   # 수량 0 → status=error
+
+        registry = metrics.REGISTRY
+        self.assertEqual(registry.get("broker_call_duration_seconds").labels("paper-test", "place_buy_order").count, 2)
+        self.assertEqual(registry.get("broker_call_errors_total").labels("paper-test", "place_buy_order").value, 1)
+        lead = registry.get("broker_order_lead_seconds").labels("paper-test", "loc")
+        buckets, count, total = lead.snapshot()
+        self.assertEqual((count, total), (2, 1200.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
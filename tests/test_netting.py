@@ -0,0 +1,83 @@
+"""
+계좌 간 주문 합치기 & 체결 배분 테스트
+"""
+import unittest
+
+from src import metrics
+from src.broker.instrumented import InstrumentedBroker
+from src.broker.netting import OrderAggregator, largest_remainder
+from src.broker.paper import PaperBroker
+
+
+class TestLargestRemainder(unittest.TestCase):
+    def test_exact_and_capped(self):
+        for total in range(0, 31):
+            out = largest_remainder(total, [10, 7, 13])
+            self.assertEqual(sum(out), total)
+            self.assertTrue(all(0 <= a <= w for a, w in zip(out, [10, 7, 13])))
+        self.assertEqual(largest_remainder(1, [5, 5]), [1, 0])   # 동률은 앞 순서
+        self.assertEqual(largest_remainder(5, [0, 0]), [0, 0])
+
+
+class TestOrderAggregator(unittest.TestCase):
+    def test_merge_submit_allocate(self):
+        broker = InstrumentedBroker(PaperBroker(cash=100000.0), name="netting-test")
+        agg = OrderAggregator(broker, rounding=broker.inner.rounding)
+        # 같은 호가(0.01 내림)로 떨어지는 LOC 매수 3건 + 다른 가격 1건
+        agg.add("s2", "tqqq", "buy", 50.123, 3, tag="buy_star")
+        agg.add("s1", "TQQQ", "buy", 50.129, 5, tag="buy_star")
+        agg.add("s3", "TQQQ", "buy", 50.12, 2, tag="buy_zero")
+        agg.add("s1", "TQQQ", "buy", 49.00, 4, tag="buy_zero")
+        netted = agg.submit()
+        self.assertEqual([(o.side, o.price_units, o.share_units) for o in netted],
+                         [("buy", 4900, 4), ("buy", 5012, 10)])
+        self.assertEqual([leg.account for leg, _ in netted[1].legs], ["s1", "s2", "s3"])
+        calls = metrics.REGISTRY.get("broker_call_duration_seconds")
+        self.assertEqual(calls.labels("netting-test", "place_orders").count, 1)
+        self.assertEqual(calls.labels("netting-test", "place_buy_order").count, 0)
+
+        fills = broker.inner.match("TQQQ", "2024-01-02", high=51.0, low=49.5, close=50.0)
+        allocations = agg.apply_fills(fills)
+        by_account = {(a.account, a.tag): (a.shares, a.amount) for a in allocations}
+        self.assertEqual(by_account, {("s1", "buy_star"): (5.0, 250.6), ("s2", "buy_star"): (3.0, 150.36),
+                                      ("s3", "buy_zero"): (2.0, 100.24)})
+        self.assertEqual(agg.orders.keys(), {netted[0].order_id})   # 49.00은 미체결
+
+    def test_partial_fills_deterministic(self):
+        agg = OrderAggregator(PaperBroker(cash=100000.0))
+        for account, shares in (("c", 1), ("a", 3), ("b", 3)):
+            agg.add(account, "SOXL", "sell", 30.0, shares, "limit", tag="sell")
+        agg.broker.holdings["SOXL"] = {"shares": 7, "cost": 0}
+        order, = agg.submit()
+        first = agg.apply_fills([{"order_id": order.order_id, "shares": 4.0, "amount": 120.0}])
+        # 정수 주: 4주를 3:3:1 → 1.71/1.71/0.57 → 2/2/0
+        self.assertEqual([(a.account, a.shares, a.amount) for a in first], [("a", 2.0, 60.0), ("b", 2.0, 60.0)])
+        second = agg.apply_fills([{"order_id": order.order_id, "shares": 3.0, "amount": 90.04}])
+        self.assertEqual([(a.account, a.shares, a.amount) for a in second],
+                         [("a", 1.0, 30.02), ("b", 1.0, 30.01), ("c", 1.0, 30.01)])
+        self.assertEqual(order.alloc_units, [3, 3, 1])
+        self.assertEqual(sum(order.alloc_cash), 21004)
+        self.assertNotIn(order.order_id, agg.orders)
+
+    def test_same_holdings_as_separate_orders(self):
+        """합쳐서 제출해도 전 체결이면 계좌 보유/예수금은 따로 제출한 것과 같음"""
+        orders = [("s1", "buy", 50.0, 4), ("s2", "buy", 50.0, 6), ("s1", "buy", 48.0, 2), ("s2", "buy", 47.0, 1)]
+        separate = PaperBroker(cash=10000.0)
+        for _, side, price, shares in orders:
+            separate.place_buy_order("TQQQ", price, shares, "loc")
+        separate.match("TQQQ", "2024-01-02", high=51.0, low=46.0, close=46.5)
+
+        merged = PaperBroker(cash=10000.0)
+        agg = OrderAggregator(merged)
+        for account, side, price, shares in orders:
+            agg.add(account, "TQQQ", side, price, shares)
+        self.assertEqual(len(agg.submit()), 3)
+        allocations = agg.apply_fills(merged.match("TQQQ", "2024-01-02", high=51.0, low=46.0, close=46.5))
+        self.assertEqual(merged.get_positions(), separate.get_positions())
+        self.assertEqual(merged.get_balance(), separate.get_balance())
+        self.assertEqual(sum(a.shares for a in allocations if a.account == "s1"), 6.0)
+        self.assertEqual(sum(a.shares for a in allocations if a.account == "s2"), 7.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
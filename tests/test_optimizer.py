@@ -0,0 +1,49 @@
+"""
+파라미터 탐색 테스트
+"""
+import unittest
+
+from src.optimizer import SuccessiveHalving, expand_grid, pareto_front, pareto_ranks
+from tests.helpers import make_sim
+
+
+class TestPareto(unittest.TestCase):
+    def test_ranks(self):
+        metrics = [
+            {'total_return_pct': 10, 'max_drawdown_pct': -20, 'exhaustion_pct': 0},
+            {'total_return_pct': 5, 'max_drawdown_pct': -10, 'exhaustion_pct': 0},
+            {'total_return_pct': 4, 'max_drawdown_pct': -30, 'exhaustion_pct': 5},  # 둘 다에게 지배됨
+        ]
+        self.assertEqual(pareto_ranks(metrics), [0, 0, 1])
+
+
+class TestSuccessiveHalving(unittest.TestCase):
+    def test_prunes_and_finishes_on_full_history(self):
+        sim = make_sim()
+        grid = {'divisions': [20, 40], 'target_profit_pct': [3.0, 5.0, 10.0], 'star_base': [10, 15, 20]}
+        candidates = expand_grid(grid)
+        search = SuccessiveHalving(sim, candidates, eta=3, min_bars=60)
+        finalists = search.run()
+        total = len(sim.bars()[0])
+        self.assertTrue(all(c.bars == total for c in finalists))
+        self.assertLess(search.bars_evaluated, len(candidates) * total)
+        front = pareto_front(finalists)
+        self.assertGreaterEqual(len(front), 1)
+
+        # 탐색 결과는 같은 파라미터로 단독 실행한 결과와 동일
+        best = front[0]
+        metrics = sim.evaluate(sim.make_strategy(**best.params))
+        self.assertEqual(metrics, best.metrics)
+
+    def test_schedule_merges_equal_budgets(self):
+        """최소 일봉 수에 막힌 단계는 합침 → 일봉 수가 단계마다 늘어남"""
+        search = SuccessiveHalving(make_sim(), [{'divisions': 40}] * 108, eta=3, min_bars=120)
+        plan = search.schedule(260)
+        self.assertEqual(plan, [(108, 120), (2, 260)])
+        plan = search.schedule(2000)
+        self.assertEqual([bars for _, bars in plan], [120, 222, 666, 2000])
+        self.assertEqual([keep for keep, _ in plan], [108, 12, 4, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
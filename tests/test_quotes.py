@@ -0,0 +1,95 @@
+"""
+실시간 시세 소비 & 매도 감시 테스트
+"""
+import asyncio
+import random
+import time
+import unittest
+
+from src.data.store import day_ordinal
+from src.live.quotes import QuoteConsumer, SellTriggerMonitor, TickCoalescer
+from src.live.replay import ReplayServer
+from src.strategy import InfiniteBuyStrategyV3
+
+
+def holding_strategy(ticker, target_pct):
+    """평단 100에 보유 중인 전략 (목표가 = 100 * (1 + target_pct%))"""
+    s = InfiniteBuyStrategyV3(1000000, divisions=40, target_profit_pct=target_pct, ticker=ticker)
+    s.process_day(day_ordinal("2024-01-02"), 100.0, 101.0, 95.0, 100.0, prev_close=100.0)
+    return s
+
+
+class TestCoalescer(unittest.TestCase):
+    def test_merge(self):
+        c = TickCoalescer()
+        for p in (10.0, 12.0, 9.0, 11.0):
+            c.add("TQQQ", p, 1.0)
+        c.add("SOXL", 20.0, 2.0)
+        quotes = c.drain()
+        self.assertEqual(len(c), 0)
+        q = quotes["TQQQ"]
+        self.assertEqual((q.last, q.high, q.low, q.count), (11.0, 12.0, 9.0, 4))
+        self.assertEqual(quotes["SOXL"].count, 1)
+
+
+class TestSellTriggerMonitor(unittest.TestCase):
+    def test_fires_once_until_refresh(self):
+        fired = []
+        monitor = SellTriggerMonitor(on_trigger=lambda key, s, q: fired.append(key))
+        for pct in (3, 5, 8):
+            monitor.register(pct, holding_strategy("TQQQ", pct))
+        self.assertAlmostEqual(monitor.threshold("TQQQ"), 103.0)
+
+        c = TickCoalescer()
+        c.add("TQQQ", 105.5, 0.0)
+        monitor.evaluate(c.drain())
+        self.assertEqual(fired, [3, 5])
+
+        c.add("TQQQ", 106.0, 0.0)
+        monitor.evaluate(c.drain())
+        self.assertEqual(fired, [3, 5])   # 이미 발동된 감시는 재무장 전까지 무시
+
+        monitor.refresh(5)
+        c.add("TQQQ", 108.5, 0.0)
+        monitor.evaluate(c.drain())
+        self.assertEqual(fired, [3, 5, 5, 8])
+
+    def test_flat_strategy_not_watched(self):
+        monitor = SellTriggerMonitor()
+        monitor.register("flat", InfiniteBuyStrategyV3(1000000, ticker="TQQQ"))
+        self.assertEqual(monitor.threshold("TQQQ"), float('inf'))
+
+
+class TestReplay(unittest.TestCase):
+    def test_replay_many_symbols(self):
+        """리플레이 서버 → 소비자: 모든 틱 처리, 발동 결과 = 종목별 최고가 기준 기대값"""
+        rng = random.Random(7)
+        symbols = [f"S{i:02d}" for i in range(40)]
+        now = time.time()
+        ticks = [(rng.choice(symbols), 100.0 + rng.gauss(0, 2.5), now) for _ in range(100000)]
+        highs = {}
+        for s, p, _ in ticks:
+            highs[s] = max(highs.get(s, 0.0), p)
+
+        fired = set()
+        monitor = SellTriggerMonitor(on_trigger=lambda key, s, q: fired.add(key))
+        expected = set()
+        for s in symbols:
+            for pct in (5, 8, 11):
+                monitor.register((s, pct), holding_strategy(s, pct))
+                if highs.get(s, 0.0) >= 100.0 * (1 + pct / 100):
+                    expected.add((s, pct))
+        consumer = QuoteConsumer(monitor)
+
+        async def scenario():
+            async with ReplayServer(ticks, batch_size=100) as server:
+                await asyncio.wait_for(consumer.run(server.url, symbols), timeout=60)
+
+        asyncio.run(scenario())
+        self.assertEqual(consumer.ticks, len(ticks))
+        self.assertEqual(fired, expected)
+        self.assertLess(consumer.evaluations, consumer.ticks)  # 틱이 합쳐져서 평가 횟수 < 틱 수
+
+
+if __name__ == '__main__':
+    unittest.main()
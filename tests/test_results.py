@@ -0,0 +1,121 @@
+"""
+결과 저장소 테스트 (일괄 추가, 조건/정렬 조회, 배치 실행 연동)
+"""
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from src.optimizer import SuccessiveHalving, expand_grid
+from src.results import ResultsStore
+from src.rules import V2_2
+from tests.helpers import make_sim
+
+
+class TestResultsStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.store = ResultsStore(os.path.join(self.tmp, "results.sqlite"))
+        self.addCleanup(self.store.close)
+
+    def test_query_matches_python_filter(self):
+        rng = random.Random(7)
+        rows = [{
+            'ticker': rng.choice(['TQQQ', 'SOXL']),
+            'divisions': rng.choice([20, 30, 40]),
+            'target_profit_pct': rng.choice([3.0, 5.0, 10.0]),
+            'total_return_pct': round(rng.uniform(-50, 200), 2),
+            'max_drawdown_pct': round(rng.uniform(-80, 0), 2),
+            'seed': i,
+        } for i in range(5000)]
+        self.assertEqual(self.store.append(rows, batch="mc"), 5000)
+
+        top = self.store.query({'ticker': 'SOXL', 'divisions': 30, 'max_drawdown_pct__gt': -40}, limit=20)
+        expected = sorted((r for r in rows if r['ticker'] == 'SOXL' and r['divisions'] == 30
+                           and r['max_drawdown_pct'] > -40), key=lambda r: -r['total_return_pct'])[:20]
+        self.assertEqual([r['seed'] for r in top], [r['seed'] for r in expected])   # extra 컬럼도 복원
+        self.assertEqual(top[0]['batch'], 'mc')
+
+        self.assertEqual(self.store.count({'divisions__in': [20, 40]}),
+                         sum(r['divisions'] in (20, 40) for r in rows))
+        self.assertEqual(self.store.query(limit=-1), [])   # 음수 limit이 전체 조회가 되지 않게
+        self.assertEqual(len(self.store.query(limit=10 ** 9, columns=['id'])), 5000)
+        low = self.store.query(order_by='max_drawdown_pct', desc=False, limit=1, columns=['max_drawdown_pct'])
+        self.assertEqual(low, [{'max_drawdown_pct': min(r['max_drawdown_pct'] for r in rows)}])
+
+    def test_uses_index(self):
+        plan = self.store._conn().execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM runs WHERE ticker = ? AND divisions = ? "
+            "ORDER BY total_return_pct DESC LIMIT 20", ("SOXL", 30)).fetchall()
+        detail = " ".join(row[-1] for row in plan)
+        self.assertIn("idx_runs_ticker_div_return", detail)
+        self.assertNotIn("TEMP B-TREE", detail)   # 정렬도 인덱스 순서로
+
+    def test_invalid_columns(self):
+        with self.assertRaises(ValueError):
+            self.store.query({'ticker; DROP TABLE runs': 1})
+        with self.assertRaises(ValueError):
+            self.store.query({'divisions__like': 1})
+        with self.assertRaises(ValueError):
+            self.store.query(order_by='random()')
+
+    def test_rules_objects(self):
+        self.store.append([{'rules': V2_2, 'total_return_pct': 1.0},
+                           {'rules': {'base': 'v3', 'reinvest_divisor': 20}, 'total_return_pct': 2.0}])
+        rows = self.store.query(order_by='id', desc=False)
+        self.assertEqual([r['rules'] for r in rows], ['v2.2', 'v3-custom'])
+        self.assertEqual(rows[1]['rules_config'], {'base': 'v3', 'reinvest_divisor': 20})
+
+    def test_analyze_only_on_growth(self):
+        """ANALYZE는 매 추가마다가 아니라 행 수가 크게 늘었을 때만"""
+        with mock.patch.object(self.store, 'analyze', wraps=self.store.analyze) as analyze:
+            for _ in range(10):
+                self.store.append([{'total_return_pct': 1.0}] * 50, batch="small")
+            self.assertEqual(analyze.call_count, 0)
+            self.store.append([{'total_return_pct': 1.0}] * 600, batch="bulk")
+            self.assertEqual(analyze.call_count, 1)
+            self.store.append([{'total_return_pct': 1.0}] * 50, batch="small")
+            self.assertEqual(analyze.call_count, 1)
+        self.assertEqual(self.store._analyzed_rows(), 1100)
+
+    def test_replace_is_atomic(self):
+        self.store.append([{'total_return_pct': float(i)} for i in range(3)], batch="b")
+        self.store.append([{'total_return_pct': 9.0}], batch="other")
+        with self.assertRaises(sqlite3.Error):
+            self.store.replace("b", [{'total_return_pct': 1.0}, {'divisions': [1, 2]}])   # 두 번째 행에서 실패
+        self.assertEqual(self.store.count({'batch': 'b'}), 3)   # 삭제도 되돌려짐
+        self.assertEqual(self.store.replace("b", [{'total_return_pct': 5.0}]), 1)
+        self.assertEqual([r['total_return_pct'] for r in self.store.query({'batch': 'b'})], [5.0])
+        self.assertEqual(self.store.count({'batch': 'other'}), 1)
+
+
+class TestBatchAppend(unittest.TestCase):
+    def test_simulator_and_optimizer_append(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        store = ResultsStore(os.path.join(tmp, "results.sqlite"))
+        sim = make_sim()
+        grid = expand_grid({'divisions': [20, 40], 'target_profit_pct': [3.0, 5.0]})
+
+        rows = sim.run_batch(grid, store=store, batch="grid")
+        stored = store.query({'batch': 'grid'}, limit=None)
+        self.assertEqual(len(stored), 4)
+        best = max(rows, key=lambda r: r['total_return_pct'])
+        self.assertEqual((stored[0]['divisions'], stored[0]['total_return_pct']),
+                         (best['divisions'], best['total_return_pct']))
+        self.assertEqual(stored[0]['ticker'], 'TQQQ')
+
+        search = SuccessiveHalving(sim, grid, eta=2, min_bars=60)
+        search.run()
+        self.assertEqual(search.save(store, batch="sh"), 4)
+        rungs = [r['rung'] for r in store.query({'batch': 'sh'}, limit=None)]
+        self.assertEqual((min(rungs), max(rungs)), (0, len(search.schedule(len(sim.bars()[0]))) - 1))
+        store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
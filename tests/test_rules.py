@@ -0,0 +1,105 @@
+"""
+전략 규칙 세트 테스트
+"""
+import unittest
+
+from src.accounting import RoundingPolicy
+from src.data.fake import FakeSource
+from src.optimizer import SuccessiveHalving, expand_grid
+from src.rules import RULES, RuleSet, V2_2, V3, get_rules, register_rules, rules_from_config
+from src.strategy import InfiniteBuyStrategyV3
+from tests.helpers import CONFIG, make_sim
+from tests.test_strategy_v3 import run_bars
+
+
+class TestRuleSets(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = FakeSource().fetch("TQQQ", "2015-01-01", "2021-01-01")
+
+    def run_rules(self, rules, **kwargs):
+        return run_bars(InfiniteBuyStrategyV3(1000000, divisions=40, rules=rules, **kwargs), self.df)
+
+    def test_config_equivalent_to_default(self):
+        """V3를 config로 풀어 쓴 규칙 == 기본 전략"""
+        spelled = rules_from_config({
+            'base': 'v3',
+            'star': {'tqqq': [15, 1.5]},
+            'first_half': [['star', 0.5], ['zero', 0.5]],
+            'second_half': [['abs_star', 1.0]],
+            'reinvest_divisor': 40,
+        })
+        self.assertEqual(spelled.name, "v3-custom")
+        self.assertEqual(self.run_rules(spelled).trades, self.run_rules(None).trades)
+
+    def test_v3_legs_fast_path(self):
+        """기본 V3 구간은 펼친 경로 (일봉 루프 속도 회귀 방지) → 구간 루프와 매매 기록이 같아야 함"""
+        self.assertTrue(V3.compile("TQQQ").v3_legs)
+        self.assertTrue(V2_2.compile("SOXL").v3_legs)   # 별% 공식만 다르고 구간은 같음
+        self.assertFalse(RuleSet(name="x", star=V3.star, first_half=(("zero", 1.0),)).compile("TQQQ").v3_legs)
+        for rounding in (None, RoundingPolicy()):
+            fast = InfiniteBuyStrategyV3(1000000, divisions=40, rounding=rounding)
+            loop = InfiniteBuyStrategyV3(1000000, divisions=40, rounding=rounding)
+            loop._v3_legs = False
+            self.assertTrue(fast._v3_legs)
+            fast, loop = run_bars(fast, self.df), run_bars(loop, self.df)
+            self.assertTrue(any(t.half == "후반전" for t in fast.trades))
+            self.assertEqual(fast.trades, loop.trades)
+
+    def test_partial_override(self):
+        rules = rules_from_config({'star': {'TQQQ': [12, 1.2]}})
+        self.assertEqual(rules.star_params("TQQQ"), (12.0, 1.2))
+        self.assertEqual(rules.star_params("SOXL"), (20.0, 2.0))
+        self.assertEqual(rules.first_half, V3.first_half)
+
+    def test_custom_split(self):
+        """전반전 전액 0%LOC, 후반전 전액 3%LOC"""
+        rules = register_rules(RuleSet(name="test-zero", star={"default": (15, 1.5)},
+                                       first_half=(("zero", 1.0),), second_half=((3.0, 1.0),)))
+        self.addCleanup(RULES.pop, "test-zero")
+        self.assertIs(get_rules("test-zero"), rules)
+        s = self.run_rules(rules)
+        actions = {t.action for t in s.trades}
+        self.assertIn("buy_zero", actions)
+        self.assertLessEqual(actions, {"buy_zero", "buy_pct", "sell"})
+        first = next(t for t in s.trades if t.action == "buy_zero")
+        self.assertAlmostEqual(first.amount, s.cycles[0].unit_amount, places=2)
+
+    def test_reinvestment_policy(self):
+        rules = RuleSet(name="full", star=V3.star, profit_share=1.0, reinvest_divisor=20)
+        for rounding in (None, RoundingPolicy()):
+            s = self.run_rules(rules, rounding=rounding)
+            first = s.cycles[0]
+            self.assertTrue(first.closed)
+            self.assertGreater(first.profit, 0)
+            self.assertAlmostEqual(first.next_unit_amount, s.base_unit_amount + first.profit / 20, places=2)
+            self.assertEqual(s.reserve_pool, 0.0)
+
+    def test_v22_preset(self):
+        s = InfiniteBuyStrategyV3(1000000, divisions=40, rules=V2_2, ticker="SOXL")
+        self.assertEqual((s.star_base, s.star_coeff, s.target_profit_pct), (10.0, 0.5, 10.0))
+        s = InfiniteBuyStrategyV3(1000000, divisions=40, rules=V2_2, target_profit_pct=7.0)
+        self.assertEqual(s.target_profit_pct, 7.0)   # 명시한 목표가 우선
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            get_rules("v9")
+        with self.assertRaises(ValueError):
+            RuleSet(name="bad", star=V3.star, first_half=(("moon", 1.0),)).compile("TQQQ")
+        with self.assertRaises(ValueError):
+            RuleSet(name="bad", star={"SOXL": (20, 2)}).compile("TQQQ")
+
+
+class TestRuleComparison(unittest.TestCase):
+    def test_optimizer_compares_rules(self):
+        sim = make_sim(CONFIG)
+        sim.fetch_data()
+        search = SuccessiveHalving(sim, expand_grid({'rules': ['v3', 'v2.2'], 'divisions': [20, 40]}), eta=2)
+        search.run()
+        df = search.to_frame()
+        self.assertEqual(sorted(set(df['rules'])), ['v2.2', 'v3'])
+        self.assertTrue(df['total_return_pct'].notna().all())
+
+
+if __name__ == '__main__':
+    unittest.main()
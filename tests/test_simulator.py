@@ -0,0 +1,203 @@
+"""
+시뮬레이터 테스트
+"""
+import copy
+import json
+import tempfile
+import threading
+import unittest
+
+from tests.helpers import make_config, make_sim
+
+CONFIG = make_config(start_date='2018-01-01', end_date='2022-01-01')
+
+
+class TestResume(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config = copy.deepcopy(CONFIG)
+        self.config['backtest']['snapshot_dir'] = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def extended(self, end_date):
+        config = copy.deepcopy(self.config)
+        config['backtest']['end_date'] = end_date
+        return config
+
+    def assert_resume_matches_full(self, config):
+        make_sim(config).run_backtest()
+        longer = copy.deepcopy(config)
+        longer['backtest']['end_date'] = '2023-06-01'
+
+        resumed = make_sim(longer)
+        new_trades = resumed.run_backtest()
+        fresh = make_sim(longer)
+        fresh.snapshot_dir = None
+        fresh.run_backtest()
+
+        self.assertEqual(resumed.strategy.trades, fresh.strategy.trades)
+        self.assertEqual(resumed.strategy.cycles, fresh.strategy.cycles)
+        self.assertEqual(resumed.strategy.summary(), fresh.strategy.summary())
+        self.assertLess(len(new_trades), len(fresh.strategy.trades))
+        return resumed
+
+    def test_resume_float(self):
+        self.assert_resume_matches_full(self.config)
+
+    def test_resume_fixed(self):
+        self.config['strategy']['accounting'] = 'fixed'
+        self.assert_resume_matches_full(self.config)
+
+    def test_resume_twice(self):
+        """스냅샷에서 이어서 실행한 결과를 다시 이어서 실행"""
+        resumed = self.assert_resume_matches_full(self.config)
+        again = make_sim(self.extended('2024-01-01'))
+        again.run_backtest()
+        fresh = make_sim(self.extended('2024-01-01'))
+        fresh.snapshot_dir = None
+        fresh.run_backtest()
+        self.assertEqual(again.strategy.trades, fresh.strategy.trades)
+        self.assertGreater(len(again.strategy.trades), len(resumed.strategy.trades))
+
+    def test_concurrent_runs_same_key(self):
+        """같은 설정을 여러 요청이 동시에 실행해도 로그/스냅샷이 어긋나지 않음"""
+        make_sim(self.config).run_backtest()
+        ends = ['2022-06-01', '2023-01-01', '2022-03-01', '2023-06-01'] * 2
+        sims = [make_sim(self.extended(end)) for end in ends]
+        for sim in sims:
+            sim.bars()
+        errors = []
+
+        def run(sim):
+            try:
+                sim.run_backtest()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(sim,)) for sim in sims]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        again = make_sim(self.extended('2024-01-01'))
+        again.bars()
+        self.assertGreater(again.load_snapshot(), 0)   # 마지막에 저장한 스냅샷이 로그와 맞음
+        fresh = make_sim(self.extended('2024-01-01'))
+        fresh.snapshot_dir = None
+        fresh.run_backtest()
+        again = make_sim(self.extended('2024-01-01'))
+        again.run_backtest()
+        self.assertEqual(again.strategy.trades, fresh.strategy.trades)
+
+    def test_changed_history_restarts(self):
+        """스냅샷 마지막 날 종가가 다르면 처음부터 다시"""
+        sim = make_sim(self.config)
+        sim.run_backtest()
+        snap_path, _ = sim._snapshot_paths()
+        with open(snap_path) as f:
+            snap = json.load(f)
+        snap['last_close'] += 1.0
+        with open(snap_path, 'w') as f:
+            json.dump(snap, f)
+        again = make_sim(self.extended('2023-01-01'))
+        again.bars()
+        self.assertEqual(again.load_snapshot(), 0)
+
+    def test_old_snapshot_version_restarts(self):
+        """문자열 일자로 저장된 이전 버전 스냅샷은 쓰지 않고 처음부터"""
+        sim = make_sim(self.config)
+        sim.run_backtest()
+        snap_path, _ = sim._snapshot_paths()
+        with open(snap_path) as f:
+            snap = json.load(f)
+        del snap['version']
+        with open(snap_path, 'w') as f:
+            json.dump(snap, f)
+        again = make_sim(self.extended('2023-01-01'))
+        again.bars()
+        self.assertEqual(again.load_snapshot(), 0)
+
+
+class TestDayOrdinals(unittest.TestCase):
+    def test_trade_dates_and_joins(self):
+        """매매 기록 일자는 int 일수, 문자열은 출력 DataFrame에서만"""
+        sim = make_sim(CONFIG)
+        sim.run_backtest()
+        trades = sim.strategy.trades
+        self.assertIsInstance(trades[0].date, int)
+        bars = sim.bar_index([t.date for t in trades])
+        self.assertTrue((bars >= 0).all())
+        self.assertTrue((sim.data['Day'].values[bars] == [t.date for t in trades]).all())
+        self.assertEqual(sim.bar_index([trades[0].date - 100000]).tolist(), [-1])
+
+        df = sim.get_trade_df()
+        self.assertEqual(df['Date'].iloc[0], sim.data['Date'].iloc[bars[0]].strftime('%Y-%m-%d'))
+        cycles = sim.get_cycle_df()
+        first = sim.strategy.cycles[0]
+        self.assertEqual(cycles['Days'].iloc[0], first.end_date - first.start_date)
+        self.assertEqual(cycles['Bars'].iloc[0], sim.bar_index([first.end_date])[0] - sim.bar_index([first.start_date])[0] + 1)
+        points = sim.trade_points()
+        self.assertEqual(points['holdings'][bars[-1]], trades[-1].total_shares)
+
+
+class TestRetention(unittest.TestCase):
+    def run_level(self, retention, snapshot_dir=None, end_date=None):
+        config = copy.deepcopy(CONFIG)
+        config['strategy']['retention'] = retention
+        if snapshot_dir:
+            config['backtest']['snapshot_dir'] = snapshot_dir
+        if end_date:
+            config['backtest']['end_date'] = end_date
+        sim = make_sim(config)
+        sim.fetch_data()
+        sim.run_backtest()
+        return sim
+
+    def test_levels_same_metrics(self):
+        """보존 수준이 달라도 성과 지표 / 사이클 요약은 동일"""
+        full = self.run_level('trades')
+        for level in ('cycles', 'summary'):
+            sim = self.run_level(level)
+            self.assertEqual(sim.strategy.trades, [])
+            self.assertEqual(sim.calculate_performance(), full.calculate_performance())
+            self.assertEqual(sim.cycle_summary(), full.cycle_summary())
+            self.assertEqual(sim.strategy.summary(), full.strategy.summary())
+        self.assertEqual(self.run_level('cycles').strategy.cycles, full.strategy.cycles)
+        summary = self.run_level('summary').strategy
+        self.assertLessEqual(len(summary.cycles), 1)
+        self.assertEqual(summary.trade_count, len(full.strategy.trades))
+
+    def test_summary_resume(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.run_level('summary', tmp)
+            resumed = self.run_level('summary', tmp, end_date='2023-06-01')
+        fresh = self.run_level('summary', end_date='2023-06-01')
+        self.assertEqual(resumed.calculate_performance(), fresh.calculate_performance())
+        self.assertEqual(resumed.cycle_summary(), fresh.cycle_summary())
+
+    def test_invalid_level(self):
+        with self.assertRaises(ValueError):
+            self.run_level('everything')
+
+
+class TestRulesTarget(unittest.TestCase):
+    def test_rules_target_wins_over_config(self):
+        """strategy.rules: v2.2 → config의 5%가 아니라 규칙의 10%로 매도"""
+        config = copy.deepcopy(CONFIG)
+        config['strategy']['rules'] = 'v2.2'
+        sim = make_sim(config)
+        sim.run_backtest()
+        self.assertEqual(sim.strategy.target_profit_pct, 10.0)
+        buys = [t for t in sim.strategy.trades if t.action.startswith('buy')]
+        self.assertTrue(buys)
+        for t in buys:
+            self.assertAlmostEqual(t.target_sell_price / t.avg_price, 1.10, places=3)
+        self.assertEqual(sim.make_strategy(target_profit_pct=7.0).target_profit_pct, 7.0)
+        self.assertEqual(make_sim(CONFIG).make_strategy().target_profit_pct, 5.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
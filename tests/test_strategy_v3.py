@@ -0,0 +1,192 @@
+"""
+무한매수법 V3.0 전략 테스트
+"""
+import unittest
+
+import numpy as np
+
+from src.accounting import RoundingPolicy
+from src.broker.paper import PaperBroker
+from src.data.fake import FakeSource
+from src.data.store import day_ordinal
+from src.strategy import InfiniteBuyStrategyV3
+
+
+def run_bars(strategy, df):
+    """DataFrame 일봉을 전략에 순서대로 입력"""
+    closes = df['Close'].values
+    for i in range(1, len(df)):
+        strategy.process_day(
+            date=day_ordinal(df['Date'].iloc[i]),
+            open_price=df['Open'].iloc[i],
+            high=df['High'].iloc[i],
+            low=df['Low'].iloc[i],
+            close=closes[i],
+            prev_close=closes[i - 1],
+        )
+    return strategy
+
+
+class TestCycleIndex(unittest.TestCase):
+    def setUp(self):
+        df = FakeSource().fetch("TQQQ", "2020-01-01", "2024-01-01")
+        self.strategy = run_bars(InfiniteBuyStrategyV3(total_investment=10000000, divisions=40), df)
+
+    def test_offsets_match_trades(self):
+        """인덱스 오프셋 슬라이스 == 전체 탐색 결과"""
+        s = self.strategy
+        self.assertGreater(len(s.cycles), 1)
+        self.assertEqual(s.cycles[0].start, 0)
+        self.assertEqual(s.cycles[-1].end, len(s.trades))
+        for c in s.cycles:
+            expected = [t for t in s.trades if t.cycle == c.cycle]
+            self.assertEqual(s.cycle_trades(c.cycle), expected)
+
+    def test_cycle_numbers(self):
+        """진행 중 사이클은 첫 매매 전이면 빈 목록, 범위 밖 번호는 ValueError (0이 마지막 사이클이 되지 않게)"""
+        s = InfiniteBuyStrategyV3(40000, divisions=40)
+        self.assertEqual(s.cycle_trades(1), [])
+        s.process_day(day_ordinal("2024-01-02"), 100.0, 100.5, 99.0, 99.5, 100.0)   # 0%LOC 매수
+        s.process_day(day_ordinal("2024-01-03"), 99.0, 110.0, 98.5, 103.0, 99.5)    # 목표가 도달 → 매도
+        self.assertEqual([t.action for t in s.cycle_trades(1)], ["buy_zero", "sell"])
+        self.assertEqual((s.cycle, s.cycle_trades(2)), (2, []))
+        for cycle in (0, -1, 3):
+            with self.assertRaises(ValueError):
+                s.cycle_trades(cycle)
+        with self.assertRaises(ValueError):
+            self.strategy.cycle_trades(self.strategy.cycle + 1)
+
+    def test_aggregates(self):
+        s = self.strategy
+        for c in s.cycles:
+            trades = s.cycle_trades(c.cycle)
+            buys = [t for t in trades if t.action.startswith("buy")]
+            self.assertEqual(c.buys, len(buys))
+            self.assertAlmostEqual(c.max_t, max(t.t_value for t in buys), places=2)
+            self.assertEqual(c.second_half, any(t.star_pct <= 0 for t in buys))
+            self.assertEqual(c.closed, trades[-1].action == "sell")
+            if c.closed:
+                self.assertAlmostEqual(c.profit, trades[-1].amount - sum(t.amount for t in buys),
+                                       delta=0.01 * len(trades))  # 기록값은 센트 반올림
+
+    def test_unit_amount_growth(self):
+        s = self.strategy
+        closed = [c for c in s.cycles if c.closed]
+        for prev, nxt in zip(closed, s.cycles[1:]):
+            self.assertAlmostEqual(prev.next_unit_amount, nxt.unit_amount)
+
+
+class TestFixedAccounting(unittest.TestCase):
+    def setUp(self):
+        self.df = FakeSource().fetch("TQQQ", "2020-01-01", "2024-01-01")
+        self.policy = RoundingPolicy(cash_decimals=2, share_decimals=0, price_decimals=2)
+
+    def test_records_match_state(self):
+        """기록값 누적 == 내부 정수 상태 (반올림 드리프트 없음)"""
+        s = run_bars(InfiniteBuyStrategyV3(10000000, divisions=40, rounding=self.policy), self.df)
+        budget = 1000000000
+        for t in s.trades:
+            cents = round(t.amount * 100)
+            self.assertEqual(t.shares, int(t.shares))  # 정수 주
+            self.assertAlmostEqual(t.price * 100, round(t.price * 100), places=6)  # 센트 단위 가격
+            if t.action == "sell":
+                budget += cents
+            else:
+                budget -= cents
+            if t.action == "sell":
+                self.assertEqual(budget, round(t.remaining_budget * 100))
+        self.assertEqual(budget, s.position.budget_units)
+
+    def test_paper_broker_reconciles(self):
+        """같은 주문을 모의 브로커에 넣으면 잔고/수량이 정확히 일치"""
+        df = self.df
+        closes = df['Close'].values
+        bars = [(str(df['Date'].iloc[i].date()), df['Open'].iloc[i], df['High'].iloc[i], df['Low'].iloc[i],
+                 closes[i], closes[i - 1]) for i in range(1, len(df))]
+        s = InfiniteBuyStrategyV3(10000000, divisions=40, rounding=self.policy)
+        broker = PaperBroker(cash=10000000, rounding=self.policy)
+        for _ in self.mirror(s, broker, bars):
+            pass
+
+    def mirror(self, s, broker, bars):
+        """일봉마다 전략 주문을 브로커에 넣고 체결 → 잔고/수량 일치 확인 후 (기록, 체결) 반환"""
+        for date, open_price, high, low, close, prev_close in bars:
+            records = s.process_day(day_ordinal(date), open_price, high, low, close, prev_close)
+            for rec in records:
+                if rec.action == "sell":
+                    broker.place_sell_order("TQQQ", rec.price, rec.shares, "loc")
+                else:
+                    broker.place_buy_order("TQQQ", rec.price, rec.shares, "loc")
+            fills = broker.match("TQQQ", date, high, low, close)
+            self.assertEqual(len(fills), len(records))
+            self.assertTrue(all(f["status"] == "filled" for f in fills))
+            self.assertEqual(broker.cash_units, s.position.budget_units)
+            self.assertEqual(broker.holdings.get("TQQQ", {}).get("shares", 0), s.position.shares_units)
+            yield records, fills
+
+    def test_hand_computed_units(self):
+        """원금 $40,000 / 40분할 (1회 $1,000.00), 센트·정수 주 — 손으로 계산한 정수 단위와 비교"""
+        s = InfiniteBuyStrategyV3(40000, divisions=40, rounding=self.policy)
+        broker = PaperBroker(cash=40000, rounding=self.policy)
+        days = self.mirror(s, broker, [
+            # 날짜, 시가, 고가, 저가, 종가, 전일 종가
+            ("2024-01-02", 100.0, 100.5, 99.0, 99.5, 100.0),   # 0%LOC $100.00만 체결 (별%LOC $85.00 미체결)
+            ("2024-01-03", 97.5, 98.5, 97.0, 98.0, 97.30),     # 0%LOC $97.30
+            ("2024-01-04", 99.0, 104.0, 98.5, 103.0, 98.0),    # 고가 ≥ 목표가 → 전량 매도
+        ])
+
+        (buy,), _ = next(days)
+        # $500.00 // $100.00 = 5주, 체결 50000¢ → 예산 4000000 - 50000, T = ceil(50000/100000, 2) = 0.5
+        self.assertEqual((buy.action, buy.shares, s.position.cost_units), ("buy_zero", 5, 50000))
+        self.assertEqual((s.position.budget_units, buy.t_value, buy.target_sell_price), (3950000, 0.5, 105.0))
+
+        (buy,), _ = next(days)
+        # 50000¢ // 9730¢ = 5주 (48650¢, 잔돈 1350¢는 예산에 남음), 평단 98650/10 = $98.65
+        # 목표가 = ceil(98.65 x 1.05, 센트) = $103.59 (103.5825 올림), T = ceil(98650/100000, 2) = 0.99
+        self.assertEqual((buy.shares, s.position.shares_units, s.position.cost_units), (5, 10, 98650))
+        self.assertEqual((s.position.budget_units, buy.t_value, buy.target_sell_price), (3901350, 0.99, 103.59))
+
+        (sell,), (fill,) = next(days)
+        # 10주 x 10359¢ = 103590¢, 수익 4940¢ → 반복리 2470¢ / 적립 2470¢
+        # 1회매수금 = 100000 + 2470 // 40 = 100061¢, 새 예산 = 3901350 + 103590 = 4004940¢
+        self.assertEqual((sell.action, sell.price, fill["amount"]), ("sell", 103.59, 1035.9))
+        self.assertEqual((s.position.budget_units, s.position.shares_units), (4004940, 0))
+        self.assertEqual((s.cum_profit_units, s.reserve_units, s.unit_units), (2470, 2470, 100061))
+        self.assertEqual((s.cycle, s.unit_amount, s.cycles[0].profit), (2, 1000.61, 49.4))
+
+    def test_paper_broker_quarter_sell(self):
+        """부분(1/4) 매도: 수량 내림, 원가는 평균단가 비례로 정수 차감"""
+        broker = PaperBroker(cash=4000, rounding=self.policy)
+        broker.place_buy_order("TQQQ", 100.0, 5, "loc")
+        broker.place_buy_order("TQQQ", 97.30, 5, "loc")
+        broker.match("TQQQ", "2024-01-02", 100.5, 97.0, 99.0)
+        self.assertEqual(broker.holdings["TQQQ"], {"shares": 10, "cost": 98650})
+        broker.place_sell_order("TQQQ", 99.991, 10 / 4, "loc")   # 2.5주 → 2주, 매도가 올림 $100.00
+        (fill,) = broker.match("TQQQ", "2024-01-03", 100.5, 98.0, 100.0)
+        # 2 x 10000¢ = 20000¢ 입금, 원가 98650 - 98650 x 2 // 10 (= 19730) = 78920¢
+        self.assertEqual((fill["shares"], fill["amount"]), (2, 200.0))
+        self.assertEqual(broker.cash_units, 400000 - 98650 + 20000)
+        self.assertEqual(broker.holdings["TQQQ"], {"shares": 8, "cost": 78920})
+
+    def test_whole_share_above_leg_amount(self):
+        """주가 > 구간 금액이어도 1주씩 매수 → 사이클이 멈추지 않음, 남은 예산으로 1주도 못 사면 중단"""
+        s = InfiniteBuyStrategyV3(1200, divisions=20, rounding=self.policy)   # 1회 $60.00 → 구간 $30.00
+        broker = PaperBroker(cash=1200, rounding=self.policy)
+        bars = [("2024-01-02", 500.0, 501.0, 490.0, 500.0, 500.0),   # 0%LOC $500 → 1주, T = ceil(50000/6000, 2) = 8.34
+                ("2024-01-03", 500.0, 501.0, 490.0, 500.0, 500.0),   # 별% 2.49 → 0%LOC만 1주, T = 16.67 (후반전)
+                ("2024-01-04", 500.0, 501.0, 440.0, 450.0, 500.0),   # |별%|LOC $449.97, 남은 $200.00 → 매수 없음
+                ("2024-01-05", 450.0, 460.0, 440.0, 450.0, 500.0)]
+        records = [r for recs, _ in self.mirror(s, broker, bars) for r in recs]
+        self.assertEqual([(r.action, r.shares, r.amount) for r in records], [("buy_zero", 1, 500.0)] * 2)
+        self.assertEqual([r.t_value for r in records], [8.34, 16.67])
+        self.assertEqual((s.position.budget_units, s.position.round_num), (20000, 2))
+
+    def test_float_mode_unchanged(self):
+        """rounding 미지정 시 기존 float 결과 그대로"""
+        s = run_bars(InfiniteBuyStrategyV3(10000000, divisions=40), self.df)
+        self.assertIsNone(s.rounding)
+        self.assertNotEqual(s.trades[0].shares, int(s.trades[0].shares))
+
+
+if __name__ == '__main__':
+    unittest.main()
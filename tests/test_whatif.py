@@ -0,0 +1,95 @@
+"""
+What-if 그리드 테스트 (시나리오별 deepcopy + process_day 결과와 비교)
+"""
+import copy
+import unittest
+
+import numpy as np
+
+from src.accounting import RoundingPolicy
+from src.data.fake import FakeSource
+from src.data.store import day_ordinal
+from src.rules import RuleSet
+from src.strategy import InfiniteBuyStrategyV3
+from src.whatif import SessionState, next_session_grid
+from tests.test_strategy_v3 import run_bars
+
+
+def states_along(strategy, df, every=37):
+    """백테스트 도중 여러 시점의 (전략 복사본, 마지막 종가) — 전반전/후반전/보유 없음 섞이도록"""
+    closes = df['Close'].values
+    for i in range(1, len(df)):
+        strategy.process_day(day_ordinal(df['Date'].iloc[i]), df['Open'].iloc[i], df['High'].iloc[i],
+                             df['Low'].iloc[i], closes[i], closes[i - 1])
+        if i % every == 0:
+            yield copy.deepcopy(strategy), closes[i]
+
+
+class TestNextSessionGrid(unittest.TestCase):
+    def check(self, strategy, prev_close):
+        closes = prev_close * np.linspace(0.85, 1.15, 7)
+        lows = prev_close * np.linspace(0.80, 1.05, 6)
+        grid = next_session_grid(SessionState.from_strategy(strategy), prev_close, closes, lows)
+        for i, close in enumerate(closes):
+            for j, low in enumerate(lows):
+                s = copy.deepcopy(strategy)
+                records = s.process_day(day_ordinal("2099-01-01"), prev_close, close, low, close, prev_close)
+                actions = {r.action for r in records}
+                msg = f"close={close} low={low}"
+                self.assertEqual(grid['sell'][i, j], "sell" in actions, msg)
+                self.assertEqual(grid['star_fill'][i, j], "buy_star" in actions, msg)
+                self.assertEqual(grid['zero_fill'][i, j], "buy_zero" in actions, msg)
+                self.assertEqual(grid['pct_fill'][i, j], "buy_pct" in actions, msg)
+                self.assertEqual(grid['t_value'][i, j], s.calc_t(), msg)
+                self.assertEqual(grid['star_pct'][i, j], s.calc_star_pct(), msg)
+                self.assertAlmostEqual(grid['avg_price'][i, j], s.position.avg_price, places=9, msg=msg)
+                self.assertAlmostEqual(grid['target_sell_price'][i, j], s._target_sell_price(), places=9, msg=msg)
+                self.assertAlmostEqual(grid['remaining_budget'][i, j], s.position.remaining_budget, places=6, msg=msg)
+                self.assertAlmostEqual(grid['unit_amount'][i, j], s.unit_amount, places=6, msg=msg)
+                self.assertEqual(grid['valid'][i, j], low <= close)
+
+    def test_float_matches_process_day(self):
+        df = FakeSource().fetch("TQQQ", "2020-01-01", "2022-01-01")
+        strategy = InfiniteBuyStrategyV3(total_investment=100000, divisions=20)
+        for s, prev_close in states_along(strategy, df):
+            self.check(s, prev_close)
+
+    def test_fixed_matches_process_day(self):
+        df = FakeSource().fetch("SOXL", "2020-01-01", "2022-01-01")
+        strategy = InfiniteBuyStrategyV3(total_investment=100000, divisions=20, ticker="SOXL",
+                                         rounding=RoundingPolicy())
+        for s, prev_close in states_along(strategy, df):
+            self.check(s, prev_close)
+
+    def test_fixed_price_above_leg_amount(self):
+        """정수 주: 주가($100) > 구간 금액($25)이어도 process_day처럼 1주 체결"""
+        strategy = InfiniteBuyStrategyV3(total_investment=2000, divisions=40, rounding=RoundingPolicy())
+        strategy.process_day(day_ordinal("2024-01-02"), 100.0, 100.0, 90.0, 100.0, 100.0)
+        self.assertEqual((strategy.position.total_shares, strategy.calc_t()), (1.0, 2.0))
+        grid = next_session_grid(SessionState.from_strategy(strategy), 100.0, np.array([100.0]), np.array([90.0]))
+        self.assertTrue(grid['zero_fill'][0, 0])
+        self.assertEqual(grid['t_value'][0, 0], 4.0)
+        self.check(strategy, 100.0)
+
+    def test_custom_rules(self):
+        rules = RuleSet(name="whatif-test", star={"default": (12, 1.0)},
+                        first_half=(("star", 0.3), ("zero", 0.3), (2.0, 0.4)), second_half=((4.0, 1.0),),
+                        profit_share=1.0, reinvest_divisor=20)
+        df = FakeSource().fetch("TQQQ", "2020-01-01", "2022-01-01")
+        strategy = InfiniteBuyStrategyV3(total_investment=100000, divisions=20, rules=rules)
+        for s, prev_close in states_along(strategy, df):
+            self.check(s, prev_close)
+
+    def test_snapshot_is_independent(self):
+        """스냅샷 뜬 뒤 원본이 진행돼도 스냅샷 값은 그대로"""
+        df = FakeSource().fetch("TQQQ", "2020-01-01", "2020-03-01")
+        strategy = run_bars(InfiniteBuyStrategyV3(total_investment=100000), df)
+        state = SessionState.from_strategy(strategy)
+        shares = state.total_shares
+        strategy.process_day(day_ordinal("2099-01-01"), 1.0, 1.0, 1.0, 1.0, 1.0)
+        self.assertEqual(state.total_shares, shares)
+        self.assertNotEqual(strategy.position.total_shares, shares)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,22 +1,45 @@
 """
 무한매수법 V3.0 웹 UI (Flask)
 """
-from flask import Flask, render_template, request, jsonify, send_file
-import yaml
+from flask import Flask, Response, g, render_template, request, jsonify, send_file
 import os
 import io
+import json
 import base64
+import hmac
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: 잠금 없이 동작 (워커 하나로 실행할 것)
+    fcntl = None
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 
 from src.strategy import InfiniteBuyStrategyV3
 from src.simulator import InfiniteBuySimulator
+from src.whatif import SessionState, next_session_grid
+from src.live.state import StateHub, check_state
+from src.results import ResultsStore
+from src import metrics
 
 from src.order_table import OrderTableGenerator
 
 app = Flask(__name__)
 
+SNAPSHOT_DIR = os.environ.get('INFINITE_BUY_SNAPSHOT_DIR', '/tmp/infinite_buy_snapshots')
+# 워커 간 공유 시세 저장소 (tmpfs 권장): 한 워커가 받은 데이터를 다른 워커는 memmap으로 바로 사용
+STORE_DIR = os.environ.get(
+    'INFINITE_BUY_STORE_DIR',
+    '/dev/shm/infinite_buy_store' if os.path.isdir('/dev/shm') else '/tmp/infinite_buy_store',
+)
+# 탐색/배치 결과 저장소 (SQLite, 요청마다 인덱스로 조회) — 작업 디렉터리와 무관한 절대 경로
+RESULTS_DB = os.environ.get('INFINITE_BUY_RESULTS_DB', '/tmp/infinite_buy_results.sqlite')
+
 DEFAULT_CONFIG = {
     'strategy': {
         'divisions': 40,
@@ -34,18 +57,45 @@ DEFAULT_CONFIG = {
 }
 
 
+REQUEST_SECONDS = metrics.histogram('web_request_duration_seconds', '라우트별 요청 처리 시간',
+                                    ['route', 'method', 'status'])
+API_ERRORS = metrics.counter('web_api_errors_total', 'success=false로 응답한 API 요청', ['route'])
+
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        REQUEST_SECONDS.labels(route, request.method, response.status_code).observe(time.perf_counter() - started)
+    return response
+
+
+def api_error(e):
+    """실패 응답 (HTTP 200 + success=false) — 지표에는 따로 집계"""
+    API_ERRORS.labels(request.url_rule.rule).inc()
+    return jsonify({'success': False, 'error': str(e)})
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus 지표 (텍스트 노출 형식)"""
+    return Response(metrics.REGISTRY.exposition(), mimetype=metrics.CONTENT_TYPE)
+
+
 @app.route('/')
 def index():
     return render_template('index.html', config=DEFAULT_CONFIG)
 
 
-@app.route('/api/backtest', methods=['POST'])
-def run_backtest():
-    """백테스트 API"""
-    data = request.json
-    
-    # 임시 config 파일 생성
-    config = {
+def build_config(data):
+    """요청 JSON → config dict"""
+    return {
         'strategy': {
             'divisions': int(data.get('divisions', 40)),
             'total_investment': float(data.get('total_investment', 10000000)),
@@ -58,17 +108,31 @@ def run_backtest():
         'backtest': {
             'start_date': data.get('start_date', '2024-01-01'),
             'end_date': data.get('end_date', '2024-12-31'),
-        }
+            # 종료일만 늘어난 재요청은 저장된 상태에서 새 일봉만 처리
+            'snapshot_dir': SNAPSHOT_DIR,
+        },
+        'data': {
+            'source': 'yfinance',
+            'store': STORE_DIR,
+        },
     }
-    
-    tmp_config = '/tmp/infinite_buy_config.yaml'
-    with open(tmp_config, 'w') as f:
-        yaml.dump(config, f)
-    
+
+
+def run_simulation(data, config=None):
+    """요청 설정으로 백테스트 실행 (config dict로 바로 생성 → 요청끼리 공유하는 파일 없음)"""
+    sim = InfiniteBuySimulator.from_config(config if config is not None else build_config(data))
+    sim.fetch_data()
+    sim.run_backtest()
+    return sim
+
+
+@app.route('/api/backtest', methods=['POST'])
+def run_backtest():
+    """백테스트 API"""
+    data = request.json
+
     try:
-        sim = InfiniteBuySimulator(tmp_config)
-        sim.fetch_data()
-        sim.run_backtest()
+        sim = run_simulation(data)
         
         # 매매 기록
         df = sim.get_trade_df()
@@ -88,7 +152,24 @@ def run_backtest():
             'total_trades': len(df),
         })
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+        return api_error(e)
+
+
+@app.route('/api/cycles', methods=['POST'])
+def run_cycles():
+    """사이클 분석 API"""
+    data = request.json
+
+    try:
+        sim = run_simulation(data)
+        df = sim.get_cycle_df()
+        return jsonify({
+            'success': True,
+            'cycles': df.to_dict(orient='records'),
+            'summary': sim.cycle_summary(),
+        })
+    except Exception as e:
+        return api_error(e)
 
 
 @app.route('/api/order_table', methods=['POST'])
@@ -112,32 +193,196 @@ def generate_order_table():
     return jsonify({'success': True, 'table_html': table_html})
 
 
+# What-if: 설정별 마지막 전략 상태 캐시 (슬라이더 요청마다 백테스트하지 않도록)
+WHATIF_CACHE_SIZE = 32
+WHATIF_MAX_STEPS = 201
+_whatif_states = OrderedDict()
+_whatif_lock = threading.Lock()
+
+
+def whatif_state(data):
+    """설정 → (SessionState, 마지막 날짜, 마지막 종가), 처음 한 번만 백테스트"""
+    config = build_config(data)
+    key = json.dumps(config, sort_keys=True)
+    with _whatif_lock:
+        if key in _whatif_states:
+            _whatif_states.move_to_end(key)
+            return _whatif_states[key]
+    sim = run_simulation(data, config)   # 캐시 키를 만든 설정 그대로 실행
+    entry = (SessionState.from_strategy(sim.strategy),
+             sim.data['Date'].iloc[-1].strftime('%Y-%m-%d'), float(sim.data['Close'].iloc[-1]))
+    with _whatif_lock:
+        _whatif_states[key] = entry
+        while len(_whatif_states) > WHATIF_CACHE_SIZE:
+            _whatif_states.popitem(last=False)
+    return entry
+
+
+@app.route('/api/whatif', methods=['POST'])
+def run_whatif():
+    """내일 장 What-if API
+    - close_pct / low_pct: 전일 종가 대비 % 범위 [min, max], steps: 축별 격자 수
+    - fields: 필요한 결과만 (기본 전체) — 슬라이더는 필요한 필드만 받아야 응답이 작음
+    - 결과 배열은 [종가 인덱스][저가 인덱스]
+    """
+    data = request.json
+
+    try:
+        state, last_date, last_close = whatif_state(data)
+        prev_close = float(data.get('prev_close') or last_close)
+        steps = min(int(data.get('steps', 41)), WHATIF_MAX_STEPS)
+        close_lo, close_hi = data.get('close_pct', [-10.0, 10.0])
+        low_lo, low_hi = data.get('low_pct', [-15.0, 0.0])
+        closes = prev_close * (1 + np.linspace(float(close_lo), float(close_hi), steps) / 100)
+        lows = prev_close * (1 + np.linspace(float(low_lo), float(low_hi), steps) / 100)
+        grid = next_session_grid(state, prev_close, closes, lows)
+        fields = data.get('fields') or list(grid)
+        return jsonify({
+            'success': True,
+            'last_date': last_date,
+            'prev_close': prev_close,
+            'state': {
+                't_value': state.t_value,
+                'star_pct': state.star_pct,
+                'avg_price': state.total_cost / state.total_shares if state.total_shares else 0.0,
+                'target_sell_price': state.target_sell_price(),
+                'remaining_budget': state.remaining_budget,
+            },
+            'closes': closes.round(4).tolist(),
+            'lows': lows.round(4).tolist(),
+            'grid': {k: grid[k].tolist() for k in fields},
+        })
+    except Exception as e:
+        return api_error(e)
+
+
+_results_store = None
+_results_lock = threading.Lock()
+
+
+def results_store():
+    global _results_store
+    with _results_lock:
+        if _results_store is None:
+            _results_store = ResultsStore(RESULTS_DB)
+    return _results_store
+
+
+@app.route('/api/results', methods=['POST'])
+def query_results():
+    """저장된 탐색 결과 조회
+    {"where": {"ticker": "SOXL", "divisions": 30, "max_drawdown_pct__gt": -40},
+     "order_by": "total_return_pct", "desc": true, "limit": 20, "columns": [...]}
+    """
+    data = request.json or {}
+
+    try:
+        started = time.perf_counter()
+        store = results_store()
+        rows = store.query(data.get('where'), order_by=data.get('order_by', 'total_return_pct'),
+                           desc=bool(data.get('desc', True)), limit=data.get('limit', 20),
+                           columns=data.get('columns'))
+        return jsonify({'success': True, 'rows': rows,
+                        'elapsed_ms': round((time.perf_counter() - started) * 1000, 3)})
+    except Exception as e:
+        return api_error(e)
+
+
+# 실시간 계좌 상태: 봇이 publish → 브라우저는 /api/stream (SSE)으로 바뀐 필드만 받음
+# 허브는 이 프로세스 메모리에만 있음 → 워커 프로세스 하나로 실행 (gunicorn -w 1 --threads N)
+STATE_HUB = StateHub()
+# 허브 소유 잠금: 실시간 라우트를 처음 받은 워커만 허브를 맡고, 다른 워커는 503 (상태가 워커별로 갈라지지 않게)
+HUB_LOCK = os.environ.get('INFINITE_BUY_HUB_LOCK', '/tmp/infinite_buy_state_hub.lock')
+_hub_lock = threading.Lock()
+_hub_lock_file = None
+_hub_pid = None
+# 상태 발행 인증: 설정하면 X-Publish-Token 헤더 필요, 없으면 같은 호스트(loopback)에서만 발행 가능
+PUBLISH_TOKEN = os.environ.get('INFINITE_BUY_PUBLISH_TOKEN')
+
+
+def publish_allowed() -> bool:
+    if PUBLISH_TOKEN:
+        return hmac.compare_digest(request.headers.get('X-Publish-Token', ''), PUBLISH_TOKEN)
+    return request.remote_addr in ('127.0.0.1', '::1')
+
+
+def hub_owner() -> bool:
+    """이 프로세스가 STATE_HUB를 맡는지 (잠금은 프로세스가 끝날 때까지 유지, 소유 워커가 죽으면 다음 워커가 가져감)
+    잠금을 잡은 뒤 fork된 자식은 소유자가 아님 → pid로 구분"""
+    global _hub_lock_file, _hub_pid
+    with _hub_lock:
+        if fcntl is None or _hub_pid == os.getpid():
+            return True
+        f = open(HUB_LOCK, 'w')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        _hub_lock_file, _hub_pid = f, os.getpid()
+        return True
+
+
+def hub_unavailable():
+    return jsonify({'success': False,
+                    'error': '실시간 상태는 워커 프로세스 하나에서만 제공 (gunicorn -w 1 --threads N)'}), 503
+
+
+@app.route('/api/stream')
+def stream_state():
+    """계좌 상태 SSE 스트림
+    - accounts: 쉼표로 구분한 계좌만 (기본 전체)
+    - 재연결 시 브라우저가 보내는 Last-Event-ID로 놓친 delta부터 이어서 전송
+    """
+    if not hub_owner():
+        return hub_unavailable()
+    accounts = [a for a in request.args.get('accounts', '').split(',') if a]
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('last_id')
+    return Response(STATE_HUB.stream(last_id, accounts or None), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/live/state', methods=['GET', 'POST'])
+def live_state():
+    """GET: 전체 상태 스냅샷 / POST: 다른 프로세스의 봇이 상태 발행 {account, state} 또는 {account, remove: true}"""
+    if not hub_owner():
+        return hub_unavailable()
+    if request.method == 'GET':
+        return jsonify({'success': True, **STATE_HUB.snapshot()})
+    if not publish_allowed():
+        return jsonify({'success': False, 'error': '발행 권한 없음 (X-Publish-Token)'}), 403
+    data = request.json
+
+    try:
+        account = data['account']
+        if data.get('remove'):
+            return jsonify({'success': True, 'removed': STATE_HUB.remove(str(account))})
+        delta = STATE_HUB.publish(account, check_state(account, data['state']))
+        return jsonify({'success': True, 'seq': STATE_HUB.seq, 'changed': sorted(delta['set']) if delta else []})
+    except Exception as e:
+        return api_error(e)
+
+
 def generate_chart_b64(sim):
     """차트를 base64 문자열로"""
-    df = sim.get_trade_df()
-    if df.empty:
+    points = sim.trade_points()
+    if not len(points['bar']):
         return None
-    
-    price_df = sim.data[['Date', 'Close']].copy()
-    price_df['Date'] = price_df['Date'].astype(str)
-    df['Date'] = df['Date'].astype(str)
-    merged = price_df.merge(df, on='Date', how='left')
-    
+    bars, buy = points['bar'], points['buy']
+    days = np.arange(len(sim.data))
+
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 8), sharex=True)
     
-    ax1.plot(range(len(merged)), merged['Close'], label=f"{sim.ticker} Close", alpha=0.6, color='#2196F3')
-    buy_idx = merged[merged['Action'].str.contains('buy')].index
-    sell_idx = merged[merged['Action'] == 'sell'].index
-    ax1.scatter(buy_idx, merged.loc[buy_idx, 'Price'], color='#4CAF50', marker='^', s=60, label='Buy', zorder=5)
-    ax1.scatter(sell_idx, merged.loc[sell_idx, 'Price'], color='#F44336', marker='v', s=60, label='Sell', zorder=5)
+    ax1.plot(days, sim.data['Close'].values, label=f"{sim.ticker} Close", alpha=0.6, color='#2196F3')
+    ax1.scatter(bars[buy], points['price'][buy], color='#4CAF50', marker='^', s=60, label='Buy', zorder=5)
+    ax1.scatter(bars[~buy], points['price'][~buy], color='#F44336', marker='v', s=60, label='Sell', zorder=5)
     ax1.set_title(f"Infinite Buy Strategy V3.0 - {sim.ticker}", fontsize=14, fontweight='bold')
     ax1.set_ylabel("Price ($)")
     ax1.legend()
     ax1.grid(True, alpha=0.3)
     
-    merged['Total Shares'] = merged['Total Shares'].ffill().fillna(0)
-    ax2.fill_between(range(len(merged)), merged['Total Shares'], color='#9C27B0', alpha=0.3)
-    ax2.plot(range(len(merged)), merged['Total Shares'], color='#9C27B0', alpha=0.6)
+    ax2.fill_between(days, points['holdings'], color='#9C27B0', alpha=0.3)
+    ax2.plot(days, points['holdings'], color='#9C27B0', alpha=0.6)
     ax2.set_xlabel("Trading Days")
     ax2.set_ylabel("Shares")
     ax2.set_title("Position Size", fontsize=12)